@@ -56,71 +56,39 @@ export default function Dashboard() {
     { name: 'Jun', sales: 2390 },
   ];
 
-  const categoryData = [
-    { name: 'Contact Lenses', value: 400 },
-    { name: 'Eyeglasses', value: 300 },
-    { name: 'Sunglasses', value: 300 },
-    { name: 'Accessories', value: 200 },
-  ];
+  const [categoryData, setCategoryData] = useState([]);
 
   const COLORS = ['#0A83BC', '#4CAF50', '#FF9800', '#81D4FA'];
 
   useEffect(() => {
-    fetchStats();
-    fetchRecentData();
+    fetchSummary();
   }, []);
 
-  const fetchStats = async () => {
+  // One request: counts are aggregated (and briefly cached) by the backend
+  const fetchSummary = async () => {
     try {
       const token = localStorage.getItem('token');
-      
-      // Fetch products
-      const productsResponse = await fetch('http://localhost:8000/api/products/', {
+      const response = await fetch('http://localhost:8000/api/admin/summary', {
         headers: {
           'Authorization': `Token ${token}`,
         },
       });
-      const products = await productsResponse.json();
-      
-      // Fetch users
-      let usersCount = 0;
-      try {
-        const usersResponse = await fetch('http://localhost:8000/api/auth/users/', {
-          headers: {
-            'Authorization': `Token ${token}`,
-          },
-        });
-        if (usersResponse.ok) {
-          const users = await usersResponse.json();
-          usersCount = users.length;
-        }
-      } catch (error) {
-        console.error('Error fetching users:', error);
+      if (!response.ok) {
+        throw new Error(`Summary request failed (${response.status})`);
       }
-      
-      // Update with real data
+      const summary = await response.json();
+
       setStats({
-        totalProducts: products.length,
-        totalOrders: 25, // Mock data - replace when orders API is available
-        totalUsers: usersCount,
-        totalRevenue: 15000, // Mock data - replace when revenue API is available
+        totalProducts: summary.products.total,
+        totalOrders: summary.orders.total,
+        totalUsers: summary.users.total,
+        totalRevenue: Number(summary.orders.revenue_last_30_days),
       });
-    } catch (error) {
-      console.error('Error fetching stats:', error);
-    }
-  };
+      setCategoryData(
+        summary.products.by_category.map((row) => ({ name: row.category, value: row.count }))
+      );
+      setRecentProducts(summary.products.recent);
 
-  const fetchRecentData = async () => {
-    try {
-      const token = localStorage.getItem('token');
-      const response = await fetch('http://localhost:8000/api/products/', {
-        headers: {
-          'Authorization': `Token ${token}`,
-        },
-      });
-      const products = await response.json();
-      setRecentProducts(products.slice(0, 5));
-      
       // Mock recent orders data
       setRecentOrders([
         { id: 1, customer: 'John Doe', total: 150, status: 'Delivered' },
@@ -128,7 +96,7 @@ export default function Dashboard() {
         { id: 3, customer: 'Mike Johnson', total: 320, status: 'Pending' },
       ]);
     } catch (error) {
-      console.error('Error fetching recent data:', error);
+      console.error('Error fetching summary:', error);
     }
   };
 
@@ -251,11 +251,17 @@ export default function Products() {
         ? `http://localhost:8000/api/products/${editProduct.id}/`
         : 'http://localhost:8000/api/products/';
       
+      const headers = {
+        'Authorization': `Token ${localStorage.getItem('token')}`,
+      };
+      if (editProduct?.updated_at) {
+        // Rejected with 412 if someone else saved this product meanwhile
+        headers['If-Match'] = `"${editProduct.updated_at}"`;
+      }
+
       const response = await fetch(url, {
         method: editProduct ? 'PUT' : 'POST',
-        headers: {
-          'Authorization': `Token ${localStorage.getItem('token')}`,
-        },
+        headers,
         body: formDataToSend,
       });
 
@@ -280,6 +286,15 @@ export default function Products() {
     }
   };
 
+  // Image changes bump the product's version; keep the one we'll send
+  // as If-Match in step so our own edits don't look like a conflict
+  const keepVersion = (response) => {
+    const etag = response.headers.get('ETag');
+    if (etag) {
+      setEditProduct((current) => current && { ...current, updated_at: etag.replace(/"/g, '') });
+    }
+  };
+
   const handleDelete = async (id) => {
     if (window.confirm('Are you sure you want to delete this product?')) {
       try {
@@ -702,6 +717,7 @@ export default function Products() {
                           }
                         );
                         if (response.ok) {
+                          keepVersion(response);
                           setFormData({
                             ...formData,
                             existingImages: formData.existingImages.filter((_, i) => i !== index),
@@ -738,6 +754,7 @@ export default function Products() {
                             }
                           );
                           if (response.ok) {
+                            keepVersion(response);
                             // Refresh the product data
                             fetchProducts();
                           }
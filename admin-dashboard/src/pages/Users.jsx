@@ -143,12 +143,18 @@ export default function Users() {
       console.log('Making request to:', url);
       console.log('With data:', dataToSend);
 
+      const headers = {
+        'Content-Type': 'application/json',
+        'Authorization': `Token ${token}`,
+      };
+      if (editUser?.updated_at) {
+        // Rejected with 412 if someone else saved this user meanwhile
+        headers['If-Match'] = `"${editUser.updated_at}"`;
+      }
+
       const response = await fetch(url, {
         method: editUser ? 'PUT' : 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Token ${token}`,
-        },
+        headers,
         body: JSON.stringify(dataToSend),
       });
 
@@ -178,6 +184,9 @@ export default function Users() {
           }
         }
         showNotification(errorMessage, 'error');
+        if (response.status === 412) {
+          fetchUsers();
+        }
       }
     } catch (error) {
       console.error('Error:', error);
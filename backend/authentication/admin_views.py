@@ -1,11 +1,22 @@
-from rest_framework import status
+import logging
+from django.db.models import Q
+from django.http import Http404
+from rest_framework import serializers, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from lenshive_backend.db_router import replica_reads
+from lenshive_backend.export import EXPORT_FORMATS, export_response
+from lenshive_backend.preconditions import PreconditionFailed, etag_for, expect_unchanged, if_match
 from .models import User
 from .serializers import UserSerializer, AdminUserSerializer
 from .permissions import IsAdminUser
 
+logger = logging.getLogger(__name__)
+
+USER_EXPORT_COLUMNS = ['id', 'full_name', 'email', 'role', 'is_active', 'created_at', 'updated_at']
+
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def list_users(request):
@@ -23,6 +34,28 @@ def list_users(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def export_users(request, file_format):
+    """
+    Stream users as CSV or JSON Lines (admin only)
+    GET /api/auth/users/export.csv?role=staff,admin&is_active=true&search=ali
+    GET /api/auth/users/export.jsonl
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    users = User.objects.all()
+    roles = [role.strip() for role in request.query_params.get('role', '').split(',') if role.strip()]
+    if roles:
+        users = users.filter(role__in=roles)
+    is_active = request.query_params.get('is_active', '').lower()
+    if is_active in ('1', 'true', 'yes', '0', 'false', 'no'):
+        users = users.filter(is_active=is_active in ('1', 'true', 'yes'))
+    search = request.query_params.get('search', '').strip()
+    if search:
+        users = users.filter(Q(full_name__icontains=search) | Q(email__icontains=search))
+    return export_response(users, USER_EXPORT_COLUMNS, 'users', file_format)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def create_user(request):
@@ -40,6 +73,8 @@ def create_user(request):
                 status=status.HTTP_201_CREATED
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    except serializers.ValidationError as e:
+        return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {'message': str(e)},
@@ -68,10 +103,10 @@ def manage_user(request, user_id):
 
     if request.method == 'GET':
         serializer = AdminUserSerializer(user)
-        return Response(serializer.data)
+        return Response(serializer.data, headers={'ETag': etag_for(user.updated_at)})
 
     elif request.method == 'PUT':
-        print(f"Updating user {user_id}, received data:", request.data)  # Debug log
+        logger.debug('Updating user', extra={'user_id': str(user_id), 'data': dict(request.data.items())})
         serializer = AdminUserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             # Prevent removing admin role from yourself
@@ -81,16 +116,26 @@ def manage_user(request, user_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             try:
-                updated_user = serializer.save()
-                print(f"User {user_id} updated successfully")  # Debug log
-                return Response(AdminUserSerializer(updated_user).data)
+                # With If-Match, only writes if nobody else saved the user since
+                with expect_unchanged(user, if_match(request)):
+                    updated_user = serializer.save()
+                logger.info('User updated', extra={'user_id': str(user_id), 'fields': sorted(request.data.keys())})
+                return Response(
+                    AdminUserSerializer(updated_user).data,
+                    headers={'ETag': etag_for(updated_user.updated_at)}
+                )
+            except PreconditionFailed as e:
+                logger.info('User update conflict', extra={'user_id': str(user_id)})
+                return Response({'message': str(e.detail)}, status=e.status_code)
+            except serializers.ValidationError as e:
+                return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
-                print(f"Error updating user {user_id}:", str(e))  # Debug log
+                logger.exception('Error updating user', extra={'user_id': str(user_id)})
                 return Response(
                     {'message': f'Error updating user: {str(e)}'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        print(f"Validation errors for user {user_id}:", serializer.errors)  # Debug log
+        logger.info('User update rejected', extra={'user_id': str(user_id), 'errors': serializer.errors})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from .models import AuthToken
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    `Authorization: Token <key>` against AuthToken, rejecting expired
+    tokens. Use slides the idle window forward, but last_used_at is only
+    written once per AUTH_TOKEN_TOUCH_INTERVAL so most requests stay
+    read-only.
+    """
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        try:
+            token = AuthToken.objects.select_related('user').get(key=key)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        now = timezone.now()
+        if token.is_expired(now):
+            raise exceptions.AuthenticationFailed('Token has expired. Please log in again.')
+
+        if now - token.last_used_at > settings.AUTH_TOKEN_TOUCH_INTERVAL:
+            AuthToken.objects.filter(key=token.key).update(last_used_at=now)
+            token.last_used_at = now
+        return token.user, token
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
 from authentication.models import User
 import getpass
 
@@ -34,21 +35,20 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('Invalid email address'))
             return
 
-        # Check if user already exists
-        if User.objects.filter(email=email).exists():
-            self.stdout.write(self.style.ERROR(f'User with email {email} already exists'))
-            return
-
         try:
             # Create admin user
-            user = User.objects.create_admin(
-                email=email,
-                full_name=full_name,
-                password=password
-            )
+            with transaction.atomic():
+                user = User.objects.create_admin(
+                    email=email,
+                    full_name=full_name,
+                    password=password
+                )
             self.stdout.write(self.style.SUCCESS(f'Successfully created admin user: {email}'))
             self.stdout.write(self.style.SUCCESS(f'Name: {full_name}'))
             self.stdout.write(self.style.SUCCESS(f'Role: {user.role}'))
+        except IntegrityError:
+            # The unique LOWER(email) index caught an existing account
+            self.stdout.write(self.style.ERROR(f'User with email {email} already exists'))
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error creating admin: {str(e)}'))
 
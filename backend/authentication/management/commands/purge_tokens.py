@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from authentication.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired API tokens in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens deleted per statement')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to wait between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count expired tokens')
+
+    def handle(self, *args, **options):
+        # Fixed cut-off, so tokens expiring while we run wait for the next run
+        expired = AuthToken.objects.filter(AuthToken.expired_q(timezone.now()))
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired tokens')
+            return
+
+        batch_size = max(1, options['batch_size'])
+        deleted = 0
+        started = time.perf_counter()
+        while True:
+            # Primary-key batches keep each DELETE (and its locks) short
+            keys = list(expired.values_list('key', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += AuthToken.objects.filter(key__in=keys).delete()[0]
+            if len(keys) < batch_size:
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired tokens in {time.perf_counter() - started:.1f}s'
+        ))
@@ -10,7 +10,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         email = options['email']
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get_by_email(email)
             user.role = 'admin'
             user.save()
             self.stdout.write(self.style.SUCCESS(f'Successfully changed role to admin for: {email}'))
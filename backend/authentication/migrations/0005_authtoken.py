@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:12
+
+import authentication.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_existing_tokens(apps, schema_editor):
+    # Keep signed-in users signed in; their idle window starts now
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('authentication', 'AuthToken')
+    now = django.utils.timezone.now()
+    AuthToken.objects.bulk_create(
+        [
+            AuthToken(key=token.key, user_id=token.user_id, last_used_at=now)
+            for token in Token.objects.all().iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_remove_user_groups_remove_user_user_permissions'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(default=authentication.models.generate_token_key, max_length=40, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'auth_tokens',
+            },
+        ),
+        migrations.RunPython(copy_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:15
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def lowercase_emails(apps, schema_editor):
+    # Registration already lowercased, but the admin edit path did not
+    User = apps.get_model('authentication', 'User')
+    # Compared in Python: MySQL's default collation would call them equal
+    for user in User.objects.only('pk', 'email').iterator():
+        lowered = user.email.lower()
+        if lowered == user.email:
+            continue
+        if User.objects.filter(email__iexact=lowered).exclude(pk=user.pk).exists():
+            raise RuntimeError(
+                f'{user.email} differs from another account only by case; '
+                'merge or rename one of them, then migrate again'
+            )
+        User.objects.filter(pk=user.pk).update(email=lowered)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_authtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='users_email_ci_unique'),
+        ),
+    ]
@@ -1,10 +1,28 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.utils import timezone
+from lenshive_backend.preconditions import ConditionalUpdateMixin
+import secrets
 import uuid
 
+def normalize_email_address(email):
+    """Emails are stored and compared lowercased"""
+    return (email or '').strip().lower()
+
 class UserManager(BaseUserManager):
     """Custom user manager for email-based authentication"""
     
+    def get_by_email(self, email):
+        """Case-insensitive lookup through the LOWER(email) unique index"""
+        return self.alias(email_lower=Lower('email')).get(
+            email_lower=normalize_email_address(email)
+        )
+    
+    def get_by_natural_key(self, email):
+        return self.get_by_email(email)
+    
     def create_user(self, email, full_name, password=None, role='customer', **extra_fields):
         """Create and save a regular user"""
         if not email:
@@ -16,7 +34,7 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('role', role)
         
         user = self.model(
-            email=self.normalize_email(email),
+            email=normalize_email_address(email),
             full_name=full_name,
             **extra_fields
         )
@@ -34,7 +52,7 @@ class UserManager(BaseUserManager):
         )
         return user
 
-class User(AbstractBaseUser):
+class User(ConditionalUpdateMixin, AbstractBaseUser):
     """Custom User model with email as username and role-based access"""
     
     ROLE_CHOICES = [
@@ -71,6 +89,49 @@ class User(AbstractBaseUser):
     
     class Meta:
         db_table = 'users'
+        constraints = [
+            # Stops Foo@x.com and foo@x.com coexisting; lookups go through
+            # it via UserManager.get_by_email
+            models.UniqueConstraint(Lower('email'), name='users_email_ci_unique'),
+        ]
         verbose_name = 'User'
         verbose_name_plural = 'Users'
 
+
+
+def generate_token_key():
+    return secrets.token_hex(20)
+
+
+class AuthToken(models.Model):
+    """
+    API token for one signed-in device. Tokens expire after
+    AUTH_TOKEN_IDLE_TIMEOUT without use (each use slides the window) and
+    AUTH_TOKEN_MAX_AGE after login regardless; `manage.py purge_tokens`
+    deletes expired rows.
+    """
+    key = models.CharField(max_length=40, primary_key=True, default=generate_token_key)
+    user = models.ForeignKey(User, related_name='auth_tokens', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'auth_tokens'
+
+    def __str__(self):
+        return f'{self.key[:8]}... ({self.user_id})'
+
+    @classmethod
+    def expired_q(cls, now=None):
+        now = now or timezone.now()
+        return (
+            models.Q(last_used_at__lt=now - settings.AUTH_TOKEN_IDLE_TIMEOUT)
+            | models.Q(created_at__lt=now - settings.AUTH_TOKEN_MAX_AGE)
+        )
+
+    def is_expired(self, now=None):
+        now = now or timezone.now()
+        return (
+            self.last_used_at < now - settings.AUTH_TOKEN_IDLE_TIMEOUT
+            or self.created_at < now - settings.AUTH_TOKEN_MAX_AGE
+        )
@@ -1,8 +1,17 @@
 from rest_framework import permissions
 
+
 class IsAdminUser(permissions.BasePermission):
     """
     Custom permission to only allow admin users to access the view.
     """
     def has_permission(self, request, view):
-        return request.user and request.user.role == 'admin'
\ No newline at end of file
+        return request.user and request.user.role == 'admin'
+
+
+class IsStaffMember(permissions.BasePermission):
+    """
+    Custom permission to only allow staff and admin users to access the view.
+    """
+    def has_permission(self, request, view):
+        return request.user and request.user.is_authenticated and request.user.is_staff_member
@@ -1,5 +1,20 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import User
+from .models import User, normalize_email_address
+
+EMAIL_TAKEN = 'Email already registered'
+
+
+def create_unique_user(**kwargs):
+    """
+    Insert a user in one statement; the unique LOWER(email) index decides
+    whether the address is taken, so there is no check-then-insert race.
+    """
+    try:
+        with transaction.atomic():
+            return User.objects.create_user(**kwargs)
+    except IntegrityError:
+        raise serializers.ValidationError({'email': [EMAIL_TAKEN]})
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model"""
@@ -44,6 +59,8 @@ class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['full_name', 'fullName', 'email', 'password']
+        # Uniqueness is left to the database index (see create)
+        extra_kwargs = {'email': {'validators': []}}
     
     def validate(self, data):
         """Ensure either full_name or fullName is provided"""
@@ -56,22 +73,18 @@ class RegisterSerializer(serializers.ModelSerializer):
         return data
     
     def validate_email(self, value):
-        """Check if email already exists"""
-        if User.objects.filter(email=value.lower()).exists():
-            raise serializers.ValidationError('Email already registered')
-        return value.lower()
+        return normalize_email_address(value)
     
     def create(self, validated_data):
         """Create new user with encrypted password"""
         # Remove fullName if present (we use full_name)
         validated_data.pop('fullName', None)
         
-        user = User.objects.create_user(
+        return create_unique_user(
             email=validated_data['email'],
             full_name=validated_data['full_name'],
             password=validated_data['password']
         )
-        return user
 
 class LoginSerializer(serializers.Serializer):
     """Serializer for user login"""
@@ -84,12 +97,12 @@ class LoginSerializer(serializers.Serializer):
     
     def validate(self, data):
         """Validate login credentials"""
-        email = data.get('email', '').lower()
+        email = data.get('email', '')
         password = data.get('password')
         
         if email and password:
             try:
-                user = User.objects.get(email=email)
+                user = User.objects.get_by_email(email)
                 if user.check_password(password):
                     if not user.is_active:
                         raise serializers.ValidationError('User account is disabled')
@@ -113,26 +126,29 @@ class AdminUserSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = User
-        fields = ['id', 'full_name', 'email', 'password', 'role', 'is_active']
-        read_only_fields = ['id']
+        fields = ['id', 'full_name', 'email', 'password', 'role', 'is_active', 'updated_at']
+        read_only_fields = ['id', 'updated_at']
         extra_kwargs = {
+            'email': {'validators': []},
             'role': {'required': True},
             'is_active': {'required': False, 'default': True}
         }
+
+    def validate_email(self, value):
+        return normalize_email_address(value)
         
     def create(self, validated_data):
         password = validated_data.pop('password', None)
         if not password:
             raise serializers.ValidationError({'password': 'Password is required'})
             
-        user = User.objects.create_user(
-            email=validated_data['email'].lower(),
+        return create_unique_user(
+            email=validated_data['email'],
             full_name=validated_data['full_name'],
             password=password,
             role=validated_data.get('role', 'customer'),
             is_active=validated_data.get('is_active', True)
         )
-        return user
         
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
@@ -142,5 +158,9 @@ class AdminUserSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
             
-        instance.save()
+        try:
+            with transaction.atomic():
+                instance.save()
+        except IntegrityError:
+            raise serializers.ValidationError({'email': [EMAIL_TAKEN]})
         return instance
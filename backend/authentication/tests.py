@@ -1,4 +1,129 @@
+import io
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import AuthToken, User
 
-# Create your tests here.
 
+class ExpiringTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='app@example.com', password='pass12345', full_name='App')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'app@example.com', 'password': 'pass12345'}, format='json'
+        )
+        return response.data['token']
+
+    def profile(self, key):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        return self.client.get('/api/user/profile')
+
+    def test_each_login_gets_its_own_token(self):
+        first, second = self.login(), self.login()
+        self.assertNotEqual(first, second)
+        self.profile(first)
+        self.client.post('/api/auth/logout/')
+        self.assertEqual(self.profile(first).status_code, 401)
+        self.assertEqual(self.profile(second).status_code, 200)
+
+    def test_idle_tokens_expire(self):
+        key = self.login()
+        AuthToken.objects.filter(key=key).update(last_used_at=timezone.now() - timedelta(days=31))
+        response = self.profile(key)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('expired', response.data['detail'])
+
+    def test_use_slides_the_window_but_rarely_writes(self):
+        key = self.login()
+        stale = timezone.now() - timedelta(days=20)
+        AuthToken.objects.filter(key=key).update(last_used_at=stale)
+        self.profile(key)
+        touched = AuthToken.objects.get(key=key).last_used_at
+        self.assertGreater(touched, stale)
+
+        with self.assertNumQueries(1):
+            # Recently touched: one lookup, no write
+            self.profile(key)
+
+    def test_tokens_expire_after_max_age_even_if_used(self):
+        key = self.login()
+        AuthToken.objects.filter(key=key).update(created_at=timezone.now() - timedelta(days=181))
+        self.assertEqual(self.profile(key).status_code, 401)
+
+    def test_purge_deletes_only_expired_tokens_in_batches(self):
+        live = AuthToken.objects.create(user=self.user)
+        for _ in range(5):
+            AuthToken.objects.create(user=self.user)
+        AuthToken.objects.exclude(key=live.key).update(last_used_at=timezone.now() - timedelta(days=60))
+
+        out = io.StringIO()
+        call_command('purge_tokens', '--batch-size', '2', '--pause', '0', stdout=out)
+        self.assertIn('Deleted 5', out.getvalue())
+        self.assertEqual(list(AuthToken.objects.values_list('key', flat=True)), [live.key])
+
+
+class EmailUniquenessTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self, email):
+        return self.client.post(
+            '/api/auth/register/',
+            {'fullName': 'Jane', 'email': email, 'password': 'pass12345'},
+            format='json'
+        )
+
+    def test_registration_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register('Jane@Example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['user']['email'], 'jane@example.com')
+        user_queries = [q['sql'] for q in queries.captured_queries if '"users"' in q['sql']]
+        self.assertEqual(len(user_queries), 1)
+        self.assertTrue(user_queries[0].startswith('INSERT'))
+
+    def test_duplicate_in_another_case_is_rejected(self):
+        self.register('jane@example.com')
+        response = self.register('JANE@example.COM')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Email already registered')
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_index_rejects_case_variants_written_directly(self):
+        User.objects.create_user(email='jane@example.com', password='x', full_name='Jane')
+        with self.assertRaises(IntegrityError):
+            User.objects.bulk_create([User(email='Jane@Example.com', full_name='Other')])
+
+    def test_login_ignores_case(self):
+        self.register('jane@example.com')
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'JANE@Example.com', 'password': 'pass12345'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class UserEditConflictTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(email='admin@example.com', password='x', full_name='Admin', role='admin')
+        self.user = User.objects.create_user(email='jane@example.com', password='x', full_name='Jane')
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        self.url = f'/api/auth/users/{self.user.pk}/'
+
+    def test_stale_edit_gets_412(self):
+        listed = self.client.get('/api/auth/users/').data
+        version = next(u['updated_at'] for u in listed if u['id'] == str(self.user.pk))
+        first = self.client.put(self.url, {'full_name': 'Jane A'}, format='json', HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(first.status_code, 200)
+        second = self.client.put(self.url, {'full_name': 'Jane B'}, format='json', HTTP_IF_MATCH=f'"{version}"')
+        self.assertEqual(second.status_code, 412)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.full_name, 'Jane A')
+        retry = self.client.put(self.url, {'full_name': 'Jane B'}, format='json', HTTP_IF_MATCH=first['ETag'])
+        self.assertEqual(retry.status_code, 200)
@@ -12,6 +12,7 @@ urlpatterns = [
     # Admin user management endpoints
     path('users/', admin_views.list_users, name='list_users'),
     path('users/create/', admin_views.create_user, name='create_user'),
+    path('users/export.<str:file_format>', admin_views.export_users, name='export_users'),
     path('users/<uuid:user_id>/', admin_views.manage_user, name='manage_user'),
 ]
 
@@ -1,10 +1,13 @@
-from rest_framework import status
+import logging
+from rest_framework import serializers, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.authtoken.models import Token
+from lenshive_backend.db_router import replica_reads
 from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
-from .models import User
+from .models import AuthToken, User
+
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -15,27 +18,33 @@ def register(request):
     Body: {"fullName": "John Doe", "email": "john@example.com", "password": "password123"}
     OR:   {"full_name": "John Doe", "email": "john@example.com", "password": "password123"}
     """
-    # Log incoming data for debugging
-    print(f"Received registration data: {request.data}")
+    # Passwords are masked by the logging setup
+    logger.debug('Registration request', extra={'data': dict(request.data.items())})
     
     serializer = RegisterSerializer(data=request.data)
     
     if serializer.is_valid():
-        user = serializer.save()
-        # Create authentication token
-        token, created = Token.objects.get_or_create(user=user)
-        
-        # Serialize user data
-        user_data = UserSerializer(user).data
-        
-        return Response({
-            'message': 'User registered successfully',
-            'user': user_data,
-            'token': token.key
-        }, status=status.HTTP_201_CREATED)
+        try:
+            # A taken email surfaces here, from the unique index
+            user = serializer.save()
+        except serializers.ValidationError as e:
+            errors = e.detail
+        else:
+            # Create authentication token
+            token = AuthToken.objects.create(user=user)
+            
+            # Serialize user data
+            user_data = UserSerializer(user).data
+            
+            return Response({
+                'message': 'User registered successfully',
+                'user': user_data,
+                'token': token.key
+            }, status=status.HTTP_201_CREATED)
+    else:
+        errors = serializer.errors
     
     # Return validation errors
-    errors = serializer.errors
     error_message = 'Registration failed'
     
     if 'email' in errors:
@@ -62,8 +71,8 @@ def login(request):
     
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        # Get or create authentication token
-        token, created = Token.objects.get_or_create(user=user)
+        # A new token per sign-in, so each device can log out on its own
+        token = AuthToken.objects.create(user=user)
         
         # Serialize user data
         user_data = UserSerializer(user).data
@@ -82,6 +91,7 @@ def login(request):
         'message': error_message
     }, status=status.HTTP_400_BAD_REQUEST)
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_profile(request):
@@ -104,8 +114,8 @@ def logout(request):
     Headers: Authorization: Token <token>
     """
     try:
-        # Delete the user's authentication token
-        request.user.auth_token.delete()
+        # Delete the token this device is using
+        request.auth.delete()
         return Response({
             'message': 'Logout successful'
         }, status=status.HTTP_200_OK)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class HomeServiceConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'home_service'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,173 @@
+"""
+Slot availability engine for home-service bookings.
+
+Every technician's reserved time is kept in memory as a sorted list of
+non-overlapping intervals, so "is this technician free?" is a single
+bisect (O(log n)) and listing free slots for a window only touches the
+bookings inside that window. The index is an accelerator: the database
+(`BookingSlot`'s unique constraint) stays the source of truth, and a
+technician's schedule is reloaded whenever a write conflicts or the
+cached copy is older than `ScheduleIndex.max_age`.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import timedelta
+from django.utils import timezone
+
+# Calendar granularity; bookings reserve every slot they touch
+SLOT_MINUTES = 30
+DEFAULT_DURATION_MINUTES = 60
+SERVICE_DURATIONS = {
+    'Eye Test at Home': 60,
+    'Frame Repair & Adjustment': 30,
+    'Contact Lens Fitting': 60,
+    'Lens Replacement': 30,
+    'Progressive Lens Consultation': 90,
+}
+
+SLOT = timedelta(minutes=SLOT_MINUTES)
+
+
+def service_duration(service_type):
+    return timedelta(minutes=SERVICE_DURATIONS.get(service_type, DEFAULT_DURATION_MINUTES))
+
+
+def floor_to_slot(value):
+    """Round a datetime down to the start of its slot"""
+    value = value.replace(second=0, microsecond=0)
+    return value - timedelta(minutes=value.minute % SLOT_MINUTES)
+
+
+def covering_interval(start, end):
+    """Expand [start, end) outwards to whole slots"""
+    slot_start = floor_to_slot(start)
+    slot_end = floor_to_slot(end)
+    if slot_end < end:
+        slot_end += SLOT
+    return slot_start, slot_end
+
+
+def slot_starts(start, end):
+    """Start of every slot covered by [start, end)"""
+    current, slot_end = covering_interval(start, end)
+    starts = []
+    while current < slot_end:
+        starts.append(current)
+        current += SLOT
+    return starts
+
+
+class TechnicianSchedule:
+    """Sorted, non-overlapping busy intervals for one technician"""
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        self._booking_ids = []
+        self.loaded_at = time.monotonic()
+        for start, end, booking_id in sorted(intervals):
+            self._starts.append(start)
+            self._ends.append(end)
+            self._booking_ids.append(booking_id)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, start, end, booking_id):
+        index = bisect_left(self._starts, start)
+        self._starts.insert(index, start)
+        self._ends.insert(index, end)
+        self._booking_ids.insert(index, booking_id)
+
+    def remove(self, booking_id):
+        try:
+            index = self._booking_ids.index(booking_id)
+        except ValueError:
+            return
+        del self._starts[index], self._ends[index], self._booking_ids[index]
+
+    def conflicts(self, start, end, ignore=None):
+        """
+        True if [start, end) overlaps a busy interval. Intervals never
+        overlap each other, so their ends are sorted too and only the last
+        interval starting before `end` can reach past `start`.
+        """
+        start, end = covering_interval(start, end)
+        index = bisect_left(self._starts, end) - 1
+        if index >= 0 and self._booking_ids[index] == ignore:
+            index -= 1
+        return index >= 0 and self._ends[index] > start
+
+    def free_slots(self, window_start, window_end, duration):
+        """Slot starts in the window where `duration` fits without a conflict"""
+        free = []
+        duration_slots = covering_interval(window_start, window_start + duration)
+        span = duration_slots[1] - duration_slots[0]
+
+        current = floor_to_slot(window_start)
+        if current < window_start:
+            current += SLOT
+        # Jump straight to the first interval that can touch the window
+        index = max(bisect_right(self._starts, current) - 1, 0)
+        while current + span <= window_end:
+            while index < len(self._starts) and self._ends[index] <= current:
+                index += 1
+            if index < len(self._starts) and self._starts[index] < current + span:
+                current = max(current + SLOT, self._ends[index])
+                continue
+            free.append(current)
+            current += SLOT
+        return free
+
+
+class ScheduleIndex:
+    """Process-wide cache of `TechnicianSchedule`s, loaded on demand"""
+
+    max_age = 60  # seconds
+
+    def __init__(self):
+        self._schedules = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, technician_id):
+        schedule = self._schedules.get(technician_id)
+        if schedule is None or time.monotonic() - schedule.loaded_at > self.max_age:
+            schedule = self._load(technician_id)
+            with self._lock:
+                self._schedules[technician_id] = schedule
+        return schedule
+
+    def invalidate(self, technician_id=None):
+        with self._lock:
+            if technician_id is None:
+                self._schedules.clear()
+            else:
+                self._schedules.pop(technician_id, None)
+
+    def record(self, technician_id, start, end, booking_id):
+        with self._lock:
+            schedule = self._schedules.get(technician_id)
+            if schedule is not None:
+                schedule.add(*covering_interval(start, end), booking_id)
+
+    def release(self, technician_id, booking_id):
+        with self._lock:
+            schedule = self._schedules.get(technician_id)
+            if schedule is not None:
+                schedule.remove(booking_id)
+
+    def _load(self, technician_id):
+        from .models import Booking
+
+        rows = Booking.objects.filter(
+            technician_id=technician_id,
+            status__in=Booking.ACTIVE_STATUSES,
+            ends_at__gt=timezone.now() - timedelta(days=1)
+        ).values_list('scheduled_at', 'ends_at', 'id')
+        return TechnicianSchedule(
+            (*covering_interval(start, end), booking_id) for start, end, booking_id in rows
+        )
+
+
+schedule_index = ScheduleIndex()
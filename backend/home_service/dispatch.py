@@ -0,0 +1,153 @@
+"""
+Nearest-technician lookup.
+
+Technician locations are bucketed into a fixed lat/lng grid held in
+memory. A query walks outwards ring by ring from the customer's cell,
+computing haversine distances for each ring's technicians in one NumPy
+call, and stops as soon as no unvisited ring can hold anyone closer than
+the k-th technician already found. Everything runs in-process.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+# ~5.5 km cells: a city is a few dozen buckets
+CELL_DEGREES = 0.05
+DEFAULT_RADIUS_KM = 50
+
+
+def cell_of(latitude, longitude):
+    return (
+        int(math.floor(latitude / CELL_DEGREES)),
+        int(math.floor(longitude / CELL_DEGREES)),
+    )
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Distance from one point to arrays of points, vectorised"""
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlng = np.radians(longitudes) - np.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class TechnicianGrid:
+    """Grid-bucket index over active technicians with a known location"""
+
+    max_age = 300  # seconds
+
+    def __init__(self, rows=()):
+        rows = list(rows)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.latitudes = np.array([row[1] for row in rows], dtype=np.float64)
+        self.longitudes = np.array([row[2] for row in rows], dtype=np.float64)
+        self.loaded_at = time.monotonic()
+
+        buckets = defaultdict(list)
+        for position, (latitude, longitude) in enumerate(zip(self.latitudes, self.longitudes)):
+            buckets[cell_of(latitude, longitude)].append(position)
+        self.buckets = {cell: np.array(positions) for cell, positions in buckets.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _ring(self, center, radius):
+        """Positions of technicians in cells exactly `radius` cells from `center`"""
+        row, col = center
+        if radius == 0:
+            cells = [center]
+        else:
+            cells = [(row - radius, c) for c in range(col - radius, col + radius + 1)]
+            cells += [(row + radius, c) for c in range(col - radius, col + radius + 1)]
+            cells += [(r, col - radius) for r in range(row - radius + 1, row + radius)]
+            cells += [(r, col + radius) for r in range(row - radius + 1, row + radius)]
+        found = [self.buckets[cell] for cell in cells if cell in self.buckets]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def nearest(self, latitude, longitude, k=5, radius_km=DEFAULT_RADIUS_KM, accept=None):
+        """
+        Up to `k` (technician_id, distance_km) pairs, closest first, within
+        `radius_km`. `accept(technician_id)` filters out busy technicians;
+        it's only called for technicians that could make the top k.
+        """
+        if not len(self.ids):
+            return []
+
+        center = cell_of(latitude, longitude)
+        # Shortest side of a cell, in km, anywhere the search can reach
+        max_lat = min(abs(latitude) + radius_km / KM_PER_DEGREE, 89.0)
+        cell_km = CELL_DEGREES * KM_PER_DEGREE * math.cos(math.radians(max_lat))
+        max_rings = int(radius_km / cell_km) + 1
+
+        chosen = []
+        pending_ids = np.empty(0, dtype=np.int64)
+        pending_distances = np.empty(0)
+        for radius in range(max_rings + 1):
+            positions = self._ring(center, radius)
+            if len(positions):
+                distances = haversine_km(
+                    latitude, longitude, self.latitudes[positions], self.longitudes[positions]
+                )
+                pending_ids = np.concatenate([pending_ids, self.ids[positions]])
+                pending_distances = np.concatenate([pending_distances, distances])
+
+            # Anyone outside this ring is at least this far away
+            bound = radius * cell_km
+            order = np.argsort(pending_distances, kind='stable')
+            keep = np.ones(len(order), dtype=bool)
+            for index in order:
+                distance = pending_distances[index]
+                if distance > bound or len(chosen) == k:
+                    break
+                keep[index] = False
+                if distance > radius_km:
+                    continue
+                technician_id = int(pending_ids[index])
+                if accept is None or accept(technician_id):
+                    chosen.append((technician_id, float(distance)))
+            pending_ids = pending_ids[keep]
+            pending_distances = pending_distances[keep]
+
+            if len(chosen) == k:
+                break
+        return chosen
+
+
+class GridCache:
+    """Process-wide `TechnicianGrid`, rebuilt when technicians change"""
+
+    def __init__(self):
+        self._grid = None
+        self._lock = threading.Lock()
+
+    def grid(self):
+        grid = self._grid
+        if grid is None or time.monotonic() - grid.loaded_at > TechnicianGrid.max_age:
+            grid = self._load()
+            with self._lock:
+                self._grid = grid
+        return grid
+
+    def invalidate(self):
+        with self._lock:
+            self._grid = None
+
+    def _load(self):
+        from .models import Technician
+
+        rows = Technician.objects.filter(
+            is_active=True,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude')
+        return TechnicianGrid((pk, float(lat), float(lng)) for pk, lat, lng in rows)
+
+
+technician_grid = GridCache()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from home_service.models import Technician
+
+
+class Command(BaseCommand):
+    help = 'Add a home-service technician'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', type=str, required=True, help='Technician full name')
+        parser.add_argument('--phone', type=str, default='', help='Contact number')
+        parser.add_argument('--lat', type=float, help='Base location latitude')
+        parser.add_argument('--lng', type=float, help='Base location longitude')
+
+    def handle(self, *args, **options):
+        try:
+            technician = Technician.objects.create(
+                full_name=options['name'],
+                phone=options['phone'],
+                latitude=options.get('lat'),
+                longitude=options.get('lng')
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Successfully added technician #{technician.id}: {technician.full_name}'
+            ))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error adding technician: {str(e)}'))
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db import models
+import uuid
+
+
+class Technician(models.Model):
+    """Field technician who visits customers for home-service bookings"""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        related_name='technician_profile',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    full_name = models.CharField(max_length=255)
+    phone = models.CharField(max_length=20, blank=True)
+    # Base location used for dispatch (see dispatch.py)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return self.full_name
+
+
+class Booking(models.Model):
+    STATUS_CHOICES = [
+        ('requested', 'Requested'),
+        ('scheduled', 'Scheduled'),
+        ('in_progress', 'In Progress'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+    ]
+    # Statuses that keep the technician's time reserved
+    ACTIVE_STATUSES = ('requested', 'scheduled', 'in_progress')
+    # Statuses the customer may still reschedule or cancel
+    MODIFIABLE_STATUSES = ('requested', 'scheduled')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='home_service_bookings',
+        on_delete=models.CASCADE
+    )
+    technician = models.ForeignKey(
+        Technician,
+        related_name='bookings',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    service_type = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='requested')
+    scheduled_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    address = models.TextField()
+    # Optional, sent by the app from the device or a map pin
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    phone = models.CharField(max_length=20)
+    notes = models.TextField(blank=True, default='')
+    admin_note = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-scheduled_at']
+        indexes = [
+            models.Index(fields=['user', '-scheduled_at'], name='booking_user_scheduled_idx'),
+            models.Index(fields=['technician', 'scheduled_at'], name='booking_tech_scheduled_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.service_type} @ {self.scheduled_at}'
+
+    @property
+    def address_short(self):
+        """Main area and city, e.g. "Gulberg III, Lahore" """
+        parts = self.address.split(',')
+        if len(parts) >= 2:
+            return f'{parts[0].strip()}, {parts[-1].strip()}'
+        return self.address if len(self.address) <= 40 else f'{self.address[:37]}...'
+
+
+class BookingSlot(models.Model):
+    """
+    One reserved slot on a technician's calendar. A booking holds one row
+    per slot it covers; the unique (technician, start) constraint is what
+    makes double-booking impossible, even across processes.
+    """
+
+    technician = models.ForeignKey(Technician, related_name='slots', on_delete=models.CASCADE)
+    booking = models.ForeignKey(Booking, related_name='slots', on_delete=models.CASCADE)
+    start = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['technician', 'start'], name='unique_technician_slot'),
+        ]
+
+    def __str__(self):
+        return f'{self.technician_id} @ {self.start}'
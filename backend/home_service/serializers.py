@@ -0,0 +1,65 @@
+from rest_framework import serializers
+from .models import Booking
+
+
+class BookingSummarySerializer(serializers.ModelSerializer):
+    """Matches BookingSummary.fromJson in the Flutter app"""
+
+    userId = serializers.CharField(source='user_id', read_only=True)
+    status = serializers.SerializerMethodField()
+    scheduledAt = serializers.DateTimeField(source='scheduled_at', read_only=True)
+    endsAt = serializers.DateTimeField(source='ends_at', read_only=True)
+    addressShort = serializers.CharField(source='address_short', read_only=True)
+    serviceType = serializers.CharField(source='service_type', read_only=True)
+    adminNote = serializers.CharField(source='admin_note', read_only=True, allow_null=True)
+    technicianId = serializers.IntegerField(source='technician_id', read_only=True, allow_null=True)
+
+    class Meta:
+        model = Booking
+        fields = [
+            'id',
+            'userId',
+            'status',
+            'scheduledAt',
+            'endsAt',
+            'addressShort',
+            'serviceType',
+            'adminNote',
+            'technicianId'
+        ]
+
+    def get_status(self, obj):
+        """Flutter enum names are camelCase (in_progress -> inProgress)"""
+        head, *rest = obj.status.split('_')
+        return head + ''.join(word.capitalize() for word in rest)
+
+
+class BookingRequestSerializer(serializers.Serializer):
+    """Matches BookingRequest.toJson in the Flutter app"""
+
+    serviceType = serializers.CharField(max_length=100)
+    preferredAt = serializers.DateTimeField()
+    address = serializers.CharField()
+    latitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=-90, max_value=90, required=False
+    )
+    longitude = serializers.DecimalField(
+        max_digits=9, decimal_places=6, min_value=-180, max_value=180, required=False
+    )
+    phone = serializers.CharField(max_length=20)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class RescheduleSerializer(serializers.Serializer):
+    newTime = serializers.DateTimeField()
+
+
+class CancelSerializer(serializers.Serializer):
+    reason = serializers.CharField(max_length=500)
+
+
+class NearbyTechnicianSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='technician.id')
+    fullName = serializers.CharField(source='technician.full_name')
+    phone = serializers.CharField(source='technician.phone')
+    distanceKm = serializers.FloatField(source='distance_km')
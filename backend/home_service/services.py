@@ -0,0 +1,168 @@
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .availability import schedule_index, service_duration, slot_starts
+from .dispatch import DEFAULT_RADIUS_KM, technician_grid
+from .models import Booking, BookingSlot, Technician
+
+# Customers can't change a booking this close to the visit
+CHANGE_CUTOFF = timedelta(hours=24)
+
+
+class BookingError(Exception):
+    """User-facing booking failure (mirrors FriendlyFailure in the app)"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _active_technician_ids():
+    return list(Technician.objects.filter(is_active=True).values_list('id', flat=True))
+
+
+def _claim(booking, technician_id, start, end):
+    """
+    Reserve every slot of [start, end) for `booking` on one technician.
+    Runs in a savepoint so a lost race only undoes this attempt.
+    Returns False if another booking already holds one of the slots.
+    """
+    try:
+        with transaction.atomic():
+            BookingSlot.objects.bulk_create([
+                BookingSlot(technician_id=technician_id, booking=booking, start=slot)
+                for slot in slot_starts(start, end)
+            ])
+    except IntegrityError:
+        # Our cached schedule was stale; reload it next time
+        schedule_index.invalidate(technician_id)
+        return False
+    return True
+
+
+def nearest_available_technicians(latitude, longitude, start, end, k=5,
+                                  radius_km=DEFAULT_RADIUS_KM, ignore=None):
+    """
+    Up to `k` (technician_id, distance_km) pairs for technicians free
+    during [start, end), closest first.
+    """
+    def is_free(technician_id):
+        return not schedule_index.schedule(technician_id).conflicts(start, end, ignore=ignore)
+
+    return technician_grid.grid().nearest(
+        float(latitude), float(longitude), k=k, radius_km=radius_km, accept=is_free
+    )
+
+
+def _assign(booking, start, end, preferred_technician_id=None):
+    """
+    Claim the first technician free for [start, end). The current
+    technician goes first; then, if the booking has a location, the
+    nearest free technicians; then everyone else.
+    """
+    candidates = _active_technician_ids()
+    if booking.latitude is not None and booking.longitude is not None:
+        nearest = [
+            technician_id for technician_id, _ in nearest_available_technicians(
+                booking.latitude, booking.longitude, start, end, ignore=booking.pk
+            )
+        ]
+        candidates = nearest + [pk for pk in candidates if pk not in nearest]
+    if preferred_technician_id in candidates:
+        candidates.remove(preferred_technician_id)
+        candidates.insert(0, preferred_technician_id)
+
+    for technician_id in candidates:
+        if schedule_index.schedule(technician_id).conflicts(start, end, ignore=booking.pk):
+            continue
+        if _claim(booking, technician_id, start, end):
+            return technician_id
+    return None
+
+
+def create_booking(user, service_type, scheduled_at, address, phone, notes='',
+                   latitude=None, longitude=None):
+    if scheduled_at <= timezone.now():
+        raise BookingError('Please choose a time in the future.')
+
+    ends_at = scheduled_at + service_duration(service_type)
+    with transaction.atomic():
+        booking = Booking.objects.create(
+            user=user,
+            service_type=service_type,
+            scheduled_at=scheduled_at,
+            ends_at=ends_at,
+            address=address,
+            latitude=latitude,
+            longitude=longitude,
+            phone=phone,
+            notes=notes or ''
+        )
+        technician_id = _assign(booking, scheduled_at, ends_at)
+        if technician_id is None:
+            raise BookingError('No technician is available at that time.', status_code=409)
+        booking.technician_id = technician_id
+        booking.save(update_fields=['technician'])
+
+    schedule_index.record(technician_id, scheduled_at, ends_at, booking.pk)
+    return booking
+
+
+def _check_modifiable(booking, action):
+    if booking.scheduled_at - timezone.now() < CHANGE_CUTOFF:
+        raise BookingError("Changes aren't allowed within 24 hours of service time.")
+    if booking.status not in Booking.MODIFIABLE_STATUSES:
+        raise BookingError(f'Cannot {action} {booking.get_status_display().lower()} booking')
+
+
+def reschedule_booking(booking, new_time):
+    _check_modifiable(booking, 'reschedule')
+    if new_time - timezone.now() < CHANGE_CUTOFF:
+        raise BookingError('Please choose a time at least 24 hours from now.')
+
+    old_technician_id = booking.technician_id
+    new_end = new_time + service_duration(booking.service_type)
+    with transaction.atomic():
+        booking.slots.all().delete()
+        technician_id = _assign(booking, new_time, new_end, preferred_technician_id=old_technician_id)
+        if technician_id is None:
+            raise BookingError('No technician is available at that time.', status_code=409)
+
+        booking.technician_id = technician_id
+        booking.scheduled_at = new_time
+        booking.ends_at = new_end
+        booking.admin_note = 'Rescheduled by customer'
+        booking.save()
+
+    if old_technician_id:
+        schedule_index.release(old_technician_id, booking.pk)
+    schedule_index.record(technician_id, new_time, new_end, booking.pk)
+    return booking
+
+
+def cancel_booking(booking, reason):
+    _check_modifiable(booking, 'cancel')
+
+    with transaction.atomic():
+        booking.slots.all().delete()
+        booking.status = 'cancelled'
+        booking.admin_note = f'Cancelled: {reason}'
+        booking.save()
+
+    if booking.technician_id:
+        schedule_index.release(booking.technician_id, booking.pk)
+    return booking
+
+
+def free_slots(window_start, window_end, service_type=None):
+    """
+    Slot starts in [window_start, window_end) at which at least one active
+    technician can take a booking of `service_type`.
+    """
+    duration = service_duration(service_type)
+    available = set()
+    for technician_id in _active_technician_ids():
+        schedule = schedule_index.schedule(technician_id)
+        available.update(schedule.free_slots(window_start, window_end, duration))
+    return sorted(available)
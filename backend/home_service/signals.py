@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .dispatch import technician_grid
+from .models import Technician
+
+
+@receiver(post_save, sender=Technician)
+@receiver(post_delete, sender=Technician)
+def invalidate_technician_grid(sender, **kwargs):
+    """Technician moved, joined or left: rebuild the dispatch grid on next use"""
+    technician_grid.invalidate()
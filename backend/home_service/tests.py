@@ -0,0 +1,214 @@
+from datetime import timedelta
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import AuthToken, User
+from .availability import TechnicianSchedule, floor_to_slot, schedule_index
+from .dispatch import TechnicianGrid, haversine_km, technician_grid
+from .models import Booking, BookingSlot, Technician
+from .services import BookingError, create_booking, free_slots
+
+
+def at(days, hour, minute=0):
+    """Aware datetime `days` from today at hour:minute"""
+    day = timezone.localtime() + timedelta(days=days)
+    return day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+class TechnicianScheduleTests(TestCase):
+    def setUp(self):
+        self.schedule = TechnicianSchedule([
+            (at(2, 10), at(2, 11), 'a'),
+            (at(2, 13), at(2, 14), 'b'),
+        ])
+
+    def test_conflicts(self):
+        self.assertTrue(self.schedule.conflicts(at(2, 10, 30), at(2, 11, 30)))
+        self.assertTrue(self.schedule.conflicts(at(2, 12, 30), at(2, 13, 30)))
+        self.assertFalse(self.schedule.conflicts(at(2, 11), at(2, 12)))
+        self.assertFalse(self.schedule.conflicts(at(2, 14), at(2, 15)))
+
+    def test_partial_slots_are_reserved_whole(self):
+        # 10:50 falls in the 10:30 slot, which booking 'a' holds
+        self.assertTrue(self.schedule.conflicts(at(2, 11) - timedelta(minutes=10), at(2, 12)))
+
+    def test_ignore_own_booking(self):
+        self.assertFalse(self.schedule.conflicts(at(2, 10, 30), at(2, 11, 30), ignore='a'))
+
+    def test_free_slots(self):
+        free = self.schedule.free_slots(at(2, 9), at(2, 15), timedelta(hours=1))
+        self.assertEqual(free, [at(2, 9), at(2, 11), at(2, 11, 30), at(2, 12), at(2, 14)])
+
+
+class TechnicianGridTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        # Scatter technicians around Lahore
+        self.rows = [
+            (i, 31.5 + rng.uniform(-0.4, 0.4), 74.35 + rng.uniform(-0.4, 0.4))
+            for i in range(500)
+        ]
+        self.grid = TechnicianGrid(self.rows)
+
+    def brute_force(self, latitude, longitude, k, radius_km):
+        ids = np.array([row[0] for row in self.rows])
+        distances = haversine_km(
+            latitude, longitude,
+            np.array([row[1] for row in self.rows]),
+            np.array([row[2] for row in self.rows])
+        )
+        order = np.argsort(distances, kind='stable')
+        return [int(ids[i]) for i in order if distances[i] <= radius_km][:k]
+
+    def test_matches_full_scan(self):
+        for latitude, longitude in [(31.52, 74.36), (31.1, 73.95), (32.0, 74.9)]:
+            found = [pk for pk, _ in self.grid.nearest(latitude, longitude, k=7, radius_km=30)]
+            self.assertEqual(found, self.brute_force(latitude, longitude, 7, 30))
+
+    def test_accept_filters_busy_technicians(self):
+        nearest = self.grid.nearest(31.52, 74.36, k=5, accept=lambda pk: pk % 2 == 0)
+        self.assertEqual(len(nearest), 5)
+        self.assertTrue(all(pk % 2 == 0 for pk, _ in nearest))
+        distances = [distance for _, distance in nearest]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_radius_limits_results(self):
+        self.assertEqual(self.grid.nearest(10.0, 10.0, k=3), [])
+
+
+class BookingServiceTests(TestCase):
+    def setUp(self):
+        schedule_index.invalidate()
+        technician_grid.invalidate()
+        self.user = User.objects.create_user(
+            email='customer@example.com', full_name='Customer', password='password123'
+        )
+        self.technician = Technician.objects.create(full_name='Tech One')
+
+    def book(self, when, service_type='Eye Test at Home'):
+        return create_booking(self.user, service_type, when, 'House 1, Gulberg III, Lahore', '0300')
+
+    def test_double_booking_is_rejected(self):
+        self.book(at(3, 10))
+        with self.assertRaises(BookingError):
+            self.book(at(3, 10, 30))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_second_technician_takes_overlap(self):
+        other = Technician.objects.create(full_name='Tech Two')
+        first = self.book(at(3, 10))
+        second = self.book(at(3, 10))
+        self.assertEqual({first.technician_id, second.technician_id}, {self.technician.id, other.id})
+
+    def test_stale_index_falls_back_to_database(self):
+        self.book(at(3, 10))
+        # Simulate another process whose cached schedule predates that booking
+        schedule_index.schedule(self.technician.id).remove(Booking.objects.get().pk)
+        with self.assertRaises(BookingError):
+            self.book(at(3, 10))
+        self.assertEqual(BookingSlot.objects.count(), 2)
+
+    def test_nearest_free_technician_is_assigned(self):
+        self.technician.latitude, self.technician.longitude = 31.60, 74.30
+        self.technician.save()
+        near = Technician.objects.create(full_name='Near', latitude=31.52, longitude=74.36)
+        booking = create_booking(
+            self.user, 'Eye Test at Home', at(3, 10), 'Gulberg III, Lahore', '0300',
+            latitude=31.521, longitude=74.358
+        )
+        self.assertEqual(booking.technician_id, near.id)
+        # Near is now busy, so the next customer at that time gets the other one
+        booking = create_booking(
+            self.user, 'Eye Test at Home', at(3, 10), 'Gulberg III, Lahore', '0300',
+            latitude=31.521, longitude=74.358
+        )
+        self.assertEqual(booking.technician_id, self.technician.id)
+
+    def test_free_slots_skip_booked_time(self):
+        self.book(at(3, 10))
+        slots = free_slots(at(3, 9), at(3, 12), 'Eye Test at Home')
+        self.assertEqual(slots, [at(3, 9), at(3, 11)])
+
+
+class BookingApiTests(TestCase):
+    def setUp(self):
+        schedule_index.invalidate()
+        technician_grid.invalidate()
+        self.user = User.objects.create_user(
+            email='customer@example.com', full_name='Customer', password='password123'
+        )
+        Technician.objects.create(full_name='Tech One')
+        self.client = APIClient()
+        token = AuthToken.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def create(self, when):
+        return self.client.post('/api/home-service/bookings/', {
+            'serviceType': 'Eye Test at Home',
+            'preferredAt': when.isoformat(),
+            'address': 'House 1, Gulberg III, Lahore',
+            'phone': '03001234567',
+        }, format='json')
+
+    def test_create_and_list(self):
+        response = self.create(at(3, 10))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'requested')
+        self.assertEqual(response.data['addressShort'], 'House 1, Lahore')
+
+        listed = self.client.get('/api/home-service/bookings/')
+        self.assertEqual([b['id'] for b in listed.data], [response.data['id']])
+
+    def test_reschedule_moves_reservation(self):
+        booking_id = self.create(at(3, 10)).data['id']
+        response = self.client.post(
+            f'/api/home-service/bookings/{booking_id}/reschedule/',
+            {'newTime': at(4, 15).isoformat()},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        # The old time is free again
+        self.assertEqual(self.create(at(3, 10)).status_code, 201)
+
+    def test_cancel_within_24_hours_is_refused(self):
+        booking_id = self.create(floor_to_slot(timezone.now() + timedelta(hours=5))).data['id']
+        response = self.client.post(
+            f'/api/home-service/bookings/{booking_id}/cancel/',
+            {'reason': 'Busy'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('24 hours', response.data['message'])
+
+    def test_cancel_frees_slot(self):
+        booking_id = self.create(at(3, 10)).data['id']
+        response = self.client.post(
+            f'/api/home-service/bookings/{booking_id}/cancel/',
+            {'reason': 'Busy'},
+            format='json'
+        )
+        self.assertEqual(response.data['status'], 'cancelled')
+        self.assertEqual(self.create(at(3, 10)).status_code, 201)
+
+    def test_availability(self):
+        response = self.client.get('/api/home-service/availability/', {
+            'start': at(3, 0).date().isoformat(),
+            'days': 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['slots']), 47)
+
+    def test_nearby_technicians_rejects_unbounded_radius(self):
+        booking = Booking.objects.get(pk=self.create(at(3, 10)).data['id'])
+        booking.latitude, booking.longitude = 31.52, 74.35
+        booking.save()
+        staff = APIClient()
+        staff.force_authenticate(User.objects.create_user(
+            email='staff@example.com', full_name='Staff', password='password123', role='staff'
+        ))
+        url = f'/api/home-service/bookings/{booking.pk}/technicians/'
+        for radius in ('inf', 'nan', '-inf'):
+            self.assertEqual(staff.get(url, {'radius': radius}).status_code, 400)
+        # Clamped to MAX_RADIUS_KM rather than scanning the whole globe
+        self.assertEqual(staff.get(url, {'radius': '1e12'}).status_code, 200)
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('bookings/', views.bookings, name='home_service_bookings'),
+    path('bookings/all/', views.all_bookings, name='home_service_all_bookings'),
+    path('bookings/<uuid:booking_id>/', views.booking_detail, name='home_service_booking_detail'),
+    path('bookings/<uuid:booking_id>/reschedule/', views.reschedule, name='home_service_reschedule'),
+    path('bookings/<uuid:booking_id>/cancel/', views.cancel, name='home_service_cancel'),
+    path('bookings/<uuid:booking_id>/technicians/', views.nearby_technicians, name='home_service_nearby_technicians'),
+    path('availability/', views.availability, name='home_service_availability'),
+]
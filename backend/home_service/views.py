@@ -0,0 +1,227 @@
+import math
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from authentication.permissions import IsAdminUser, IsStaffMember
+from .availability import SLOT_MINUTES
+from .dispatch import DEFAULT_RADIUS_KM
+from .models import Booking, Technician
+from .serializers import (
+    BookingSummarySerializer,
+    BookingRequestSerializer,
+    RescheduleSerializer,
+    CancelSerializer,
+    NearbyTechnicianSerializer
+)
+from .services import (
+    BookingError,
+    create_booking,
+    reschedule_booking,
+    cancel_booking,
+    free_slots,
+    nearest_available_technicians
+)
+
+MAX_AVAILABILITY_DAYS = 14
+# Beyond this the grid search scans too many empty cells to be worth it
+MAX_RADIUS_KM = 500
+
+
+def _error(message, errors=None, status_code=status.HTTP_400_BAD_REQUEST):
+    body = {'message': message}
+    if errors is not None:
+        body['errors'] = errors
+    return Response(body, status=status_code)
+
+
+def _get_booking(request, booking_id):
+    """Booking visible to the requester (owner, staff or admin), or None"""
+    bookings = Booking.objects.all()
+    if not request.user.is_staff_member:
+        bookings = bookings.filter(user=request.user)
+    return bookings.filter(pk=booking_id).first()
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def bookings(request):
+    """
+    List my bookings / create a booking
+    GET  /api/home-service/bookings/
+    POST /api/home-service/bookings/
+    Body: {"serviceType": "Eye Test at Home", "preferredAt": "2025-11-20T10:00:00",
+           "address": "House 1, Gulberg III, Lahore", "phone": "03001234567", "notes": "...",
+           "latitude": 31.5204, "longitude": 74.3587}
+
+    latitude/longitude are optional; when present the nearest free
+    technician is assigned.
+    """
+    if request.method == 'GET':
+        queryset = Booking.objects.filter(user=request.user).order_by('-scheduled_at')
+        return Response(BookingSummarySerializer(queryset, many=True).data)
+
+    serializer = BookingRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return _error('Invalid booking request', serializer.errors)
+
+    data = serializer.validated_data
+    try:
+        booking = create_booking(
+            request.user,
+            service_type=data['serviceType'],
+            scheduled_at=data['preferredAt'],
+            address=data['address'],
+            phone=data['phone'],
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
+            notes=data.get('notes')
+        )
+    except BookingError as e:
+        return _error(e.message, status_code=e.status_code)
+
+    return Response(BookingSummarySerializer(booking).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def all_bookings(request):
+    """
+    List all bookings (admin only)
+    GET /api/home-service/bookings/all/
+    """
+    queryset = Booking.objects.order_by('-scheduled_at')
+    return Response(BookingSummarySerializer(queryset, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def booking_detail(request, booking_id):
+    """
+    Get a booking
+    GET /api/home-service/bookings/{booking_id}/
+    """
+    booking = _get_booking(request, booking_id)
+    if booking is None:
+        return _error('Booking not found', status_code=status.HTTP_404_NOT_FOUND)
+    return Response(BookingSummarySerializer(booking).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reschedule(request, booking_id):
+    """
+    Reschedule a booking
+    POST /api/home-service/bookings/{booking_id}/reschedule/
+    Body: {"newTime": "2025-11-21T15:00:00"}
+    """
+    booking = _get_booking(request, booking_id)
+    if booking is None:
+        return _error('Booking not found', status_code=status.HTTP_404_NOT_FOUND)
+
+    serializer = RescheduleSerializer(data=request.data)
+    if not serializer.is_valid():
+        return _error('Invalid reschedule request', serializer.errors)
+
+    try:
+        booking = reschedule_booking(booking, serializer.validated_data['newTime'])
+    except BookingError as e:
+        return _error(e.message, status_code=e.status_code)
+    return Response(BookingSummarySerializer(booking).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel(request, booking_id):
+    """
+    Cancel a booking
+    POST /api/home-service/bookings/{booking_id}/cancel/
+    Body: {"reason": "Not available that day"}
+    """
+    booking = _get_booking(request, booking_id)
+    if booking is None:
+        return _error('Booking not found', status_code=status.HTTP_404_NOT_FOUND)
+
+    serializer = CancelSerializer(data=request.data)
+    if not serializer.is_valid():
+        return _error('Invalid cancel request', serializer.errors)
+
+    try:
+        booking = cancel_booking(booking, serializer.validated_data['reason'])
+    except BookingError as e:
+        return _error(e.message, status_code=e.status_code)
+    return Response(BookingSummarySerializer(booking).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffMember])
+def nearby_technicians(request, booking_id):
+    """
+    Nearest technicians free at the booking's time (staff/admin only)
+    GET /api/home-service/bookings/{booking_id}/technicians/?k=5&radius=50
+    """
+    booking = Booking.objects.filter(pk=booking_id).first()
+    if booking is None:
+        return _error('Booking not found', status_code=status.HTTP_404_NOT_FOUND)
+    if booking.latitude is None or booking.longitude is None:
+        return _error('Booking has no location')
+
+    try:
+        k = max(1, min(int(request.query_params.get('k', 5)), 50))
+        radius_km = float(request.query_params.get('radius', DEFAULT_RADIUS_KM))
+    except ValueError:
+        return _error('k and radius must be numbers')
+    if not math.isfinite(radius_km):
+        return _error('radius must be a finite number')
+    radius_km = max(0.0, min(radius_km, MAX_RADIUS_KM))
+
+    nearest = nearest_available_technicians(
+        booking.latitude,
+        booking.longitude,
+        booking.scheduled_at,
+        booking.ends_at,
+        k=k,
+        radius_km=radius_km,
+        ignore=booking.pk
+    )
+    technicians = Technician.objects.in_bulk([technician_id for technician_id, _ in nearest])
+    results = [
+        {'technician': technicians[technician_id], 'distance_km': round(distance, 2)}
+        for technician_id, distance in nearest
+        if technician_id in technicians
+    ]
+    return Response(NearbyTechnicianSerializer(results, many=True).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def availability(request):
+    """
+    Free booking slots across all technicians
+    GET /api/home-service/availability/?start=2025-11-20&days=7&serviceType=Eye%20Test%20at%20Home
+    """
+    try:
+        start_date = (
+            datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+            if 'start' in request.query_params
+            else timezone.localdate()
+        )
+        days = min(int(request.query_params.get('days', 7)), MAX_AVAILABILITY_DAYS)
+    except ValueError:
+        return _error('start must be YYYY-MM-DD and days a number')
+    if days < 1:
+        return _error('days must be at least 1')
+
+    window_start = max(
+        timezone.make_aware(datetime.combine(start_date, time.min)),
+        timezone.now()
+    )
+    window_end = timezone.make_aware(datetime.combine(start_date + timedelta(days=days), time.min))
+    slots = free_slots(window_start, window_end, request.query_params.get('serviceType'))
+
+    return Response({
+        'slotMinutes': SLOT_MINUTES,
+        'slots': slots
+    })
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from authentication.models import User
+from authentication.permissions import IsAdminUser, IsStaffMember
+from orders.models import Order
+from products.models import Product
+from .profiling import stored_profile
+
+SUMMARY_CACHE_KEY = 'admin:summary'
+SUMMARY_CACHE_TIMEOUT = 30  # seconds
+LOW_STOCK_THRESHOLD = 5
+REVENUE_WINDOW_DAYS = 30
+
+
+def build_summary():
+    """Dashboard numbers from a handful of aggregate queries"""
+    inventory_value = ExpressionWrapper(
+        F('price') * F('stock'),
+        output_field=DecimalField(max_digits=20, decimal_places=2)
+    )
+    products = Product.objects.order_by().aggregate(
+        total=Count('id'),
+        low_stock=Count('id', filter=Q(stock__gt=0, stock__lte=LOW_STOCK_THRESHOLD)),
+        out_of_stock=Count('id', filter=Q(stock__lte=0)),
+        inventory_value=Sum(inventory_value, filter=Q(stock__gt=0)),
+    )
+    categories = (
+        Product.objects.order_by()
+        .values('category')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'category')
+    )
+
+    users = {'total': 0, 'active': 0, 'inactive': 0, 'by_role': {}}
+    role_rows = User.objects.order_by().values('role', 'is_active').annotate(count=Count('id'))
+    for row in role_rows:
+        role = users['by_role'].setdefault(row['role'], {'active': 0, 'inactive': 0})
+        state = 'active' if row['is_active'] else 'inactive'
+        role[state] += row['count']
+        users[state] += row['count']
+        users['total'] += row['count']
+
+    since = timezone.now() - timedelta(days=REVENUE_WINDOW_DAYS)
+    orders = Order.objects.order_by().aggregate(
+        total=Count('id'),
+        recent=Count('id', filter=Q(created_at__gte=since, status='placed')),
+        revenue=Sum('total_amount', filter=Q(created_at__gte=since, status='placed')),
+    )
+
+    recent_products = Product.objects.values('id', 'name', 'price', 'currency', 'stock')[:5]
+
+    return {
+        'products': {
+            'total': products['total'],
+            'low_stock': products['low_stock'],
+            'out_of_stock': products['out_of_stock'],
+            'low_stock_threshold': LOW_STOCK_THRESHOLD,
+            'inventory_value': products['inventory_value'] or Decimal('0'),
+            'by_category': [
+                {'category': row['category'] or 'Uncategorized', 'count': row['count']}
+                for row in categories
+            ],
+            'recent': list(recent_products),
+        },
+        'users': users,
+        'orders': {
+            'total': orders['total'],
+            'last_30_days': orders['recent'],
+            'revenue_last_30_days': orders['revenue'] or Decimal('0'),
+        },
+        'generated_at': timezone.now(),
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def admin_summary(request):
+    """
+    Dashboard summary (admin only)
+    GET /api/admin/summary
+    Cached for SUMMARY_CACHE_TIMEOUT seconds; ?refresh=1 bypasses the cache.
+    """
+    try:
+        summary = None if request.query_params.get('refresh') else cache.get(SUMMARY_CACHE_KEY)
+        if summary is None:
+            summary = build_summary()
+            cache.set(SUMMARY_CACHE_KEY, summary, SUMMARY_CACHE_TIMEOUT)
+        return Response(summary)
+    except Exception as e:
+        return Response(
+            {'message': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffMember])
+def profile_report(request, profile_id):
+    """
+    A stored request profile (staff/admin)
+    GET /api/admin/profiles/<id>
+    ?download=pstats returns the raw cProfile data instead of the JSON report.
+    """
+    stored = stored_profile(profile_id)
+    if stored is None:
+        return Response({'message': 'Profile not found or expired'}, status=status.HTTP_404_NOT_FOUND)
+    if request.query_params.get('download') == 'pstats':
+        if stored['pstats'] is None:
+            return Response({'message': 'No cProfile data for this request'}, status=status.HTTP_404_NOT_FOUND)
+        response = HttpResponse(stored['pstats'], content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{profile_id}.prof"'
+        return response
+    return Response(stored['report'])
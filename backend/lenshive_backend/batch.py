@@ -0,0 +1,111 @@
+"""
+Batch endpoint: several read-only API calls in one HTTP round trip.
+
+Each sub-request is resolved against the normal URLconf and dispatched to
+its view in this thread, so they all reuse this request's database
+connection. The caller is authenticated once, for the batch itself, and
+that user/token is handed to every sub-request instead of re-checking the
+Authorization header each time.
+"""
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+MAX_BATCH_SIZE = 10
+
+
+def _resolve(path):
+    try:
+        return path, resolve(path)
+    except Resolver404:
+        # Same as APPEND_SLASH would do for a browser
+        if not path.endswith('/'):
+            return path + '/', resolve(path + '/')
+        raise
+
+
+def _sub_request(request, path, query_string):
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {
+        key: value for key, value in request.META.items()
+        if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IDEMPOTENCY_KEY')
+    }
+    sub.META.update({'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query_string})
+    sub.GET = QueryDict(query_string)
+    if request.user and request.user.is_authenticated:
+        # Picked up by DRF's Request: skips authenticating the token again
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+    return sub
+
+
+def _dispatch(request, url):
+    path, _, query_string = url.partition('?')
+    if not path.startswith('/api/') or path.rstrip('/') == '/api/batch':
+        return status.HTTP_400_BAD_REQUEST, {'message': 'Only /api/ GET requests can be batched'}
+
+    try:
+        path, match = _resolve(path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {'message': 'Not found'}
+
+    sub = _sub_request(request, path, query_string)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Http404:
+        return status.HTTP_404_NOT_FOUND, {'message': 'Not found'}
+
+    if hasattr(response, 'data'):
+        return response.status_code, response.data
+    # File downloads and other plain responses: release the files they hold.
+    # Not response.close(), which would also send request_finished (closing
+    # this request's database connection) in the middle of the batch.
+    for closer in getattr(response, '_resource_closers', ()):
+        closer()
+    return status.HTTP_400_BAD_REQUEST, {'message': 'Response cannot be batched'}
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def batch(request):
+    """
+    Run several GET requests in one round trip
+    POST /api/batch
+    Body: {"requests": [{"id": "profile", "path": "/api/user/profile"},
+                        {"id": "products", "path": "/api/products/?category=Men"}]}
+    Returns {"responses": [{"id", "status", "body"}, ...]} in the same order.
+    Each sub-request sees the same user as the batch call.
+    """
+    if not isinstance(request.data, dict):
+        return Response({'message': 'Body must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+    items = request.data.get('requests')
+    if not isinstance(items, list) or not items:
+        return Response({'message': 'requests must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BATCH_SIZE:
+        return Response(
+            {'message': f'At most {MAX_BATCH_SIZE} requests per batch'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    responses = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return Response(
+                {'message': f'Request {index} needs a path'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if item.get('method', 'GET').upper() != 'GET':
+            code, body = status.HTTP_405_METHOD_NOT_ALLOWED, {'message': 'Only GET requests can be batched'}
+        else:
+            code, body = _dispatch(request, item['path'])
+        responses.append({'id': item.get('id', index), 'status': code, 'body': body})
+
+    return Response({'responses': responses})
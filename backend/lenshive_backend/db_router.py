@@ -0,0 +1,94 @@
+"""
+Read-replica routing.
+
+Endpoints marked as read-only send their queries to one of
+`settings.DATABASE_REPLICAS` (picked once per request); everything else,
+and every write, uses the primary ('default'). Once a request has written
+anything its later reads also go to the primary, so it always sees its
+own writes.
+
+Marking endpoints:
+* function views: `@replica_reads` outside `@api_view`;
+* ViewSets: `replica_actions = ['list', 'retrieve', ...]` on the class.
+
+`ReplicaRoutingMiddleware` looks at the resolved view and only enables
+replicas for GET/HEAD requests. Queries made outside a request (workers,
+management commands, signals after the response) always use the primary,
+and so do reads of `PRIMARY_MODELS`.
+"""
+import contextvars
+import random
+from django.conf import settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = contextvars.ContextVar('db_route', default=None)
+
+# Auth tokens are checked on the primary: a replica that hasn't caught up
+# with a fresh login would answer 401
+PRIMARY_MODELS = {'authentication.authtoken'}
+
+
+class RouteState:
+    def __init__(self):
+        self.replica = None  # alias chosen for this request, if allowed
+        self.pinned = False  # set after the first write
+
+
+def replica_reads(view):
+    """Let a function view read from a replica"""
+    view.replica_reads = True
+    return view
+
+
+def reads_from_replica(view_func, method):
+    if method not in SAFE_METHODS:
+        return False
+    if getattr(view_func, 'replica_reads', False):
+        return True
+    # ViewSet.as_view() exposes the class and its method -> action map
+    cls = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    return actions.get(method.lower()) in getattr(cls, 'replica_actions', ())
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _state.set(RouteState())
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        state = _state.get()
+        if state is not None and replicas and reads_from_replica(view_func, request.method):
+            state.replica = random.choice(replicas)
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or state.replica is None:
+            return 'default'
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return 'default'
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
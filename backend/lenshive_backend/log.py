@@ -0,0 +1,174 @@
+"""
+Structured, non-blocking logging.
+
+Request threads only put records on an in-memory queue
+(`QueueLogHandler`); a `QueueListener` thread formats them as JSON lines
+and writes them to stdout. If the writer falls behind and the queue
+fills up, records are dropped and counted rather than making a request
+wait on stdout.
+
+Before a record is queued it is sampled by level (`SampleFilter`), has
+passwords, tokens and similar fields masked (`RedactFilter`) and is
+tagged with the current request's correlation ID (`RequestIDFilter`,
+set by `RequestIDMiddleware` from X-Request-ID or generated).
+
+Pass structured fields with `extra`, e.g.
+    logger.info('User updated', extra={'user_id': str(user.pk)})
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+SENSITIVE_KEY = re.compile(r'pass(word)?|token|secret|authorization|api_?key|^key$', re.IGNORECASE)
+REDACTED = '[redacted]'
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def get_request_id():
+    return _request_id.get()
+
+
+class RequestIDMiddleware:
+    """Give every request a correlation ID and echo it back to the client"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.META.get('HTTP_X_REQUEST_ID', '')
+        request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = _request_id.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_id.reset(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+class RequestIDFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+def redact(value):
+    """Copy of `value` with sensitive keys masked, at any depth"""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and SENSITIVE_KEY.search(key) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class RedactFilter(logging.Filter):
+    def filter(self, record):
+        for name, value in list(vars(record).items()):
+            if name in _RECORD_ATTRS:
+                continue
+            if isinstance(name, str) and SENSITIVE_KEY.search(name):
+                setattr(record, name, REDACTED)
+            elif isinstance(value, (dict, list, tuple)):
+                setattr(record, name, redact(value))
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """
+    Keep only a fraction of records at the given levels, e.g.
+    {'DEBUG': 0.1}; levels not listed (and WARNING and above) are kept.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = {
+            logging.getLevelName(level) if isinstance(level, str) else level: rate
+            for level, rate in (rates or {}).items()
+        }
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS:
+                entry[name] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler with its own listener thread writing JSON lines to
+    `stream` (stdout by default). Never blocks: a full queue drops the
+    record and bumps `dropped`.
+    """
+
+    def __init__(self, maxsize=10000, stream=None):
+        super().__init__(queue.Queue(maxsize))
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JSONFormatter())
+        self.dropped = 0
+        self.listener = logging.handlers.QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def _stop_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Merge args and render tracebacks now: both may reference objects
+        # that change or can't cross threads. Extra fields stay as they are.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def close(self):
+        self._stop_listener()
+        super().close()
@@ -0,0 +1,90 @@
+"""
+Optimistic concurrency for edits (If-Match / ETag).
+
+A record's ETag is its `updated_at`, quoted exactly as the API serialises
+it, so a client can send back either the ETag header from a GET or the
+`updated_at` it already has in a list:
+
+    If-Match: "2026-01-31T10:15:02.123456Z"
+
+Inside `expect_unchanged(instance, version)` a save becomes a single
+`UPDATE ... WHERE pk = %s AND updated_at = %s`; if another edit got
+there first no row matches and `PreconditionFailed` (412) is raised.
+No row locks are taken. Requests without If-Match keep last-writer-wins.
+
+Models opt in with `ConditionalUpdateMixin`.
+"""
+from contextlib import contextmanager, nullcontext
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'This record was changed by someone else; reload it and try again.'
+    default_code = 'precondition_failed'
+
+
+def etag_for(updated_at):
+    """ETag for a datetime, or for `updated_at` as already serialised"""
+    if not isinstance(updated_at, str):
+        updated_at = serializers.DateTimeField().to_representation(updated_at)
+    return f'"{updated_at}"'
+
+
+def if_match(request):
+    """
+    The version the client expects, from If-Match; None when the header is
+    missing or `*`. A value that isn't one of our ETags can never match.
+    """
+    value = request.META.get('HTTP_IF_MATCH', '').strip()
+    if not value or value == '*':
+        return None
+    # Tolerate proxies that weakened the tag on the way to the client
+    if value.startswith('W/'):
+        value = value[2:]
+    try:
+        expected = parse_datetime(value.strip('"'))
+    except ValueError:
+        expected = None
+    if expected is None:
+        raise PreconditionFailed()
+    return expected
+
+
+@contextmanager
+def expect_unchanged(instance, updated_at):
+    """
+    Saves of `instance` inside the block only write if the row's
+    `updated_at` is still `updated_at` (no-op when it is None).
+    """
+    if updated_at is not None and instance.updated_at != updated_at:
+        # Already stale when loaded: don't bother validating the edit
+        raise PreconditionFailed()
+    instance._expected_updated_at = updated_at
+    try:
+        # A savepoint, so a conflict doesn't break an enclosing transaction
+        with transaction.atomic() if updated_at is not None else nullcontext():
+            yield instance
+    finally:
+        instance._expected_updated_at = None
+
+
+class ConditionalUpdateMixin:
+    """Adds the `updated_at` condition to the UPDATE Model.save() issues"""
+
+    _expected_updated_at = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = self._expected_updated_at
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        updated = super()._do_update(
+            base_qs.filter(updated_at=expected), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated:
+            # Otherwise save() would go on to INSERT the row again
+            raise PreconditionFailed()
+        return updated
@@ -0,0 +1,205 @@
+"""
+On-demand request profiling for staff and admins.
+
+Send `X-Profile: inline` (or `?_profile=inline`) with a request to get a
+profile report back instead of the normal response, or `X-Profile: store`
+to get the normal response plus an `X-Profile-ID` header; the stored
+report is downloadable for `PROFILE_TTL` seconds from
+
+    GET /api/admin/profiles/<id>                   (JSON report)
+    GET /api/admin/profiles/<id>?download=pstats  (for snakeviz / pstats)
+
+The report has the request's cProfile hot spots, every SQL statement with
+its duration and the project frame that issued it, and the time spent in
+DRF serializers (`.data` and `.is_valid()`).
+
+Stored reports live in the default cache. That is the per-process
+LocMem cache unless CACHES says otherwise, so with several workers the
+download has to reach the process that served the profiled request.
+
+The flag is ignored unless the caller's token belongs to a staff member
+or admin. Session logins don't count: the middleware runs before
+AuthenticationMiddleware. Requests without the flag only pay for the
+header lookup: nothing is profiled or wrapped.
+"""
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.serializers import BaseSerializer
+from authentication.authentication import ExpiringTokenAuthentication
+from .log import get_request_id
+
+PROFILE_ID_HEADER = 'X-Profile-ID'
+PROFILE_PARAM = '_profile'
+PROFILE_TTL = 60 * 60  # seconds
+PROFILE_CACHE_PREFIX = 'profile:'
+TOP_FUNCTIONS = 40
+
+_PROJECT_DIR = str(settings.BASE_DIR) + os.sep
+# Modules whose frames are never a query's call site (execute wrappers)
+INSTRUMENTATION_FILES = {os.path.abspath(__file__)}
+
+# Only one cProfile can run per interpreter at a time
+_profiler_lock = threading.Lock()
+
+
+def _code_key(function):
+    code = function.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+# Entry points of every serializer pass; recursion is folded by cProfile
+SERIALIZER_ENTRY_POINTS = (_code_key(BaseSerializer.data.fget), _code_key(BaseSerializer.is_valid))
+
+
+def call_site():
+    """
+    'path/to/file.py:123 in function' for the innermost frame of our own
+    code on the stack (not Django, DRF or INSTRUMENTATION_FILES), or None.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(_PROJECT_DIR) and 'site-packages' not in filename
+                and filename not in INSTRUMENTATION_FILES):
+            return f'{os.path.relpath(filename, _PROJECT_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """`connection.execute_wrapper` that keeps every statement it sees"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': self.alias,
+                'sql': sql,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+                'many': many,
+                'call_site': call_site(),
+            })
+
+
+def requested_mode(request):
+    """'inline' or 'store' if the request asks to be profiled, else None"""
+    value = request.META.get('HTTP_X_PROFILE') or request.GET.get(PROFILE_PARAM)
+    if not value:
+        return None
+    return 'inline' if value.strip().lower() == 'inline' else 'store'
+
+
+def may_profile(request):
+    """
+    The request's token belongs to a staff member or admin; bad tokens just
+    aren't allowed. Only tokens are checked, since no session user has been
+    loaded this early.
+    """
+    try:
+        authenticated = ExpiringTokenAuthentication().authenticate(request)
+    except exceptions.APIException:
+        return False
+    user = authenticated[0] if authenticated else None
+    return bool(user and user.is_authenticated and user.is_staff_member)
+
+
+def function_rows(stats, limit=TOP_FUNCTIONS):
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        if filename.startswith(_PROJECT_DIR):
+            filename = os.path.relpath(filename, _PROJECT_DIR)
+        rows.append({
+            'function': f'{filename}:{line} in {name}',
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:limit]
+
+
+def build_report(request, response, elapsed, stats, recorders):
+    queries = [query for recorder in recorders for query in recorder.queries]
+    serializer_seconds = sum(
+        stats.stats[key][3] for key in SERIALIZER_ENTRY_POINTS if key in stats.stats
+    ) if stats else None
+    return {
+        'id': uuid.uuid4().hex,
+        'request_id': get_request_id(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'total_ms': round(elapsed * 1000, 3),
+        'serializer_ms': round(serializer_seconds * 1000, 3) if serializer_seconds is not None else None,
+        'sql': {
+            'count': len(queries),
+            'total_ms': round(sum(query['ms'] for query in queries), 3),
+            'queries': queries,
+        },
+        'functions': function_rows(stats) if stats else [],
+    }
+
+
+def store_report(report, stats):
+    raw = marshal.dumps(stats.stats) if stats else None
+    cache.set(PROFILE_CACHE_PREFIX + report['id'], {'report': report, 'pstats': raw}, PROFILE_TTL)
+
+
+def stored_profile(profile_id):
+    """{'report': ..., 'pstats': bytes or None}, or None once expired"""
+    return cache.get(PROFILE_CACHE_PREFIX + profile_id)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not may_profile(request):
+            return self.get_response(request)
+        return self.profile(request, mode)
+
+    def profile(self, request, mode):
+        recorders = [QueryRecorder(alias) for alias in connections]
+        # Another request already holds the profiler: still report the SQL
+        profiler = cProfile.Profile() if _profiler_lock.acquire(blocking=False) else None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if profiler is not None:
+                stack.callback(_profiler_lock.release)
+            for recorder in recorders:
+                stack.enter_context(connections[recorder.alias].execute_wrapper(recorder))
+            if profiler is not None:
+                stack.enter_context(profiler)
+            response = self.get_response(request)
+            # Count template/JSON rendering as part of the request
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        elapsed = time.perf_counter() - started
+
+        stats = pstats.Stats(profiler) if profiler is not None else None
+        report = build_report(request, response, elapsed, stats, recorders)
+        if mode == 'inline':
+            return JsonResponse(report, json_dumps_params={'default': str})
+        store_report(report, stats)
+        response[PROFILE_ID_HEADER] = report['id']
+        return response
@@ -1,5 +1,7 @@
 # backend/lenshive_backend/settings.py
 
+import sys
+from datetime import timedelta
 from pathlib import Path
 from decouple import Config, RepositoryEnv
 import pymysql
@@ -35,19 +37,39 @@ INSTALLED_APPS = [
     # Local apps
     'authentication.apps.AuthenticationConfig',
     'products.apps.ProductsConfig',
+    'orders.apps.OrdersConfig',
+    'home_service.apps.HomeServiceConfig',
+    'tasks.apps.TasksConfig',
+    'monitoring.apps.MonitoringConfig',
 ]
 
 # Media (uploads) & static
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Same as Django's defaults, but uploads are hashed as they arrive so
+# product images can be stored once per content (products/images.py)
+FILE_UPLOAD_HANDLERS = [
+    'products.images.HashingMemoryFileUploadHandler',
+    'products.images.HashingTemporaryFileUploadHandler',
+]
+# Prebuilt offline catalog files (products/snapshot.py)
+CATALOG_SNAPSHOT_ROOT = MEDIA_ROOT / 'catalog'
+
+# ?currency= price conversion (products/currency.py). Rates come from this
+# JSON file when set, otherwise from the ExchangeRate table.
+BASE_CURRENCY = 'PKR'
+CURRENCY_RATES_FILE = env('CURRENCY_RATES_FILE', default='')
 
 STATIC_URL = 'static/'
 # (Optional for collectstatic in prod)
 # STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 MIDDLEWARE = [
+    'lenshive_backend.log.RequestIDMiddleware',  # correlation ID for log lines
+    'lenshive_backend.db_router.ReplicaRoutingMiddleware',  # read-only views -> replicas
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',   # keep before CommonMiddleware
+    'lenshive_backend.profiling.ProfilingMiddleware',  # X-Profile from staff/admins; inside CORS
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -93,6 +115,26 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated hosts with the primary's name/credentials,
+# e.g. DB_REPLICA_HOSTS=10.0.0.11,10.0.0.12. Read-only endpoints use them
+# (see lenshive_backend/db_router.py); tests mirror them onto the primary.
+DB_REPLICA_HOSTS = [host.strip() for host in env('DB_REPLICA_HOSTS', default='').split(',') if host.strip()]
+DATABASE_REPLICAS = []
+for index, host in enumerate(DB_REPLICA_HOSTS, start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+# Local runs without MySQL: DB_ENGINE=sqlite keeps everything in
+# db.sqlite3. DB_SQLITE_REPLICA=True adds a second, separate database
+# for ReplicaDatabaseTests to route reads to; it isn't put in
+# DATABASE_REPLICAS because nothing copies data into it.
+if env('DB_ENGINE', default='mysql') == 'sqlite':
+    DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3'}}
+    DATABASE_REPLICAS = []
+    if env('DB_SQLITE_REPLICA', default=False, cast=bool):
+        DATABASES['replica1'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica1.sqlite3'}
+DATABASE_ROUTERS = ['lenshive_backend.db_router.ReplicaRouter']
+
 # Custom User Model
 AUTH_USER_MODEL = 'authentication.User'
 
@@ -115,13 +157,26 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # DRF
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.authentication.ExpiringTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
 }
 
+# API tokens: expire after this long unused (each use extends it, at most
+# once per AUTH_TOKEN_TOUCH_INTERVAL) or this long after login.
+# `python manage.py purge_tokens` deletes expired ones.
+AUTH_TOKEN_IDLE_TIMEOUT = timedelta(days=env('AUTH_TOKEN_IDLE_DAYS', default=30, cast=int))
+AUTH_TOKEN_MAX_AGE = timedelta(days=env('AUTH_TOKEN_MAX_AGE_DAYS', default=180, cast=int))
+AUTH_TOKEN_TOUCH_INTERVAL = timedelta(minutes=5)
+
+# Slow-query log: statements slower than SLOW_QUERY_MS are logged and
+# totalled per normalised SQL in the slow_queries table (see
+# /api/admin/slow-queries/ and `python manage.py slow_queries`).
+SLOW_QUERY_LOG = env('SLOW_QUERY_LOG', default=True, cast=bool)
+SLOW_QUERY_MS = env('SLOW_QUERY_MS', default=200, cast=int)
+
 # URL behavior
 APPEND_SLASH = True
 
@@ -132,4 +187,36 @@ CORS_ALLOW_METHODS = ['DELETE', 'GET', 'OPTIONS', 'PATCH', 'POST', 'PUT']
 CORS_ALLOW_HEADERS = [
     'accept', 'accept-encoding', 'authorization', 'content-type', 'dnt',
     'origin', 'user-agent', 'x-csrftoken', 'x-requested-with',
+    'idempotency-key', 'x-request-id', 'if-match', 'x-profile',
 ]
+CORS_EXPOSE_HEADERS = ['x-request-id', 'etag', 'x-profile-id']
+
+# Logging: JSON lines on stdout, written by a background thread
+# (see lenshive_backend/log.py). DEBUG records are sampled.
+LOG_LEVEL = env('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+# Test runs only show warnings and errors: sampled DEBUG lines would make
+# the output differ from run to run
+TESTING = sys.argv[1:2] == ['test']
+if TESTING:
+    LOG_LEVEL = 'WARNING'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'sample': {'()': 'lenshive_backend.log.SampleFilter', 'rates': {'DEBUG': 0.1}},
+        'redact': {'()': 'lenshive_backend.log.RedactFilter'},
+        'request_id': {'()': 'lenshive_backend.log.RequestIDFilter'},
+    },
+    'handlers': {
+        'queue': {
+            'class': 'lenshive_backend.log.QueueLogHandler',
+            'filters': ['sample', 'redact', 'request_id'],
+        },
+    },
+    'root': {'handlers': ['queue'], 'level': LOG_LEVEL},
+    'loggers': {
+        'django': {'handlers': ['queue'], 'level': 'WARNING' if TESTING else 'INFO', 'propagate': False},
+        # 4xx responses are expected traffic; 5xx still come through
+        'django.request': {'level': 'ERROR'},
+    },
+}
@@ -0,0 +1,603 @@
+import io
+import json
+import logging
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import AuthToken, User
+from home_service.models import Booking, Technician
+from home_service.services import create_booking
+from orders.models import Order, OrderItem
+from products.catalog import invalidate_catalog_version
+from products.currency import invalidate_rates
+from products.models import Product, ProductImage, Review, WishlistItem
+from products.recommendations import feature_matrix
+from products.reviews import submit_review
+from products.similarity import rebuild_similar, similarity_matrix
+from products.snapshot import build_snapshot, read_manifest
+from tasks.models import Task
+from authentication.views import get_profile
+from .db_router import ReplicaRouter, ReplicaRoutingMiddleware, reads_from_replica
+from .log import QueueLogHandler, RedactFilter, RequestIDFilter, SampleFilter
+from .profiling import PROFILE_ID_HEADER, ProfilingMiddleware, store_report
+
+
+class AdminSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', role='admin'
+        )
+        User.objects.create_user(email='staff@example.com', password='pass12345', full_name='Staff', role='staff')
+        User.objects.create_user(
+            email='gone@example.com', password='pass12345', full_name='Gone', is_active=False
+        )
+        for category, price, stock in [
+            ('Men', '1000.00', 10), ('Men', '2000.00', 3), ('Women', '5000.00', 0),
+        ]:
+            Product.objects.create(
+                name=f'{category} {price}', description='Frame', price=Decimal(price),
+                stock=stock, category=category
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_summary(self):
+        response = self.client.get('/api/admin/summary')
+        self.assertEqual(response.status_code, 200)
+        products = response.data['products']
+        self.assertEqual(products['total'], 3)
+        self.assertEqual(products['low_stock'], 1)
+        self.assertEqual(products['out_of_stock'], 1)
+        self.assertEqual(products['inventory_value'], Decimal('16000.00'))
+        self.assertEqual(products['by_category'][0], {'category': 'Men', 'count': 2})
+
+        users = response.data['users']
+        self.assertEqual(users['total'], 3)
+        self.assertEqual(users['inactive'], 1)
+        self.assertEqual(users['by_role']['customer'], {'active': 0, 'inactive': 1})
+
+    def test_query_count_is_fixed_and_cached(self):
+        with self.assertNumQueries(5):
+            self.client.get('/api/admin/summary')
+        Product.objects.create(name='More', description='Frame', price=Decimal('10.00'), stock=1)
+        with self.assertNumQueries(0):
+            self.client.get('/api/admin/summary')
+
+    def test_admin_only(self):
+        staff = User.objects.get(email='staff@example.com')
+        client = APIClient()
+        client.force_authenticate(staff)
+        self.assertEqual(client.get('/api/admin/summary').status_code, 403)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='app@example.com', password='pass12345', full_name='App')
+        self.token = AuthToken.objects.create(user=self.user)
+        Product.objects.create(name='Frame', description='Frame', price=Decimal('10.00'), stock=1)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def post(self, requests):
+        return self.client.post('/api/batch', {'requests': requests}, format='json')
+
+    def test_startup_calls_in_one_round_trip(self):
+        response = self.post([
+            {'id': 'verify', 'path': '/api/auth/verify'},
+            {'id': 'profile', 'path': '/api/user/profile'},
+            {'id': 'products', 'path': '/api/products/?in_stock=true'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = {item['id']: item for item in response.data['responses']}
+        self.assertEqual([item['status'] for item in results.values()], [200, 200, 200])
+        self.assertEqual(len(results['products']['body']), 1)
+
+    def test_token_is_checked_once(self):
+        self.post(['/api/user/profile'])  # warm up
+        with self.assertNumQueries(1):
+            # One token lookup for the batch; the profile view reuses the user
+            self.post(['/api/user/profile', '/api/user/profile'])
+
+    def test_sub_requests_keep_their_own_status(self):
+        response = self.post([
+            {'path': '/api/products/999999/'},
+            {'path': '/api/batch'},
+            {'path': '/api/products/', 'method': 'DELETE'},
+        ])
+        self.assertEqual([item['status'] for item in response.data['responses']], [404, 400, 405])
+
+    def test_anonymous_sub_requests_stay_anonymous(self):
+        response = APIClient().post('/api/batch', {'requests': ['/api/user/profile']}, format='json')
+        self.assertEqual(response.data['responses'][0]['status'], 401)
+
+    def test_size_limit(self):
+        self.assertEqual(self.post(['/api/products/'] * 11).status_code, 400)
+
+    def test_body_must_be_an_object(self):
+        for body in (['/api/products/'], 'requests'):
+            response = self.client.post('/api/batch', body, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('message', response.data)
+
+    def test_file_responses_are_closed_not_batched(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        opened = []
+        with override_settings(CATALOG_SNAPSHOT_ROOT=root), \
+                mock.patch('products.views.open', create=True,
+                           side_effect=lambda *args: opened.append(open(*args)) or opened[-1]):
+            name = build_snapshot()['file']
+            response = self.post([f'/api/catalog/{name}', '/api/products/'])
+        self.assertEqual([item['status'] for item in response.data['responses']], [400, 200])
+        self.assertTrue(opened and all(handle.closed for handle in opened))
+
+
+class LoggingTests(TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = QueueLogHandler(stream=self.stream)
+        for log_filter in (RedactFilter(), RequestIDFilter()):
+            self.handler.addFilter(log_filter)
+        self.logger = logging.getLogger('authentication.views')
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.addCleanup(self.handler.close)
+        level = self.logger.level
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(self.logger.setLevel, level)
+
+    def lines(self):
+        self.handler.listener.stop()  # flushes the queue
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_registration_log_masks_password_and_carries_request_id(self):
+        response = self.client.post(
+            '/api/auth/register/',
+            {'fullName': 'New User', 'email': 'new@example.com', 'password': 'hunter2hunter2'},
+            content_type='application/json',
+            HTTP_X_REQUEST_ID='abc-123'
+        )
+        self.assertEqual(response['X-Request-ID'], 'abc-123')
+
+        entry = next(line for line in self.lines() if line['message'] == 'Registration request')
+        self.assertEqual(entry['request_id'], 'abc-123')
+        self.assertEqual(entry['data']['password'], '[redacted]')
+        self.assertEqual(entry['data']['email'], 'new@example.com')
+
+    def test_sampling_only_thins_low_levels(self):
+        sample = SampleFilter({'DEBUG': 0.0})
+        debug = logging.LogRecord('x', logging.DEBUG, '', 0, 'debug', None, None)
+        warning = logging.LogRecord('x', logging.WARNING, '', 0, 'warning', None, None)
+        self.assertFalse(sample.filter(debug))
+        self.assertTrue(sample.filter(warning))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = QueueLogHandler(maxsize=1, stream=io.StringIO())
+        handler.listener.stop()
+        for _ in range(3):
+            handler.handle(logging.LogRecord('x', logging.INFO, '', 0, 'hello', None, None))
+        self.assertEqual(handler.dropped, 2)
+        handler.queue.get_nowait()
+
+
+class ReplicaRoutingTests(TestCase):
+    def test_read_only_endpoints_are_marked(self):
+        self.assertTrue(reads_from_replica(get_profile, 'GET'))
+        self.assertTrue(reads_from_replica(resolve('/api/products/').func, 'GET'))
+        self.assertTrue(reads_from_replica(resolve('/api/products/1/').func, 'GET'))
+        self.assertTrue(reads_from_replica(resolve('/api/products/facets/').func, 'GET'))
+        self.assertTrue(reads_from_replica(resolve('/api/auth/users/').func, 'GET'))
+        self.assertFalse(reads_from_replica(resolve('/api/products/').func, 'POST'))
+        self.assertFalse(reads_from_replica(resolve('/api/products/changes/').func, 'GET'))
+        self.assertFalse(reads_from_replica(resolve('/api/orders/').func, 'GET'))
+
+    @override_settings(DATABASE_REPLICAS=['replica1'])
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        router = ReplicaRouter()
+        seen = []
+
+        def view(request):
+            seen.append(router.db_for_read(Product))
+            seen.append(router.db_for_write(Product))
+            seen.append(router.db_for_read(Product))
+
+        middleware = ReplicaRoutingMiddleware(lambda request: middleware.process_view(request, view, (), {}) or view(request))
+        middleware(RequestFactory().get('/api/user/profile'))
+        self.assertEqual(seen, ['default', 'default', 'default'])
+
+        seen.clear()
+        view.replica_reads = True
+        middleware(RequestFactory().get('/api/user/profile'))
+        self.assertEqual(seen, ['replica1', 'default', 'default'])
+        # Outside a request everything uses the primary
+        self.assertEqual(router.db_for_read(Product), 'default')
+
+
+# A replica with its own test database (DB_ENGINE=sqlite DB_SQLITE_REPLICA=True);
+# mirrored ones are the primary under another name
+SEPARATE_REPLICA = next((
+    alias for alias, config in settings.DATABASES.items()
+    if alias != 'default' and not config.get('TEST', {}).get('MIRROR')
+), None)
+
+
+@skipUnless(SEPARATE_REPLICA, 'needs a replica that is not mirrored onto the primary')
+class ReplicaDatabaseTests(TestCase):
+    databases = {'default', SEPARATE_REPLICA} if SEPARATE_REPLICA else {'default'}
+
+    def setUp(self):
+        settings_override = override_settings(DATABASE_REPLICAS=[SEPARATE_REPLICA])
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_catalog_reads_come_from_the_replica(self):
+        cache.clear()
+        Product.objects.create(name='Primary only', description='Frame', price=Decimal('10.00'), stock=1)
+        Product.objects.using(SEPARATE_REPLICA).create(
+            name='Replicated', description='Frame', price=Decimal('10.00')
+        )
+
+        client = APIClient()
+        self.assertEqual([p['name'] for p in client.get('/api/products/').data], ['Replicated'])
+        # Delta sync needs the primary's timestamps
+        changed = client.get('/api/products/changes/').data['changed']
+        self.assertEqual([p['name'] for p in changed], ['Primary only'])
+
+    def test_tokens_are_checked_on_the_primary(self):
+        # The replica hasn't seen the user or the login yet
+        user = User.objects.create_user(email='new@example.com', password='pass12345', full_name='New')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {AuthToken.objects.create(user=user).key}')
+        response = client.get('/api/user/profile')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['email'], 'new@example.com')
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        product = Product.objects.create(name='Frame', description='Acetate', price=Decimal('10.00'), stock=1)
+        ProductImage.objects.create(product=product, image='products/a.jpg', is_primary=True)
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='pass12345', full_name='Staff', role='staff'
+        )
+        self.customer = User.objects.create_user(email='c@example.com', password='pass12345', full_name='C')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {AuthToken.objects.create(user=user).key}')
+        return client
+
+    def test_inline_report_for_staff(self):
+        response = self.client_for(self.staff).get('/api/products/', HTTP_X_PROFILE='inline')
+        report = response.json()
+        self.assertEqual(report['status'], 200)
+        self.assertEqual(report['path'], '/api/products/')
+        self.assertGreater(report['sql']['count'], 0)
+        self.assertTrue(any(
+            (query['call_site'] or '').startswith('products/') for query in report['sql']['queries']
+        ))
+        self.assertGreater(report['serializer_ms'], 0)
+        self.assertTrue(report['functions'])
+
+    def test_inline_report_has_cors_headers(self):
+        response = self.client_for(self.staff).get(
+            '/api/products/', HTTP_X_PROFILE='inline', HTTP_ORIGIN='https://app.example.com'
+        )
+        self.assertIn('sql', response.json())
+        self.assertEqual(response['Access-Control-Allow-Origin'], 'https://app.example.com')
+
+    def test_stored_report_is_downloadable(self):
+        client = self.client_for(self.staff)
+        response = client.get('/api/products/?_profile=store')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['name'], 'Frame')
+        profile_id = response[PROFILE_ID_HEADER]
+
+        report = client.get(f'/api/admin/profiles/{profile_id}').data
+        self.assertEqual(report['id'], profile_id)
+        raw = client.get(f'/api/admin/profiles/{profile_id}?download=pstats')
+        self.assertEqual(raw['Content-Type'], 'application/octet-stream')
+        self.assertTrue(raw.content)
+
+        self.assertEqual(self.client_for(self.customer).get(f'/api/admin/profiles/{profile_id}').status_code, 403)
+        self.assertEqual(client.get('/api/admin/profiles/missing').status_code, 404)
+
+    def test_flag_is_ignored_for_customers_and_anonymous_users(self):
+        with mock.patch.object(ProfilingMiddleware, 'profile') as profile:
+            for client in (self.client_for(self.customer), APIClient()):
+                response = client.get('/api/products/', HTTP_X_PROFILE='inline')
+                self.assertEqual(response.data[0]['name'], 'Frame')
+                self.assertNotIn(PROFILE_ID_HEADER, response)
+            # Unflagged staff requests aren't profiled either
+            self.client_for(self.staff).get('/api/products/')
+        profile.assert_not_called()
+
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', role='admin'
+        )
+        for index in range(4):
+            User.objects.create_user(
+                email=f'user{index}@example.com', password='x', full_name=f'=User {index}',
+                is_active=index != 3,
+            )
+            Product.objects.create(
+                name=f'Frame {index}', description='Acetate', price=Decimal('10.00') + index,
+                stock=index, category='Men' if index % 2 else 'Women',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def download(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_users_csv_in_chunks(self):
+        with mock.patch('lenshive_backend.export.CHUNK_SIZE', 2), CaptureQueriesContext(connection) as queries:
+            body = self.download('/api/auth/users/export.csv?is_active=true')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'id,full_name,email,role,is_active,created_at,updated_at')
+        self.assertEqual(len(lines), 1 + 4)  # the admin and three active users
+        # Formulas are defused for spreadsheets
+        self.assertIn(",'=User 0,user0@example.com,", body)
+        self.assertEqual(len(queries), 3)
+
+    def test_products_jsonl_uses_list_filters(self):
+        body = self.download('/api/products/export.jsonl?category=Men&in_stock=true')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Frame 1', 'Frame 3'])
+        self.assertEqual(rows[0]['price'], '11.00')
+
+    def test_access_and_formats(self):
+        customer = APIClient()
+        customer.force_authenticate(User.objects.get(email='user0@example.com'))
+        self.assertEqual(customer.get('/api/auth/users/export.csv').status_code, 403)
+        self.assertEqual(customer.get('/api/products/export.csv').status_code, 403)
+        self.assertEqual(self.client.get('/api/products/export.xlsx').status_code, 404)
+
+# Catalog sizes every route is measured at; query counts must not change
+# between them. Each step adds products, customers, reviews, orders,
+# wishlist entries, bookings and tasks in proportion.
+CATALOG_SIZES = (4, 16, 48)
+# Seconds per request at the largest size (in-memory test database)
+LATENCY_BUDGET = 0.5
+
+
+class EndpointQueryBudgetTests(TestCase):
+    """
+    Every API route, called at each of CATALOG_SIZES, must run exactly
+    its budgeted number of queries and stay under LATENCY_BUDGET. A
+    count that differs between sizes means queries now scale with the
+    data (usually a serializer doing a lookup per row).
+    """
+
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(CATALOG_SNAPSHOT_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The manifest is only served once the first snapshot exists
+        build_snapshot()
+
+        self.me = User.objects.create_user(email='me@example.com', password='pass12345', full_name='Me')
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='pass12345', full_name='Staff', role='staff'
+        )
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', role='admin'
+        )
+        for index in range(3):
+            Technician.objects.create(
+                full_name=f'Tech {index}', latitude=Decimal('31.52') + index, longitude=Decimal('74.35')
+            )
+        self.size = 0
+        self.counter = 0
+
+    def grow(self, size):
+        for index in range(self.size, size):
+            product = Product.objects.create(
+                name=f'Frame {index}', description='Acetate frame', price=Decimal('1000.00') + index,
+                stock=10, category=('Men', 'Women', 'Kids')[index % 3], brand=f'Brand {index % 5}',
+                frame_colors='Black,Brown', sizes='M,L',
+            )
+            ProductImage.objects.create(product=product, image=f'products/{index}-a.jpg', is_primary=True)
+            ProductImage.objects.create(product=product, image=f'products/{index}-b.jpg')
+            customer = User.objects.create_user(
+                email=f'customer{index}@example.com', password='x', full_name=f'Customer {index}'
+            )
+            if index == 0:
+                self.product = product
+            submit_review(customer, self.product, 1 + index % 5)
+            if index:
+                submit_review(customer, product, 4)
+            WishlistItem.objects.create(user=self.me, product=product)
+            order = Order.objects.create(user=self.me, idempotency_key=f'seed-{index}', total_amount=product.price)
+            OrderItem.objects.create(order=order, product=product, quantity=1, unit_price=product.price)
+            start = timezone.now() + timedelta(days=2 + index)
+            booking = Booking.objects.create(
+                user=self.me, service_type='Eye Test at Home', scheduled_at=start,
+                ends_at=start + timedelta(hours=1), address='Gulberg', phone='03001234567',
+                latitude=Decimal('31.52'), longitude=Decimal('74.35'),
+            )
+            task = Task.objects.create(name='products.refresh_similar', payload={'product_id': product.pk},
+                                       created_by=self.me)
+            if index == 0:
+                self.order, self.booking, self.task = order, booking, task
+        self.size = size
+        invalidate_catalog_version()
+        feature_matrix.rebuild()
+        similarity_matrix.rebuild()
+        rebuild_similar()
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def new_product(self):
+        return Product.objects.create(name=self.unique('Temp '), description='Temp', price=Decimal('10.00'))
+
+    def free_time(self):
+        """A booking start no one has taken yet"""
+        start = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        return start + timedelta(days=30 + self.size + int(self.unique('')))
+
+    def stored_profile(self):
+        # Called by call() after it clears the cache the report lives in
+        report = {'id': self.unique('profile'), 'path': '/api/products/'}
+        store_report(report, None)
+        return f"/api/admin/profiles/{report['id']}"
+
+    def routes(self):
+        """
+        (name, method, user or token, path, body, queries). Setup the route
+        needs (a product to delete, a fresh email...) happens here, outside
+        the measured request; a callable path does its setup in call(),
+        after the caches are cleared.
+        """
+        product = self.product
+        token = AuthToken.objects.create(user=self.me)
+        doomed_user = User.objects.create_user(
+            email=self.unique('gone') + '@example.com', password='x', full_name='Gone'
+        )
+        open_order = Order.objects.create(user=self.me, idempotency_key=self.unique('open'))
+        seeded_image = product.images.order_by('id').last()
+        spare_image = ProductImage.objects.create(product=product, image='products/extra.jpg')
+        # So review_post always takes the same (create) path
+        Review.objects.filter(user=self.me).delete()
+        to_move, to_cancel = (
+            create_booking(self.me, 'Eye Test at Home', self.free_time(), 'Gulberg', '03001234567')
+            for _ in range(2)
+        )
+        snapshot_file = read_manifest()['file']
+        return [
+            # authentication/urls.py
+            ('register', 'post', None, '/api/auth/register/',
+             {'fullName': 'New', 'email': self.unique('new') + '@example.com', 'password': 'pass12345'}, 4),
+            ('login', 'post', None, '/api/auth/login/', {'email': 'me@example.com', 'password': 'pass12345'}, 2),
+            ('logout', 'post', token, '/api/auth/logout/', None, 2),
+            ('verify', 'get', self.me, '/api/auth/verify/', None, 0),
+            ('test', 'get', None, '/api/auth/test/', None, 0),
+            ('list_users', 'get', self.admin, '/api/auth/users/', None, 1),
+            ('create_user', 'post', self.admin, '/api/auth/users/create/',
+             {'full_name': 'Made', 'email': self.unique('made') + '@example.com', 'password': 'pass12345',
+              'role': 'customer'}, 3),
+            ('get_user', 'get', self.admin, f'/api/auth/users/{self.me.pk}/', None, 1),
+            ('update_user', 'put', self.admin, f'/api/auth/users/{self.me.pk}/', {'full_name': 'Me'}, 4),
+            ('delete_user', 'delete', self.admin, f'/api/auth/users/{doomed_user.pk}/', None, 10),
+            ('export_users', 'get', self.admin, '/api/auth/users/export.csv?is_active=true', None, 1),
+            # lenshive_backend/urls.py
+            ('profile', 'get', self.me, '/api/user/profile', None, 0),
+            ('admin_summary', 'get', self.admin, '/api/admin/summary', None, 5),
+            ('slow_queries', 'get', self.admin, '/api/admin/slow-queries/?limit=5', None, 1),
+            ('profile_report', 'get', self.staff, self.stored_profile, None, 0),
+            ('batch', 'post', self.me, '/api/batch',
+             {'requests': ['/api/user/profile', '/api/products/', f'/api/products/{product.pk}/']}, 7),
+            ('orders', 'get', self.me, '/api/orders/', None, 3),
+            ('place_order', 'post', self.me, '/api/orders/',
+             {'items': [{'product_id': product.pk, 'quantity': 1}], 'idempotency_key': self.unique('k')}, 10),
+            ('order_detail', 'get', self.me, f'/api/orders/{self.order.pk}/', None, 3),
+            ('cancel_order', 'post', self.me, f'/api/orders/{open_order.pk}/cancel/', None, 5),
+            ('bookings', 'get', self.me, '/api/home-service/bookings/', None, 1),
+            ('all_bookings', 'get', self.admin, '/api/home-service/bookings/all/', None, 1),
+            ('booking_detail', 'get', self.me, f'/api/home-service/bookings/{self.booking.pk}/', None, 1),
+            ('technicians', 'get', self.staff,
+             f'/api/home-service/bookings/{self.booking.pk}/technicians/', None, 2),
+            ('book', 'post', self.me, '/api/home-service/bookings/',
+             {'serviceType': 'Eye Test at Home', 'preferredAt': self.free_time().isoformat(),
+              'address': 'Gulberg', 'phone': '03001234567'}, 8),
+            ('reschedule', 'post', self.me, f'/api/home-service/bookings/{to_move.pk}/reschedule/',
+             {'newTime': self.free_time().isoformat()}, 9),
+            ('cancel_booking', 'post', self.me, f'/api/home-service/bookings/{to_cancel.pk}/cancel/',
+             {'reason': 'Away'}, 5),
+            ('availability', 'get', self.me, '/api/home-service/availability/?days=2', None, 1),
+            ('tasks', 'get', self.staff, '/api/tasks/', None, 2),
+            ('task_detail', 'get', self.me, f'/api/tasks/{self.task.pk}/', None, 1),
+            # products/urls.py and the products router
+            ('product_list', 'get', None, '/api/products/', None, 3),
+            ('product_list_signed_in', 'get', self.me, '/api/products/?currency=PKR', None, 6),
+            ('product_list_filtered', 'get', None, '/api/products/?category=Men&in_stock=true', None, 3),
+            ('product_detail', 'get', self.me, f'/api/products/{product.pk}/', None, 4),
+            ('product_create', 'post', self.staff, '/api/products/',
+             {'name': 'Created', 'description': 'New', 'price': '10.00', 'stock': 1}, 3),
+            ('product_update', 'put', self.staff, f'/api/products/{product.pk}/', {'stock': 9}, 4),
+            ('product_delete', 'delete', self.staff, f'/api/products/{self.new_product().pk}/', None, 9),
+            ('export_products', 'get', self.staff, '/api/products/export.jsonl?in_stock=true', None, 1),
+            ('facets', 'get', None, '/api/products/facets/?category=Men', None, 2),
+            ('changes', 'get', None, '/api/products/changes/?limit=10', None, 2),
+            ('snapshot', 'get', None, '/api/products/snapshot/', None, 2),
+            ('catalog_file', 'get', None, f'/api/catalog/{snapshot_file}', None, 0),
+            ('similar', 'get', None, f'/api/products/{product.pk}/similar/', None, 3),
+            ('reviews', 'get', None, f'/api/products/{product.pk}/reviews/?limit=5', None, 2),
+            ('review_post', 'post', self.me, f'/api/products/{product.pk}/reviews/', {'rating': 5}, 7),
+            ('set_primary_image', 'post', self.staff, f'/api/products/{product.pk}/set_primary_image/',
+             {'image_id': seeded_image.pk}, 6),
+            ('delete_image', 'post', self.staff, f'/api/products/{product.pk}/delete_image/',
+             {'image_id': spare_image.pk}, 5),
+            ('recommendations', 'post', None, '/api/recommendations/?k=5', {'screenTimeHours': 6}, 2),
+            ('wishlist', 'get', self.me, '/api/wishlist/', None, 2),
+            ('wishlist_add', 'post', self.me, '/api/wishlist/', {'product_id': product.pk}, 2),
+            ('wishlist_remove', 'delete', self.me, f'/api/wishlist/{self.new_product().pk}/', None, 1),
+        ]
+
+    def call(self, method, user, path, body):
+        client = APIClient()
+        if isinstance(user, AuthToken):
+            client.credentials(HTTP_AUTHORIZATION=f'Token {user.key}')
+        elif user is not None:
+            client.force_authenticate(user)
+        cache.clear()
+        invalidate_catalog_version()
+        invalidate_rates()
+        if callable(path):
+            path = path()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(path, body, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        return response, len(queries), elapsed
+
+    def test_query_counts_do_not_grow_with_the_catalog(self):
+        # Warm-up pass: in-process indexes (technician grid, schedules,
+        # matrices) are built on first use and then kept up to date
+        self.grow(CATALOG_SIZES[0])
+        for _, method, user, path, body, _ in self.routes():
+            self.call(method, user, path, body)
+
+        counts = {}
+        for size in CATALOG_SIZES:
+            self.grow(size)
+            for name, method, user, path, body, expected in self.routes():
+                response, queries, elapsed = self.call(method, user, path, body)
+                with self.subTest(route=name, size=size):
+                    self.assertLess(response.status_code, 400, response.data if hasattr(response, 'data') else '')
+                    counts.setdefault(name, {})[size] = queries
+                    self.assertEqual(queries, expected)
+                    if size == CATALOG_SIZES[-1]:
+                        self.assertLess(elapsed, LATENCY_BUDGET)
+        for name, by_size in counts.items():
+            with self.subTest(route=name):
+                self.assertEqual(len(set(by_size.values())), 1, f'{name} queries grow with the catalog: {by_size}')
@@ -2,12 +2,21 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from authentication.views import get_profile
+from .admin_views import admin_summary, profile_report
+from .batch import batch
 
 urlpatterns = [
     # Admin panel removed for now
     # path('admin/', admin.site.urls),
     path('api/auth/', include('authentication.urls')),
     path('api/user/profile', get_profile, name='get_profile'),
+    path('api/admin/summary', admin_summary, name='admin_summary'),
+    path('api/admin/slow-queries/', include('monitoring.urls')),
+    path('api/admin/profiles/<str:profile_id>', profile_report, name='profile_report'),
+    path('api/batch', batch, name='batch'),
+    path('api/orders/', include('orders.urls')),
+    path('api/home-service/', include('home_service.urls')),
+    path('api/tasks/', include('tasks.urls')),
     path('api/', include('products.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from monitoring.models import SlowQuery
+from monitoring.slow_queries import ORDERINGS, top_offenders
+
+
+class Command(BaseCommand):
+    help = 'Print the SQL statements that have been slowest in total (see SLOW_QUERY_MS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='How many statements to show')
+        parser.add_argument('--order', choices=list(ORDERINGS), default='total', help='Rank by')
+        parser.add_argument('--width', type=int, default=160, help='Truncate SQL to this many characters')
+        parser.add_argument('--reset', action='store_true', help='Clear the totals after printing')
+
+    def handle(self, *args, **options):
+        offenders = list(top_offenders(options['order'], options['limit']))
+        if not offenders:
+            self.stdout.write('No slow queries recorded')
+        for rank, query in enumerate(offenders, 1):
+            self.stdout.write(
+                f'{rank:3}. {query.count:7}x  total {query.total_ms:10.1f}ms  '
+                f'mean {query.mean_ms:8.1f}ms  max {query.max_ms:8.1f}ms  [{query.db_alias}]'
+            )
+            self.stdout.write(f'     {query.call_site or "(no project frame)"}  params {query.params_shape or "-"}')
+            self.stdout.write(f'     {query.sql[:options["width"]]}')
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f'Cleared {deleted} fingerprints'))
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """
+    Running totals for one normalised SQL statement that has been slower
+    than settings.SLOW_QUERY_MS; literals and IN lists are folded so the
+    same ORM call always lands on the same row.
+    """
+    fingerprint = models.CharField(max_length=40, unique=True)
+    sql = models.TextField()  # normalised
+    example = models.TextField()  # the latest statement as sent, placeholders unfilled
+    params_shape = models.CharField(max_length=255, blank=True)
+    call_site = models.CharField(max_length=255, blank=True)
+    db_alias = models.CharField(max_length=50, default='default')
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'slow_queries'
+        ordering = ['-total_ms']
+
+    def __str__(self):
+        return f'{self.count}x {self.total_ms:.0f}ms {self.sql[:60]}'
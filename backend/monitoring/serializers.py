@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import SlowQuery
+
+
+class SlowQuerySerializer(serializers.ModelSerializer):
+    mean_ms = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = SlowQuery
+        fields = [
+            'fingerprint', 'sql', 'example', 'params_shape', 'call_site', 'db_alias',
+            'count', 'total_ms', 'mean_ms', 'max_ms', 'first_seen', 'last_seen',
+        ]
@@ -0,0 +1,195 @@
+"""
+Slow-query log.
+
+Every database connection gets `record` as its outermost execute wrapper,
+which times each statement. One slower than `settings.SLOW_QUERY_MS` is
+logged right away and collected in a per-thread buffer under its
+fingerprint: the SQL with literals and placeholders replaced by `?`, IN
+lists and multi-row VALUES folded, and whitespace collapsed. The same ORM
+call therefore always gets the same fingerprint, whatever its arguments.
+
+At the end of each request the buffer is folded into `SlowQuery` with
+one conditional UPDATE per fingerprint (an INSERT the first time). This
+runs after the response has been sent and outside the request's
+transaction. Management commands flush when they exit. Task workers'
+slow queries only reach the log.
+
+Only the shape of the parameters is kept, e.g. `(int, str, datetime)`,
+never their values. The frame recorded with each query is the innermost
+line of our own code that issued it, usually a view or serializer.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from lenshive_backend.profiling import INSTRUMENTATION_FILES, call_site
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+ORDERINGS = {
+    'total': '-total_ms',
+    'count': '-count',
+    'max': '-max_ms',
+    'mean': '-mean_ms',
+}
+
+INSTRUMENTATION_FILES.add(os.path.abspath(__file__))
+_local = threading.local()
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_ROWS = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def normalise(sql):
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_ROWS.sub(r'\1, ...', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """(fingerprint, normalised SQL)"""
+    normalised = normalise(sql)
+    return hashlib.sha1(normalised.encode('utf-8')).hexdigest(), normalised
+
+
+def _type_names(params):
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in params.items()) + '}'
+    return '(' + ', '.join(type(value).__name__ for value in params) + ')'
+
+
+def params_shape(params, many):
+    """Types of the parameters, without their values"""
+    if params is None:
+        return ''
+    if many:
+        # Don't consume a generator the driver still has to read
+        if not isinstance(params, (list, tuple)):
+            return 'executemany'
+        return f'{len(params)} x {_type_names(params[0])}' if params else '0 rows'
+    return _type_names(params)
+
+
+def _pending():
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = {}
+    return pending
+
+
+def note(sql, params, many, elapsed_ms, alias):
+    key, normalised = fingerprint(sql)
+    site = call_site() or ''
+    shape = params_shape(params, many)
+    logger.warning('Slow query', extra={
+        'duration_ms': round(elapsed_ms, 1), 'sql': normalised[:1000],
+        'call_site': site, 'db_alias': alias, 'fingerprint': key,
+    })
+    entry = _pending().setdefault(key, {
+        'sql': normalised, 'db_alias': alias, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+    })
+    entry['example'] = sql
+    entry['params_shape'] = shape[:255]
+    entry['call_site'] = site[:255]
+    entry['count'] += 1
+    entry['total_ms'] += elapsed_ms
+    entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+
+
+def record(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= settings.SLOW_QUERY_MS and not getattr(_local, 'flushing', False):
+            note(sql, params, many, elapsed_ms, context['connection'].alias)
+
+
+def _save(key, entry):
+    latest = {
+        'example': entry['example'],
+        'params_shape': entry['params_shape'],
+        'call_site': entry['call_site'],
+    }
+    updated = SlowQuery.objects.filter(fingerprint=key).update(
+        count=F('count') + entry['count'],
+        total_ms=F('total_ms') + entry['total_ms'],
+        max_ms=Greatest('max_ms', Value(entry['max_ms'])),
+        last_seen=timezone.now(),
+        **latest,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                fingerprint=key, sql=entry['sql'], db_alias=entry['db_alias'], count=entry['count'],
+                total_ms=entry['total_ms'], max_ms=entry['max_ms'], **latest,
+            )
+    except IntegrityError:
+        # Another process recorded the first one in the meantime
+        _save(key, entry)
+
+
+def flush():
+    """Add this thread's buffered slow queries to SlowQuery; returns how many fingerprints"""
+    pending = getattr(_local, 'pending', None)
+    if not pending:
+        return 0
+    _local.pending = {}
+    _local.flushing = True
+    try:
+        for key, entry in pending.items():
+            _save(key, entry)
+    except DatabaseError:
+        logger.exception('Could not save slow queries')
+    finally:
+        _local.flushing = False
+    return len(pending)
+
+
+def _flush_after_request(sender, **kwargs):
+    flush()
+
+
+def top_offenders(order='total', limit=20):
+    return SlowQuery.objects.annotate(mean_ms=F('total_ms') / F('count')).order_by(
+        ORDERINGS.get(order, ORDERINGS['total']), '-last_seen'
+    )[:limit]
+
+
+def attach(connection, **kwargs):
+    # First in the list = outermost, so wrappers pushed and popped around
+    # a block (execute_wrapper()) keep working when a connection opens
+    # inside one
+    if record not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record)
+
+
+def install():
+    if not getattr(settings, 'SLOW_QUERY_LOG', False):
+        return
+    connection_created.connect(attach, dispatch_uid='monitoring.slow_queries.attach')
+    request_finished.connect(_flush_after_request, dispatch_uid='monitoring.slow_queries.flush')
+    atexit.register(flush)
+    for connection in connections.all(initialized_only=True):
+        attach(connection)
@@ -0,0 +1,76 @@
+import io
+import logging
+from decimal import Decimal
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import User
+from products.models import Product
+from .models import SlowQuery
+from .slow_queries import fingerprint, params_shape, top_offenders
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_lists_are_folded(self):
+        first = fingerprint("SELECT * FROM products WHERE id IN (%s, %s, %s) AND name = 'a' LIMIT 21")
+        second = fingerprint("SELECT *  FROM products\nWHERE id IN (%s) AND name = 'it''s' LIMIT 5")
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 'SELECT * FROM products WHERE id IN (...) AND name = ? LIMIT ?')
+        self.assertNotEqual(first[0], fingerprint('SELECT * FROM users WHERE id IN (%s)')[0])
+
+    def test_params_shape_hides_values(self):
+        self.assertEqual(params_shape([1, 'secret', None], False), '(int, str, NoneType)')
+        self.assertEqual(params_shape([(1, 'a'), (2, 'b')], True), '2 x (int, str)')
+        self.assertEqual(params_shape(iter([(1,)]), True), 'executemany')
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        Product.objects.create(name='Frame', description='Acetate', price=Decimal('10.00'), stock=1)
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='pass12345', full_name='Admin', role='admin'
+        )
+
+    def record_everything(self):
+        # Only the requests inside the block count as slow
+        return self.settings(SLOW_QUERY_MS=0)
+
+    def test_requests_are_totalled_per_fingerprint(self):
+        client = APIClient()
+        with self.record_everything():
+            client.get('/api/products/')
+            client.get('/api/products/?search=frame')
+
+        listing = SlowQuery.objects.filter(call_site__startswith='products/views.py')
+        self.assertTrue(listing.filter(sql__contains='FROM "products_product"').exists())
+        # The image prefetch is the same statement for both pages
+        self.assertTrue(listing.filter(sql__contains='FROM "products_productimage"', count=2).exists())
+        for query in listing:
+            self.assertNotIn('frame', query.params_shape)
+            self.assertGreaterEqual(query.max_ms * query.count, query.total_ms - 1e-6)
+
+    def test_admin_endpoint_and_command(self):
+        with self.record_everything():
+            APIClient().get('/api/products/')
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        rows = client.get('/api/admin/slow-queries/?order=mean&limit=5').data
+        self.assertTrue(0 < len(rows) <= 5)
+        self.assertEqual(rows, sorted(rows, key=lambda row: row['mean_ms'], reverse=True))
+        self.assertEqual(client.get('/api/admin/slow-queries/?order=bogus').status_code, 400)
+
+        customer = APIClient()
+        customer.force_authenticate(User.objects.create_user(email='c@example.com', password='x', full_name='C'))
+        self.assertEqual(customer.get('/api/admin/slow-queries/').status_code, 403)
+
+        out = io.StringIO()
+        call_command('slow_queries', '--limit', '3', stdout=out)
+        self.assertIn(top_offenders()[0].sql[:40], out.getvalue())
+
+        self.assertEqual(client.delete('/api/admin/slow-queries/').status_code, 204)
+        self.assertFalse(SlowQuery.objects.exists())
@@ -0,0 +1,36 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from authentication.permissions import IsAdminUser
+from .models import SlowQuery
+from .serializers import SlowQuerySerializer
+from .slow_queries import ORDERINGS, top_offenders
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def slow_query_list(request):
+    """
+    Slowest SQL statements, grouped by fingerprint (admin only)
+    GET /api/admin/slow-queries/?order=total|count|mean|max&limit=50
+    DELETE clears the totals.
+    """
+    if request.method == 'DELETE':
+        SlowQuery.objects.all().delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    order = request.query_params.get('order', 'total')
+    if order not in ORDERINGS:
+        return Response(
+            {'message': f'order must be one of {", ".join(ORDERINGS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return Response(SlowQuerySerializer(top_offenders(order, limit), many=True).data)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.validators import MinValueValidator
+from django.db import models
+from products.models import Product
+
+
+class Order(models.Model):
+    STATUS_CHOICES = [
+        ('placed', 'Placed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='orders',
+        on_delete=models.CASCADE
+    )
+    # Client-generated key sent with every retry of the same checkout.
+    # Unique per user, so a retried request returns the original order.
+    idempotency_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='placed')
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    currency = models.CharField(max_length=10, default='PKR')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                name='unique_order_idempotency_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Order #{self.pk}'
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='order_items', on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    # Price is copied at checkout so later catalog edits don't rewrite history
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.quantity} x {self.product_id}'
+
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
@@ -0,0 +1,47 @@
+from rest_framework import serializers
+from .models import Order, OrderItem
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    line_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product', 'product_name', 'quantity', 'unit_price', 'line_total']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id',
+            'status',
+            'total_amount',
+            'currency',
+            'items',
+            'created_at',
+            'updated_at'
+        ]
+
+
+class CheckoutItemSerializer(serializers.Serializer):
+    # Accept both camelCase (Flutter) and snake_case (Django)
+    product_id = serializers.IntegerField(required=False)
+    productId = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(min_value=1)
+
+    def validate(self, data):
+        product_id = data.get('product_id') or data.get('productId')
+        if not product_id:
+            raise serializers.ValidationError({'product_id': 'This field is required.'})
+        return {'product_id': product_id, 'quantity': data['quantity']}
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """Serializer for placing an order"""
+
+    items = CheckoutItemSerializer(many=True, allow_empty=False)
+    idempotency_key = serializers.CharField(max_length=64, required=False)
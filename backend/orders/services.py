@@ -0,0 +1,118 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from products.models import Product
+from .models import Order, OrderItem
+
+
+class CheckoutError(Exception):
+    """Raised when an order cannot be placed; the transaction is rolled back"""
+
+    def __init__(self, message, product_id=None):
+        super().__init__(message)
+        self.message = message
+        self.product_id = product_id
+
+
+def place_order(user, items, idempotency_key):
+    """
+    Place an order for `items` ([{'product_id': .., 'quantity': ..}, ...]).
+
+    Stock is claimed with one conditional UPDATE per product
+    (`stock = stock - qty WHERE stock >= qty`), so there is no
+    read-then-write window and no table lock; the row lock taken by the
+    UPDATE is held only until the order transaction commits. If any line
+    can't be claimed the whole order rolls back.
+
+    Returns (order, created). A repeated idempotency key returns the
+    original order with created=False and touches no stock.
+    """
+    existing = Order.objects.filter(user=user, idempotency_key=idempotency_key).first()
+    if existing:
+        return existing, False
+
+    quantities = defaultdict(int)
+    for item in items:
+        quantities[item['product_id']] += item['quantity']
+
+    # Prices only; stock is never read here
+    products = Product.objects.only('id', 'name', 'price', 'currency').in_bulk(list(quantities))
+    for product_id in quantities:
+        if product_id not in products:
+            raise CheckoutError(f'Product {product_id} not found', product_id=product_id)
+
+    total = sum(
+        (products[pid].price * qty for pid, qty in quantities.items()),
+        Decimal('0')
+    )
+    currency = next(iter(products.values())).currency
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                idempotency_key=idempotency_key,
+                total_amount=total,
+                currency=currency
+            )
+
+            now = timezone.now()
+            # Fixed product order keeps concurrent multi-item orders from deadlocking
+            for product_id in sorted(quantities):
+                quantity = quantities[product_id]
+                claimed = Product.objects.filter(
+                    pk=product_id,
+                    is_available=True,
+                    stock__gte=quantity
+                ).update(stock=F('stock') - quantity, updated_at=now)
+                if not claimed:
+                    raise CheckoutError(
+                        f'Insufficient stock for {products[product_id].name}',
+                        product_id=product_id
+                    )
+
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product_id=product_id,
+                    quantity=quantity,
+                    unit_price=products[product_id].price
+                )
+                for product_id, quantity in quantities.items()
+            ])
+    except IntegrityError:
+        # A concurrent retry with the same key committed first
+        order = Order.objects.filter(user=user, idempotency_key=idempotency_key).first()
+        if order is None:
+            raise
+        return order, False
+
+    return order, True
+
+
+def cancel_order(order):
+    """
+    Cancel a placed order and return its stock. Returns False if the order
+    was already cancelled (the status flip is itself a conditional UPDATE,
+    so stock is only ever returned once).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        flipped = Order.objects.filter(pk=order.pk, status='placed').update(
+            status='cancelled',
+            updated_at=now
+        )
+        if not flipped:
+            return False
+
+        for item in order.items.all():
+            Product.objects.filter(pk=item.product_id).update(
+                stock=F('stock') + item.quantity,
+                updated_at=now
+            )
+
+    order.status = 'cancelled'
+    order.updated_at = now
+    return True
@@ -0,0 +1,202 @@
+import threading
+from decimal import Decimal
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from authentication.models import AuthToken, User
+from products.models import Product
+from .models import Order, OrderItem
+from .services import CheckoutError, place_order
+
+
+def make_product(**kwargs):
+    defaults = {
+        'name': 'AURA Vision Pro',
+        'description': 'Test frame',
+        'price': Decimal('1500.00'),
+        'stock': 10,
+    }
+    defaults.update(kwargs)
+    return Product.objects.create(**defaults)
+
+
+class PlaceOrderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='buyer@example.com', full_name='Buyer', password='password123'
+        )
+        self.product = make_product(stock=3)
+
+    def test_order_decrements_stock(self):
+        order, created = place_order(
+            self.user, [{'product_id': self.product.pk, 'quantity': 2}], 'key-1'
+        )
+        self.assertTrue(created)
+        self.assertEqual(order.total_amount, Decimal('3000.00'))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+    def test_insufficient_stock_rolls_back(self):
+        other = make_product(name='Classic Aviator', stock=5)
+        items = [
+            {'product_id': other.pk, 'quantity': 1},
+            {'product_id': self.product.pk, 'quantity': 4},
+        ]
+        with self.assertRaises(CheckoutError):
+            place_order(self.user, items, 'key-1')
+
+        other.refresh_from_db()
+        self.assertEqual(other.stock, 5)
+        self.assertFalse(Order.objects.exists())
+
+    def test_retry_with_same_key_is_free(self):
+        items = [{'product_id': self.product.pk, 'quantity': 1}]
+        first, created = place_order(self.user, items, 'key-1')
+        with self.assertNumQueries(1):
+            again, created_again = place_order(self.user, items, 'key-1')
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, again.pk)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 2)
+
+
+class OrderApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='buyer@example.com', full_name='Buyer', password='password123'
+        )
+        self.product = make_product(stock=1)
+        self.client = APIClient()
+        token = AuthToken.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def post_order(self, key, quantity=1):
+        return self.client.post(
+            '/api/orders/',
+            {'items': [{'productId': self.product.pk, 'quantity': quantity}]},
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_place_and_replay(self):
+        response = self.post_order('abc')
+        self.assertEqual(response.status_code, 201)
+        replay = self.post_order('abc')
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.data['id'], response.data['id'])
+
+    def test_out_of_stock_is_conflict(self):
+        response = self.post_order('abc', quantity=2)
+        self.assertEqual(response.status_code, 409)
+
+    def test_key_is_required(self):
+        response = self.client.post(
+            '/api/orders/',
+            {'items': [{'product_id': self.product.pk, 'quantity': 1}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cancel_returns_stock_once(self):
+        order_id = self.post_order('abc').data['id']
+        self.assertEqual(self.client.post(f'/api/orders/{order_id}/cancel/').status_code, 200)
+        self.assertEqual(self.client.post(f'/api/orders/{order_id}/cancel/').status_code, 409)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+    def test_ordered_product_cannot_be_deleted(self):
+        self.post_order('abc')
+        staff = User.objects.create_user(
+            email='staff@example.com', full_name='Staff', password='password123', role='staff'
+        )
+        self.client.force_authenticate(staff)
+        response = self.client.delete(f'/api/products/{self.product.pk}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('message', response.data)
+        self.assertTrue(Product.objects.filter(pk=self.product.pk).exists())
+        self.assertEqual(self.client.delete(f'/api/products/{make_product().pk}/').status_code, 204)
+
+
+class FlashSaleConcurrencyTests(TransactionTestCase):
+    """
+    Many buyers hit one bestseller at once. Every buyer runs in its own
+    thread (and therefore its own DB connection); the test proves the
+    number of units sold never exceeds the starting stock.
+    """
+
+    STOCK = 5
+    BUYERS = 20
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('In-memory SQLite cannot serve concurrent connections')
+
+    def run_buyers(self, target):
+        barrier = threading.Barrier(self.BUYERS)
+        results = []
+        lock = threading.Lock()
+
+        def worker(index):
+            try:
+                barrier.wait()
+                outcome = target(index)
+            except Exception as e:  # noqa: BLE001 - recorded and asserted on below
+                outcome = e
+            finally:
+                connection.close()
+            with lock:
+                results.append(outcome)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.BUYERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_no_overselling(self):
+        product = make_product(stock=self.STOCK, is_bestseller=True)
+        users = [
+            User.objects.create_user(
+                email=f'buyer{i}@example.com', full_name=f'Buyer {i}', password='password123'
+            )
+            for i in range(self.BUYERS)
+        ]
+
+        def buy(index):
+            return place_order(
+                users[index], [{'product_id': product.pk, 'quantity': 1}], f'sale-{index}'
+            )
+
+        results = self.run_buyers(buy)
+        sold = [r for r in results if isinstance(r, tuple)]
+        rejected = [r for r in results if isinstance(r, CheckoutError)]
+        unexpected = [r for r in results if not isinstance(r, (tuple, CheckoutError))]
+
+        self.assertEqual(unexpected, [])
+        self.assertEqual(len(sold), self.STOCK)
+        self.assertEqual(len(rejected), self.BUYERS - self.STOCK)
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 0)
+        units = OrderItem.objects.filter(product=product).aggregate(total=Sum('quantity'))['total']
+        self.assertEqual(units, self.STOCK)
+
+    def test_concurrent_retries_create_one_order(self):
+        product = make_product(stock=self.STOCK)
+        user = User.objects.create_user(
+            email='retry@example.com', full_name='Retry', password='password123'
+        )
+
+        def retry(index):
+            return place_order(user, [{'product_id': product.pk, 'quantity': 1}], 'same-key')
+
+        results = self.run_buyers(retry)
+        self.assertTrue(all(isinstance(r, tuple) for r in results), results)
+        self.assertEqual(len({order.pk for order, _ in results}), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, self.STOCK - 1)
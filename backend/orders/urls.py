@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.orders, name='orders'),
+    path('<int:order_id>/', views.order_detail, name='order_detail'),
+    path('<int:order_id>/cancel/', views.cancel, name='cancel_order'),
+]
@@ -0,0 +1,103 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from .models import Order
+from .serializers import OrderSerializer, CheckoutSerializer
+from .services import CheckoutError, place_order, cancel_order
+
+
+def _order_queryset(user):
+    return Order.objects.filter(user=user).prefetch_related('items__product')
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def orders(request):
+    """
+    List my orders / place an order
+    GET  /api/orders/
+    POST /api/orders/
+    Headers: Authorization: Token <token>, Idempotency-Key: <client generated key>
+    Body: {"items": [{"product_id": 1, "quantity": 2}]}
+
+    Retrying a POST with the same Idempotency-Key returns the original
+    order (200) instead of placing a second one (201).
+    """
+    if request.method == 'GET':
+        serializer = OrderSerializer(_order_queryset(request.user), many=True)
+        return Response(serializer.data)
+
+    serializer = CheckoutSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'message': 'Invalid order',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    idempotency_key = (
+        request.headers.get('Idempotency-Key')
+        or serializer.validated_data.get('idempotency_key')
+    )
+    if not idempotency_key:
+        return Response(
+            {'message': 'Idempotency-Key header is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(idempotency_key) > 64:
+        return Response(
+            {'message': 'Idempotency-Key must be at most 64 characters'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        order, created = place_order(
+            request.user,
+            serializer.validated_data['items'],
+            idempotency_key
+        )
+    except CheckoutError as e:
+        return Response({
+            'message': e.message,
+            'product_id': e.product_id
+        }, status=status.HTTP_409_CONFLICT)
+
+    order = _order_queryset(request.user).get(pk=order.pk)
+    return Response(
+        OrderSerializer(order).data,
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_detail(request, order_id):
+    """
+    Get one of my orders
+    GET /api/orders/{order_id}/
+    """
+    try:
+        order = _order_queryset(request.user).get(pk=order_id)
+    except Order.DoesNotExist:
+        return Response({'message': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(OrderSerializer(order).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel(request, order_id):
+    """
+    Cancel one of my orders and return its stock
+    POST /api/orders/{order_id}/cancel/
+    """
+    try:
+        order = _order_queryset(request.user).get(pk=order_id)
+    except Order.DoesNotExist:
+        return Response({'message': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not cancel_order(order):
+        return Response(
+            {'message': 'Order is already cancelled'},
+            status=status.HTTP_409_CONFLICT
+        )
+    return Response(OrderSerializer(order).data)
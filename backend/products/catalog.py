@@ -0,0 +1,37 @@
+"""
+Catalog version used to key product caches.
+
+The version is derived from the products table itself (row count and
+newest `updated_at`), so every process agrees on it without a shared
+cache, and any save, delete or `updated_at`-bumping bulk update (such as
+checkout) moves it. It is memoised per process for `VERSION_TTL` seconds
+and dropped immediately when this process changes a product.
+"""
+import threading
+import time
+from django.db.models import Count, Max
+from .models import Product
+
+VERSION_TTL = 2.0  # seconds
+
+_lock = threading.Lock()
+_memo = {'version': None, 'at': 0.0}
+
+
+def catalog_version():
+    now = time.monotonic()
+    if _memo['version'] is not None and now - _memo['at'] < VERSION_TTL:
+        return _memo['version']
+
+    stats = Product.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = stats['latest'].strftime('%Y%m%d%H%M%S%f') if stats['latest'] else '0'
+    version = f"{stats['count']}-{latest}"
+    with _lock:
+        _memo['version'] = version
+        _memo['at'] = now
+    return version
+
+
+def invalidate_catalog_version():
+    with _lock:
+        _memo['version'] = None
@@ -0,0 +1,130 @@
+"""
+In-memory NumPy matrices over the product catalog.
+
+A `CatalogMatrix` keeps one float32 row per product, produced by an
+encoder function, so ranking the whole catalog is a single vectorised
+operation instead of a Python loop over model instances. Rows are kept
+fresh incrementally:
+
+* product saves/deletes in this process update the row immediately
+  (see signals.py);
+* every `refresh_interval` seconds one cheap aggregate query
+  (COUNT, MAX(updated_at)) detects changes made by other processes or by
+  `QuerySet.update()` (which must set updated_at itself, as checkout
+  does), and only the changed rows are re-encoded;
+* a full rebuild happens at most every `max_age` seconds as a backstop.
+"""
+import threading
+import time
+import numpy as np
+from django.db.models import Count, Max
+from .models import Product
+
+
+class CatalogMatrix:
+    refresh_interval = 5.0  # seconds between change checks
+    max_age = 600.0  # seconds between full rebuilds
+
+    def __init__(self, encoder, width, fields=None):
+        self.encoder = encoder
+        self.width = width
+        self.fields = fields
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.rows = np.zeros((0, self.width), dtype=np.float32)
+        self.live = np.zeros(0, dtype=bool)
+        self.index = {}
+        self.size = 0
+        self._seen_count = None
+        self._seen_updated_at = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+
+    @property
+    def is_built(self):
+        return self._seen_count is not None
+
+    def _queryset(self):
+        queryset = Product.objects.order_by()
+        return queryset.only(*self.fields) if self.fields else queryset
+
+    def _grow(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 64)
+        ids = np.zeros(capacity, dtype=np.int64)
+        rows = np.zeros((capacity, self.width), dtype=np.float32)
+        live = np.zeros(capacity, dtype=bool)
+        ids[:self.size] = self.ids[:self.size]
+        rows[:self.size] = self.rows[:self.size]
+        live[:self.size] = self.live[:self.size]
+        self.ids, self.rows, self.live = ids, rows, live
+
+    def upsert(self, product):
+        """Encode one product into its row (appending it if new)"""
+        vector = self.encoder(product)
+        with self._lock:
+            position = self.index.get(product.pk)
+            if position is None:
+                self._grow(self.size + 1)
+                position = self.size
+                self.size += 1
+                self.index[product.pk] = position
+                self.ids[position] = product.pk
+            self.rows[position] = vector
+            self.live[position] = True
+
+    def discard(self, product_id):
+        with self._lock:
+            position = self.index.get(product_id)
+            if position is not None:
+                self.live[position] = False
+
+    def rebuild(self):
+        with self._lock:
+            self._reset()
+            stats = Product.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+            for product in self._queryset().iterator(chunk_size=2000):
+                self.upsert(product)
+            self._seen_count = stats['count']
+            self._seen_updated_at = stats['latest']
+            self._checked_at = self._built_at = time.monotonic()
+
+    def refresh(self):
+        """Bring the matrix up to date, touching only what changed"""
+        now = time.monotonic()
+        if not self.is_built or now - self._built_at > self.max_age:
+            self.rebuild()
+            return
+        if now - self._checked_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            stats = Product.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+            if stats['latest'] and (self._seen_updated_at is None or stats['latest'] > self._seen_updated_at):
+                changed = self._queryset()
+                if self._seen_updated_at is not None:
+                    changed = changed.filter(updated_at__gte=self._seen_updated_at)
+                for product in changed.iterator(chunk_size=2000):
+                    self.upsert(product)
+            if stats['count'] != int(self.live[:self.size].sum()):
+                existing = set(Product.objects.values_list('id', flat=True))
+                for product_id in set(self.index) - existing:
+                    self.discard(product_id)
+            self._seen_count = stats['count']
+            self._seen_updated_at = stats['latest']
+            self._checked_at = now
+
+    def snapshot(self):
+        """
+        (ids, rows, live) views over the filled part of the matrix, refreshed
+        first. Deleted products stay in place with live=False until the next
+        rebuild, so callers must mask them out; no arrays are copied.
+        """
+        self.refresh()
+        with self._lock:
+            return self.ids[:self.size], self.rows[:self.size], self.live[:self.size]
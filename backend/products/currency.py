@@ -0,0 +1,155 @@
+"""
+Show product prices in the shopper's currency (`?currency=USD`).
+
+Rates are units of a currency per one unit of `settings.BASE_CURRENCY`,
+read from `settings.CURRENCY_RATES_FILE` when set:
+
+    {"base": "PKR", "rates": {"USD": "0.0036", "EUR": "0.0033"}}
+
+and from the `ExchangeRate` table otherwise. The parsed table is kept in
+memory and only reloaded when its version changes (file mtime/size, or
+row count + newest `updated_at`), which is checked at most every
+`VERSION_TTL` seconds.
+
+A page is converted in one pass: the factor for each source currency is
+worked out once, then each price is a single Decimal multiply and
+quantize to the target's minor unit (ROUND_HALF_UP), so results are exact
+and the same on every server.
+"""
+import json
+import os
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from django.conf import settings
+from django.db.models import Count, Max
+from rest_framework.exceptions import ValidationError
+from .models import ExchangeRate
+
+VERSION_TTL = 5.0  # seconds
+
+# ISO 4217 minor units where they aren't 2
+MINOR_UNITS = {
+    'BHD': 3, 'CLP': 0, 'IDR': 0, 'ISK': 0, 'JOD': 3, 'JPY': 0,
+    'KRW': 0, 'KWD': 3, 'OMR': 3, 'TND': 3, 'UGX': 0, 'VND': 0,
+}
+
+
+class RateTable:
+    def __init__(self, base, rates, version):
+        self.base = base
+        # A zero rate can't be divided by; treat bad rows as missing
+        self.rates = {currency: rate for currency, rate in rates.items() if rate.is_finite() and rate > 0}
+        self.rates[base] = Decimal(1)
+        self.version = version
+
+    def __contains__(self, currency):
+        return currency in self.rates
+
+    def factor(self, source, target):
+        """Multiply a `source` price by this to get `target`"""
+        return self.rates[target] / self.rates[source]
+
+
+def quantum(currency):
+    return Decimal(1).scaleb(-MINOR_UNITS.get(currency, 2))
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return f'file-{stat.st_mtime_ns}-{stat.st_size}'
+
+
+def _db_version():
+    stats = ExchangeRate.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = stats['latest'].strftime('%Y%m%d%H%M%S%f') if stats['latest'] else '0'
+    return f"db-{stats['count']}-{latest}"
+
+
+def _load_file(path, version):
+    with open(path, encoding='utf-8') as handle:
+        data = json.load(handle)
+    rates = {code.upper(): Decimal(str(rate)) for code, rate in data.get('rates', {}).items()}
+    return RateTable(data.get('base', settings.BASE_CURRENCY).upper(), rates, version)
+
+
+def _load_db(version):
+    rates = dict(ExchangeRate.objects.values_list('currency', 'rate'))
+    return RateTable(settings.BASE_CURRENCY, rates, version)
+
+
+_lock = threading.Lock()
+_memo = {'table': None, 'at': 0.0}
+
+
+def rate_table():
+    """The current RateTable, reloaded only when its source has changed"""
+    now = time.monotonic()
+    table = _memo['table']
+    if table is not None and now - _memo['at'] < VERSION_TTL:
+        return table
+
+    path = settings.CURRENCY_RATES_FILE
+    version = _file_version(path) if path else _db_version()
+    with _lock:
+        table = _memo['table']
+        if table is None or table.version != version:
+            table = _load_file(path, version) if path else _load_db(version)
+            _memo['table'] = table
+        _memo['at'] = now
+    return table
+
+
+def invalidate_rates():
+    with _lock:
+        _memo['table'] = None
+
+
+def requested_currency(request):
+    """
+    Upper-cased `currency` query parameter, or None. A currency without a
+    rate is a 400.
+    """
+    currency = request.query_params.get('currency', '').strip().upper()
+    if not currency:
+        return None
+    if currency not in rate_table():
+        raise ValidationError({'currency': f'No exchange rate for {currency}'})
+    return currency
+
+
+def cache_variant(currency):
+    """Page cache key suffix: converted pages change with the rates"""
+    return f'|{currency}@{rate_table().version}' if currency else ''
+
+
+def convert_prices(items, currency, table=None):
+    """
+    Rewrite `price`/`currency` of serialized products in `items` (in
+    place) into `currency`, keeping the stored values as
+    `original_price`/`original_currency`. Products priced in a currency
+    with no rate are left as they are.
+    """
+    if currency is None:
+        return items
+    table = table or rate_table()
+    places = quantum(currency)
+    factors = {}
+    for item in items:
+        source = item['currency']
+        item['original_price'] = item['price']
+        item['original_currency'] = source
+        if source == currency:
+            continue
+        if source not in factors:
+            factors[source] = table.factor(source, currency) if source in table else None
+        factor = factors[source]
+        if factor is None:
+            continue
+        try:
+            price = Decimal(item['price'])
+        except (InvalidOperation, TypeError):
+            continue
+        item['price'] = str((price * factor).quantize(places, rounding=ROUND_HALF_UP))
+        item['currency'] = currency
+    return items
@@ -0,0 +1,113 @@
+"""
+Facet counts for the catalog filter UI.
+
+All counts come from one GROUP BY over (category, brand, frame_colors,
+sizes, price bucket, in stock). Distinct combinations are far fewer than
+products, and the comma-separated colour/size lists are split in Python
+over those grouped rows only. Results are cached per catalog version and
+filter set.
+"""
+import hashlib
+from collections import Counter
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+from .catalog import catalog_version
+from .filters import filter_key, filter_products
+from .models import Product
+
+FACETS_CACHE_TIMEOUT = 300  # seconds; keys are versioned, this only bounds memory
+
+# (min, max) in the product currency; max None means "and above"
+PRICE_BUCKETS = [
+    (0, 1000),
+    (1000, 2500),
+    (2500, 5000),
+    (5000, 10000),
+    (10000, None),
+]
+
+
+def _price_bucket_expression():
+    whens = []
+    for index, (low, high) in enumerate(PRICE_BUCKETS):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        whens.append(When(condition, then=Value(index)))
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _ranked(counter):
+    return [
+        {'value': value, 'count': count}
+        for value, count in sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def compute_facets(queryset):
+    rows = (
+        queryset.order_by()
+        .annotate(
+            price_bucket=_price_bucket_expression(),
+            in_stock=Case(
+                When(is_available=True, stock__gt=0, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        )
+        .values('category', 'brand', 'frame_colors', 'sizes', 'price_bucket', 'in_stock')
+        .annotate(count=Count('id'))
+    )
+
+    total = 0
+    categories, brands, colors, sizes = Counter(), Counter(), Counter(), Counter()
+    price_buckets = Counter()
+    in_stock = 0
+    for row in rows:
+        count = row['count']
+        total += count
+        if row['category']:
+            categories[row['category']] += count
+        if row['brand']:
+            brands[row['brand']] += count
+        for color in set(_split(row['frame_colors'])):
+            colors[color] += count
+        for size in set(_split(row['sizes'])):
+            sizes[size] += count
+        price_buckets[row['price_bucket']] += count
+        if row['in_stock']:
+            in_stock += count
+
+    return {
+        'total': total,
+        'categories': _ranked(categories),
+        'brands': _ranked(brands),
+        'colors': _ranked(colors),
+        'sizes': _ranked(sizes),
+        'price_buckets': [
+            {'min': low, 'max': high, 'count': price_buckets.get(index, 0)}
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'availability': {
+            'in_stock': in_stock,
+            'out_of_stock': total - in_stock,
+        },
+    }
+
+
+def facets_for(params):
+    """Facet counts for the filters in `params`, cached per catalog version"""
+    version = catalog_version()
+    digest = hashlib.md5(filter_key(params).encode('utf-8')).hexdigest()
+    key = f'products:facets:{version}:{digest}'
+
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filter_products(Product.objects.all(), params))
+        facets['version'] = version
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,94 @@
+import json
+from decimal import Decimal, InvalidOperation
+from django.db.models import Q, TextField, Value
+from django.db.models.functions import Concat, Replace
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+# Query parameters understood by filter_products, in a stable order for cache keys
+FILTER_PARAMS = ['category', 'brand', 'color', 'size', 'min_price', 'max_price', 'in_stock', 'search']
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _tokens(field):
+    """
+    `field` (a comma-separated list) as ",a,b,c," so one exact token is a
+    `,token,` substring; spaces next to the commas are dropped, the same
+    way facets.py strips each part
+    """
+    compact = Replace(Replace(field, Value(', '), Value(',')), Value(' ,'), Value(','))
+    return Concat(Value(','), compact, Value(','), output_field=TextField())
+
+
+def _any_token(queryset, field, values):
+    """Rows whose `field` list contains one of `values` as a whole entry"""
+    alias = f'{field}_tokens'
+    match = Q()
+    for value in values:
+        match |= Q(**{f'{alias}__icontains': f',{value},'})
+    return queryset.alias(**{alias: _tokens(field)}).filter(match)
+
+
+def _decimal(value):
+    try:
+        return Decimal(value)
+    except (InvalidOperation, TypeError):
+        return None
+
+
+def filter_products(queryset, params):
+    """
+    Apply catalog filters from query parameters:
+    ?category=Men,Women&brand=AURA&color=Silver&size=Medium
+    &min_price=1000&max_price=5000&in_stock=true&search=aviator
+    """
+    categories = _split(params.get('category', ''))
+    if categories:
+        queryset = queryset.filter(category__in=categories)
+
+    brands = _split(params.get('brand', ''))
+    if brands:
+        queryset = queryset.filter(brand__in=brands)
+
+    # Whole entries only, matching the facet counts: Red isn't Dark Red
+    colors = _split(params.get('color', ''))
+    if colors:
+        queryset = _any_token(queryset, 'frame_colors', colors)
+
+    sizes = _split(params.get('size', ''))
+    if sizes:
+        queryset = _any_token(queryset, 'sizes', sizes)
+
+    min_price = _decimal(params.get('min_price'))
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    max_price = _decimal(params.get('max_price'))
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+
+    in_stock = params.get('in_stock', '').lower()
+    if in_stock in TRUE_VALUES:
+        queryset = queryset.filter(is_available=True, stock__gt=0)
+    elif in_stock in FALSE_VALUES:
+        queryset = queryset.filter(Q(is_available=False) | Q(stock__lte=0))
+
+    search = params.get('search', '').strip()
+    if search:
+        queryset = queryset.filter(Q(name__icontains=search) | Q(brand__icontains=search))
+
+    return queryset
+
+
+def filter_key(params):
+    """
+    Canonical string for the filters in `params`, for cache keys. JSON, so
+    a value containing "&" or "=" can't pass for a different filter set.
+    """
+    return json.dumps(
+        {name: params.get(name) for name in FILTER_PARAMS if params.get(name)},
+        sort_keys=True, separators=(',', ':')
+    )
@@ -0,0 +1,115 @@
+"""
+Content-addressed product images.
+
+Uploads are hashed (SHA-256) while they stream in, by the upload handlers
+in settings.FILE_UPLOAD_HANDLERS, so nothing has to re-read the file.
+Each distinct content is stored once, as
+
+    products/blobs/<first two hex digits>/<sha256>.<ext>
+
+and recorded in ImageBlob, the hash index. Another upload of the same
+bytes, for this product or any other, just points a new ProductImage at
+the existing blob and bumps its `ref_count`. Deleting a ProductImage
+(delete_image, or a product being deleted) drops the count, and the last
+reference deletes the blob row and, once the transaction commits, the
+file.
+
+The bytes behind a blob URL never change, so those URLs can be cached
+forever.
+
+Images uploaded before this (`blob` is NULL) keep their own files and
+are left alone. `python manage.py dedupe_product_images` moves them over.
+"""
+import hashlib
+import os
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import ImageBlob, ProductImage
+
+BLOB_DIR = 'products/blobs'
+HASH_CHUNK = 64 * 1024
+
+
+class HashingUploadMixin:
+    """Upload handler that also hashes the chunks it keeps (`file.sha256`)"""
+
+    def new_file(self, *args, **kwargs):
+        # Before super(): the memory handler ends new_file() with StopFutureHandlers
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passed_on = super().receive_data_chunk(raw_data, start)
+        if passed_on is None:
+            self.sha256.update(raw_data)
+        return passed_on
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def content_hash(file):
+    """SHA-256 from the upload handler, or computed for files from elsewhere"""
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK):
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest()
+
+
+def blob_name(digest, filename):
+    extension = os.path.splitext(filename or '')[1].lower()[:10]
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{extension}'
+
+
+def acquire_blob(file, digest=None):
+    """The ImageBlob for `file`'s content, stored if new, with one more reference"""
+    digest = digest or content_hash(file)
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(sha256=digest).first()
+        if blob is None:
+            name = default_storage.save(blob_name(digest, file.name), file)
+            try:
+                with transaction.atomic():
+                    blob = ImageBlob.objects.create(sha256=digest, file=name, size=file.size)
+            except IntegrityError:
+                # The same bytes were stored concurrently: use that copy
+                default_storage.delete(name)
+                blob = ImageBlob.objects.select_for_update().get(sha256=digest)
+        ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        blob.ref_count += 1
+    return blob
+
+
+def release_blob(blob_id):
+    """Drop one reference; the last one deletes the blob and (after commit) its file"""
+    with transaction.atomic():
+        ImageBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+        orphan = ImageBlob.objects.select_for_update().filter(pk=blob_id, ref_count=0).first()
+        if orphan is None:
+            return
+        name = orphan.file.name
+        orphan.delete()
+    transaction.on_commit(lambda: default_storage.delete(name))
+
+
+def add_image(product, file, is_primary=False):
+    """Attach an uploaded image to `product`, sharing storage with identical uploads"""
+    blob = acquire_blob(file)
+    return ProductImage.objects.create(product=product, image=blob.file.name, blob=blob, is_primary=is_primary)
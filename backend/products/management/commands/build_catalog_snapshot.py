@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from products.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the compressed offline catalog snapshot for the current catalog version'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            manifest = build_snapshot()
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {manifest['file']} ({manifest['size']} bytes, "
+                f"{manifest['uncompressed_size']} uncompressed) in {time.perf_counter() - started:.1f}s"
+            ))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error building catalog snapshot: {str(e)}'))
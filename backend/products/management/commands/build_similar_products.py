@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from products.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    help = 'Recompute the "similar frames" list for every product'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            count = rebuild_similar()
+            self.stdout.write(self.style.SUCCESS(
+                f'Built similar products for {count} products in {time.perf_counter() - started:.1f}s'
+            ))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Error building similar products: {str(e)}'))
@@ -0,0 +1,53 @@
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from products.images import acquire_blob, content_hash
+from products.models import ProductImage
+from tasks.runner import enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        'Move product images uploaded before content-addressed storage onto shared blobs, '
+        'deleting the duplicate files'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be reclaimed')
+
+    def handle(self, *args, **options):
+        legacy = ProductImage.objects.filter(blob__isnull=True).exclude(image='').order_by('pk')
+        seen, moved, missing, reclaimable = set(), 0, 0, 0
+        for image in legacy.iterator():
+            old_name = image.image.name
+            if not default_storage.exists(old_name):
+                missing += 1
+                continue
+            with default_storage.open(old_name, 'rb') as handle:
+                upload = File(handle, name=old_name)
+                digest = content_hash(upload)
+                if options['dry_run']:
+                    if digest in seen:
+                        reclaimable += upload.size
+                    seen.add(digest)
+                    continue
+                blob = acquire_blob(upload, digest)
+
+            image.image, image.blob = blob.file.name, blob
+            image.save(update_fields=['image', 'blob'])
+            moved += 1
+            if not ProductImage.objects.filter(image=old_name).exists():
+                default_storage.delete(old_name)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'{len(seen)} distinct images; {reclaimable / 1024 / 1024:.1f} MB in duplicates '
+                f'({missing} files missing)'
+            )
+            return
+        if moved:
+            # The offline catalog lists image URLs
+            enqueue('products.build_catalog_snapshot', unique_key='catalog')
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} images onto shared blobs ({missing} files missing)'
+        ))
@@ -0,0 +1,39 @@
+import json
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from products.models import MIN_EXCHANGE_RATE, ExchangeRate
+
+
+class Command(BaseCommand):
+    help = (
+        'Store exchange rates from a JSON file ({"base": "PKR", "rates": {"USD": "0.0036"}}) '
+        'in the ExchangeRate table used for ?currency= prices'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON rates file')
+        parser.add_argument('--replace', action='store_true', help='Delete currencies missing from the file')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as handle:
+                data = json.load(handle)
+            rates = {code.upper(): Decimal(str(rate)) for code, rate in data['rates'].items()}
+        except (OSError, ValueError, KeyError, AttributeError, InvalidOperation) as e:
+            raise CommandError(f'Could not read rates: {e}')
+
+        invalid = sorted(code for code, rate in rates.items() if not rate.is_finite() or rate < MIN_EXCHANGE_RATE)
+        if invalid:
+            raise CommandError(f"Rates must be positive numbers: {', '.join(invalid)}")
+
+        base = data.get('base', settings.BASE_CURRENCY).upper()
+        if base != settings.BASE_CURRENCY:
+            raise CommandError(f'Rates must be per {settings.BASE_CURRENCY}, not {base}')
+
+        for currency, rate in rates.items():
+            ExchangeRate.objects.update_or_create(currency=currency, defaults={'rate': rate})
+        removed = 0
+        if options['replace']:
+            removed, _ = ExchangeRate.objects.exclude(currency__in=list(rates)).delete()
+        self.stdout.write(self.style.SUCCESS(f'Loaded {len(rates)} rates, removed {removed}'))
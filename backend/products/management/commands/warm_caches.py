@@ -0,0 +1,126 @@
+import json
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from products.models import Product
+from products.page_cache import CACHE_HEADER
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Warm the running server\'s caches after a deploy: product list pages for common '
+        'filters, top product details and similar rails, facets, recommendations and the '
+        'offline catalog snapshot'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Server to warm')
+        parser.add_argument('--concurrency', type=int, default=4, help='Requests in flight at once')
+        parser.add_argument('--top', type=int, default=50, help='How many top products to warm')
+        parser.add_argument('--brands', type=int, default=5, help='How many top brands to warm')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout (seconds)')
+        parser.add_argument('--dry-run', action='store_true', help='List the URLs without requesting them')
+
+    def targets(self, options):
+        """(group, method, path, body) for everything worth warming"""
+        categories = list(
+            Product.objects.exclude(category__isnull=True).order_by()
+            .values_list('category', flat=True).distinct()
+        )
+        brands = list(
+            Product.objects.exclude(brand__isnull=True).exclude(brand='').order_by()
+            .values('brand').annotate(count=Count('id')).order_by('-count')
+            .values_list('brand', flat=True)[:options['brands']]
+        )
+        top = list(
+            Product.objects.filter(is_available=True)
+            .order_by('-is_bestseller', '-review_count', '-rating', '-id')
+            .values_list('id', flat=True)[:options['top']]
+        )
+
+        params = [{}, {'in_stock': 'true'}]
+        params += [{'category': category} for category in categories]
+        params += [{'category': category, 'in_stock': 'true'} for category in categories]
+        params += [{'brand': brand} for brand in brands]
+        # Encoded here, so "Dolce & Gabbana" stays one brand
+        filters = [f'?{urllib.parse.urlencode(query)}' if query else '' for query in params]
+
+        targets = [('snapshot', 'GET', '/api/products/snapshot/', None)]
+        targets += [('list', 'GET', f'/api/products/{query}', None) for query in filters]
+        targets += [('facets', 'GET', f'/api/products/facets/{query}', None) for query in filters]
+        targets += [('detail', 'GET', f'/api/products/{pk}/', None) for pk in top]
+        targets += [('similar', 'GET', f'/api/products/{pk}/similar/', None) for pk in top]
+        # Builds the recommendation matrix
+        targets.append(('recommendations', 'POST', '/api/recommendations/?k=10', {}))
+        return targets
+
+    def fetch(self, base_url, target, timeout):
+        group, method, path, body = target
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(
+            base_url.rstrip('/') + path,
+            data=data,
+            method=method,
+            headers={'Content-Type': 'application/json', 'Accept-Encoding': 'identity'}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                status, cache_state = response.status, response.headers.get(CACHE_HEADER)
+        except urllib.error.HTTPError as e:
+            status, cache_state = e.code, None
+        except (urllib.error.URLError, OSError) as e:
+            status, cache_state = str(getattr(e, 'reason', e)), None
+        return group, path, status, cache_state, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        targets = self.targets(options)
+        if options['dry_run']:
+            for group, method, path, _ in targets:
+                self.stdout.write(f'{group:16} {method:5} {path}')
+            return
+
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(f'Warming {len(targets)} URLs on {options["base_url"]} ({concurrency} at a time)...')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda target: self.fetch(options['base_url'], target, options['timeout']),
+                targets
+            ))
+        elapsed = time.perf_counter() - started
+
+        groups = defaultdict(list)
+        for result in results:
+            groups[result[0]].append(result)
+
+        failures = [result for result in results if result[2] != 200]
+        for group, rows in groups.items():
+            timings = [row[4] * 1000 for row in rows]
+            cached = [row for row in rows if row[3]]
+            hits = sum(1 for row in cached if row[3] == 'HIT')
+            hit_rate = f'{hits}/{len(cached)} hit' if cached else 'uncached'
+            self.stdout.write(
+                f'  {group:16} {len(rows):4} requests  {hit_rate:12}  '
+                f'p50 {_percentile(timings, 0.5):7.1f}ms  p95 {_percentile(timings, 0.95):7.1f}ms  '
+                f'max {max(timings):7.1f}ms'
+            )
+        for group, path, status, _, _ in failures:
+            self.stdout.write(self.style.WARNING(f'  {status} {path}'))
+
+        summary = f'Warmed {len(results) - len(failures)}/{len(results)} URLs in {elapsed:.1f}s'
+        if failures:
+            self.stdout.write(self.style.ERROR(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -1,7 +1,10 @@
+from decimal import Decimal
 from django.db import models
-from django.core.validators import MinValueValidator
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from lenshive_backend.preconditions import ConditionalUpdateMixin
 
-class Product(models.Model):
+class Product(ConditionalUpdateMixin, models.Model):
     CATEGORY_CHOICES = [
         ('Men', 'Men'),
         ('Women', 'Women'),
@@ -71,6 +74,8 @@ class Product(models.Model):
         validators=[MinValueValidator(0)]
     )
     review_count = models.IntegerField(default=0)
+    # Sum of all review stars; rating = rating_sum / review_count (reviews.py)
+    rating_sum = models.BigIntegerField(default=0)
     
     # Product badges
     is_bestseller = models.BooleanField(default=False)
@@ -82,6 +87,10 @@ class Product(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Catalog version (MAX(updated_at)) and change tracking
+            models.Index(fields=['updated_at'], name='product_updated_at_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -107,9 +116,30 @@ class Product(models.Model):
             return [option.strip() for option in self.lens_options.split(',')]
         return []
 
+class ImageBlob(models.Model):
+    """
+    One stored image file, named by the SHA-256 of its bytes and shared by
+    every ProductImage with the same content (see images.py).
+    `ref_count` is how many ProductImages point at it; the file goes when
+    it drops to zero.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='products/blobs/', max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.sha256[:12]} ({self.ref_count} refs)'
+
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='products/')
+    # Set for deduplicated uploads; `image` then names the blob's file
+    blob = models.ForeignKey(
+        ImageBlob, related_name='images', on_delete=models.PROTECT, null=True, blank=True
+    )
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -124,3 +154,101 @@ class ProductImage(models.Model):
             # If this is the first image, make it primary
             self.is_primary = True
         super().save(*args, **kwargs)
+
+
+class SimilarProduct(models.Model):
+    """
+    Precomputed "similar frames" rail: the top-N most similar products for
+    each product, one row per neighbour (see similarity.py).
+    """
+    product = models.ForeignKey(Product, related_name='similar_products', on_delete=models.CASCADE)
+    similar = models.ForeignKey(Product, related_name='similar_to', on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_similar_product_rank'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} ~ {self.similar_id} (#{self.rank})'
+
+
+class DeletedProduct(models.Model):
+    """
+    Tombstone for a deleted product, so clients syncing with
+    /api/products/changes/ can drop it from their local catalog.
+    """
+    product_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['deleted_at']
+
+    def __str__(self):
+        return f'{self.product_id} deleted {self.deleted_at}'
+
+
+MIN_EXCHANGE_RATE = Decimal('0.0000000001')  # smallest positive value `rate` can hold
+
+
+class ExchangeRate(models.Model):
+    """
+    Units of `currency` per one unit of settings.BASE_CURRENCY, used to show
+    prices in the shopper's currency (see currency.py).
+    """
+    currency = models.CharField(max_length=10, unique=True)
+    # Must be positive: prices are divided by the source currency's rate
+    rate = models.DecimalField(
+        max_digits=20, decimal_places=10, validators=[MinValueValidator(MIN_EXCHANGE_RATE)]
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['currency']
+
+    def __str__(self):
+        return f'{self.currency} {self.rate}'
+
+
+class Review(models.Model):
+    """A shopper's 1-5 star review; one per user and product"""
+    product = models.ForeignKey(Product, related_name='reviews', on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='reviews', on_delete=models.CASCADE)
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
+    title = models.CharField(max_length=120, blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'user'], name='unique_review_per_user'),
+        ]
+        indexes = [
+            # Keyset pagination of a product's reviews, newest first
+            models.Index(fields=['product', '-created_at', '-id'], name='review_product_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.rating}* on {self.product_id} by {self.user_id}'
+
+
+class WishlistItem(models.Model):
+    """A product a user has favourited"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='wishlist', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='wishlisted_by', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Also the index the favourite-flag lookup (user, product IN ...) uses
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_wishlist_item'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} likes {self.product_id}'
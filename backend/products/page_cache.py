@@ -0,0 +1,29 @@
+"""
+Cached product list and detail responses.
+
+Serialized pages are stored per catalog version, host (image URLs are
+absolute) and filter set, so any product change moves every key and
+stale pages simply age out. Responses carry `X-Cache: HIT|MISS`, which
+`manage.py warm_caches` uses to report its hit rate.
+"""
+import hashlib
+from django.core.cache import cache
+from .catalog import catalog_version
+
+PAGE_CACHE_TIMEOUT = 300  # seconds; keys are versioned, this only bounds memory
+CACHE_HEADER = 'X-Cache'
+
+
+def page_key(kind, request, variant=''):
+    digest = hashlib.md5(f'{request.get_host()}|{variant}'.encode('utf-8')).hexdigest()
+    return f'products:{kind}:{catalog_version()}:{digest}'
+
+
+def cached_page(key, build):
+    """(data, hit) for `key`, calling `build()` on a miss"""
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+    data = build()
+    cache.set(key, data, PAGE_CACHE_TIMEOUT)
+    return data, False
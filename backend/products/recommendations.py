@@ -0,0 +1,157 @@
+"""
+Quiz-driven product recommendations.
+
+Every product is encoded once into a feature row (category one-hot, lens
+and frame traits found in its options/description, rating, popularity,
+badges, price). The quiz answers become a weight vector over the same
+columns, so scoring the whole catalog is one matrix-vector product plus a
+vectorised budget penalty, and the top k come from `np.argpartition`.
+"""
+import math
+import numpy as np
+from .catalog_matrix import CatalogMatrix
+from .models import Product
+
+CATEGORIES = [value for value, _ in Product.CATEGORY_CHOICES]
+
+# Trait columns: keyword hits in name, lens options and description
+TRAITS = {
+    'blue_light': ('blue light', 'blue-light', 'blue cut', 'screen'),
+    'anti_glare': ('anti-glare', 'anti glare', 'anti-reflective', 'anti reflective', 'glare'),
+    'photochromic': ('photochromic', 'transition', 'light adaptive', 'auto tint'),
+    'polarized': ('polarized', 'polarised'),
+    'uv_protection': ('uv', 'sun protection'),
+    'lightweight': ('lightweight', 'light weight', 'thin', 'titanium'),
+    'durable': ('durable', 'flexible', 'scratch', 'impact', 'spring hinge', 'tr90'),
+    'customizable': ('customize', 'customise', 'prescription'),
+}
+
+COLUMNS = (
+    [f'category:{category}' for category in CATEGORIES]
+    + list(TRAITS)
+    + ['rating', 'popularity', 'bestseller', 'new', 'in_stock', 'price']
+)
+COLUMN = {name: index for index, name in enumerate(COLUMNS)}
+PRICE = COLUMN['price']
+IN_STOCK = COLUMN['in_stock']
+
+ENCODER_FIELDS = [
+    'id', 'name', 'description', 'price', 'stock', 'category', 'lens_options',
+    'rating', 'review_count', 'is_bestseller', 'is_new', 'is_available', 'updated_at',
+]
+
+
+def encode_product(product):
+    row = np.zeros(len(COLUMNS), dtype=np.float32)
+    if product.category in CATEGORIES:
+        row[COLUMN[f'category:{product.category}']] = 1.0
+
+    text = ' '.join(filter(None, [product.name, product.lens_options, product.description])).lower()
+    for trait, keywords in TRAITS.items():
+        if any(keyword in text for keyword in keywords):
+            row[COLUMN[trait]] = 1.0
+
+    row[COLUMN['rating']] = float(product.rating or 0) / 5.0
+    row[COLUMN['popularity']] = min(math.log1p(product.review_count or 0) / math.log1p(10000), 1.0)
+    row[COLUMN['bestseller']] = float(product.is_bestseller)
+    row[COLUMN['new']] = float(product.is_new)
+    row[IN_STOCK] = float(product.is_available and product.stock > 0)
+    row[PRICE] = float(product.price)
+    return row
+
+
+feature_matrix = CatalogMatrix(encode_product, len(COLUMNS), fields=ENCODER_FIELDS)
+
+
+# (answer field, answer value) -> {column: weight}
+ANSWER_WEIGHTS = {
+    ('whoFor', 'childTeen'): {'category:Kids': 2.0, 'durable': 0.5},
+    ('whoFor', 'senior60'): {'category:Reading Glasses': 1.0, 'lightweight': 0.5},
+    ('visionNeed', 'upClose'): {'category:Reading Glasses': 1.5},
+    ('visionNeed', 'farAway'): {'category:Prescription': 1.0},
+    ('visionNeed', 'bothEqually'): {'category:Prescription': 0.5, 'customizable': 0.5},
+    ('powerStrength', 'moderate'): {'customizable': 0.5},
+    ('powerStrength', 'strong'): {'customizable': 1.0, 'lightweight': 0.5},
+    ('workSetting', 'mostlyOffice'): {'blue_light': 0.5, 'category:Computer Glasses': 0.5},
+    ('workSetting', 'mostlyOutdoor'): {'uv_protection': 1.0, 'photochromic': 0.5},
+    ('workSetting', 'drivingCommuting'): {'polarized': 1.0, 'anti_glare': 0.5},
+    ('workSetting', 'workshopLab'): {'category:Safety': 1.5, 'durable': 1.0},
+    ('reflectionBother', 'sometimes'): {'anti_glare': 0.7},
+    ('reflectionBother', 'often'): {'anti_glare': 1.5},
+    ('sunlightTime', 'h2to4'): {'category:Sunglasses': 0.7, 'polarized': 0.7, 'uv_protection': 0.7},
+    ('sunlightTime', 'h4plus'): {'category:Sunglasses': 1.0, 'polarized': 1.0, 'uv_protection': 1.0},
+    ('preferAutoOutdoor', 'yes'): {'photochromic': 2.0},
+    ('nightDriving', 'h1to3'): {'anti_glare': 0.7},
+    ('nightDriving', 'h4plus'): {'anti_glare': 1.5},
+    ('lightSensitivity', 'medium'): {'photochromic': 0.5},
+    ('lightSensitivity', 'high'): {'photochromic': 1.0, 'polarized': 0.5},
+    ('activities', 'office'): {'blue_light': 0.5},
+    ('activities', 'sports'): {'category:Sports': 1.5, 'durable': 1.0},
+    ('activities', 'construction'): {'category:Safety': 2.0, 'durable': 1.0},
+    ('activities', 'gaming'): {'blue_light': 1.0, 'category:Computer Glasses': 1.0},
+    ('activities', 'travel'): {'lightweight': 0.5, 'uv_protection': 0.5},
+    ('roughUse', 'medium'): {'durable': 0.7},
+    ('roughUse', 'high'): {'durable': 1.5},
+    ('lensWeightPref', 'lightThin'): {'lightweight': 1.0},
+    ('handling', 'rough'): {'durable': 1.0},
+    ('handling', 'childUse'): {'durable': 1.5, 'category:Kids': 0.5},
+    ('comforts', 'reduceEyeStrain'): {'blue_light': 1.0},
+    ('comforts', 'reduceGlare'): {'anti_glare': 1.0},
+    ('comforts', 'stayClearOutdoors'): {'photochromic': 0.5, 'polarized': 0.5},
+    ('comforts', 'resistScratches'): {'durable': 0.7},
+    ('comforts', 'veryLightweight'): {'lightweight': 1.0},
+}
+
+# Applied to every quiz so well-reviewed products win ties
+BASE_WEIGHTS = {'rating': 1.0, 'popularity': 0.3, 'bestseller': 0.3, 'new': 0.1}
+
+# Score lost per 100% over budget
+BUDGET_PENALTY = 3.0
+
+
+def answer_weights(answers):
+    """Weight vector over COLUMNS for one set of quiz answers"""
+    weights = np.zeros(len(COLUMNS), dtype=np.float32)
+    for column, weight in BASE_WEIGHTS.items():
+        weights[COLUMN[column]] += weight
+
+    for field, value in answers.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        for item in values:
+            for column, weight in ANSWER_WEIGHTS.get((field, item), {}).items():
+                weights[COLUMN[column]] += weight
+
+    screen_time = answers.get('screenTimeHours')
+    if isinstance(screen_time, (int, float)) and screen_time >= 4:
+        # Heavy screen users: scale the blue-light pull with hours per day
+        weights[COLUMN['blue_light']] += min(screen_time / 4.0, 3.0)
+        weights[COLUMN['category:Computer Glasses']] += 1.0
+        weights[COLUMN['anti_glare']] += 0.5
+
+    # Price is handled by the budget penalty, never by the dot product
+    weights[PRICE] = 0.0
+    weights[IN_STOCK] = 0.0
+    return weights
+
+
+def recommend(answers, k=10):
+    """Top `k` (product_id, score) pairs for the answers, best first"""
+    ids, rows, live = feature_matrix.snapshot()
+    if not len(ids):
+        return []
+
+    scores = rows @ answer_weights(answers)
+
+    budget = answers.get('budgetPKR')
+    if isinstance(budget, (int, float)) and budget > 0:
+        over = np.maximum(rows[:, PRICE] - budget, 0.0) / budget
+        scores -= BUDGET_PENALTY * over
+
+    scores[~(live & (rows[:, IN_STOCK] > 0))] = -np.inf
+
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return [(int(ids[i]), float(scores[i])) for i in top]
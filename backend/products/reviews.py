@@ -0,0 +1,82 @@
+"""
+Product reviews and the rating aggregates kept on Product.
+
+Each product stores `rating_sum` (total stars) and `review_count`, and
+`rating` = rating_sum / review_count. Every review write adjusts them with
+one `UPDATE products SET ... = col + delta` in the same transaction, so a
+new review costs the same whether the product has ten reviews or a
+million, and concurrent reviews can't overwrite each other's counts.
+
+Deletes (including cascades from a deleted user) are handled by the
+Review post_delete signal.
+
+Listings are keyset-paginated: the cursor is the (created_at, id) of the
+last review seen, so any page is an index range scan.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import NullIf, Round
+from django.utils import timezone
+from .models import Product, Review
+from .sync import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def adjust_aggregates(product_id, stars, count):
+    """
+    Add `stars` to the product's star total and `count` to its review
+    count, bumping updated_at so caches, delta sync and the snapshot see
+    the new rating.
+    """
+    new_sum = F('rating_sum') + stars
+    new_count = F('review_count') + count
+    Product.objects.filter(pk=product_id).update(
+        # Listed first: MySQL applies SET left to right, so later
+        # assignments would already see the new sum and count. The * 1.0
+        # stops SQLite doing integer division.
+        rating=Round(
+            ExpressionWrapper(new_sum * Value(1.0) / NullIf(new_count, 0), output_field=FloatField()),
+            2
+        ),
+        rating_sum=new_sum,
+        review_count=new_count,
+        updated_at=timezone.now(),
+    )
+
+
+def submit_review(user, product, rating, title='', body=''):
+    """Create or replace `user`'s review of `product`; returns (review, created)"""
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(
+                    product=product, user=user, rating=rating, title=title, body=body
+                )
+        except IntegrityError:
+            # Already reviewed: edit it, moving the totals by the difference
+            review = Review.objects.select_for_update().get(product=product, user=user)
+            previous = review.rating
+            review.rating, review.title, review.body = rating, title, body
+            review.save(update_fields=['rating', 'title', 'body', 'updated_at'])
+            adjust_aggregates(product.pk, rating - previous, 0)
+            return review, False
+        adjust_aggregates(product.pk, rating, 1)
+        return review, True
+
+
+def review_page(product_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Reviews of a product, newest first, after `cursor`. Returns
+    (reviews, next_cursor); next_cursor is None on the last page.
+    """
+    reviews = Review.objects.filter(product_id=product_id).select_related('user').order_by('-created_at', '-id')
+    if cursor:
+        created_at, review_id = decode_cursor(cursor)
+        reviews = reviews.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id))
+    page = list(reviews[:limit + 1])
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(page[-1].created_at, page[-1].pk)
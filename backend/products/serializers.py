@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Product, ProductImage
+from .models import Product, ProductImage, Review
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
@@ -45,11 +45,23 @@ class ProductSerializer(serializers.ModelSerializer):
             'created_at', 
             'updated_at'
         ]
+        # Maintained from reviews (reviews.py)
+        read_only_fields = ['rating', 'review_count']
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Only write what was edited: saving the whole row would put back
+        # review totals that changed since the product was loaded
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
     def get_primary_image(self, obj):
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            return primary_image.image.url
+        # Scan the (prefetched) images rather than filter(): a filter is a
+        # query per product on list pages
+        for image in obj.images.all():
+            if image.is_primary:
+                return image.image.url
         return None
     
     def get_colors(self, obj):
@@ -62,4 +74,12 @@ class ProductSerializer(serializers.ModelSerializer):
     
     def get_lens_options(self, obj):
         """Return lens options as a list"""
-        return obj.lens_options_list
\ No newline at end of file
+        return obj.lens_options_list
+
+class ReviewSerializer(serializers.ModelSerializer):
+    user_name = serializers.CharField(source='user.full_name', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ['id', 'rating', 'title', 'body', 'user_name', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at']
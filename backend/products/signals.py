@@ -0,0 +1,85 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .catalog import invalidate_catalog_version
+from .images import release_blob
+from .models import DeletedProduct, Product, ProductImage, Review, SimilarProduct
+from .recommendations import feature_matrix
+from .reviews import adjust_aggregates
+from .similarity import similarity_matrix
+from .sync import purge_tombstones
+from tasks.runner import enqueue
+
+# Saves in quick succession (imports, admin edits) share one rebuild
+SNAPSHOT_DELAY = timedelta(seconds=30)
+
+
+def _queue_catalog_snapshot():
+    enqueue('products.build_catalog_snapshot', unique_key='catalog', delay=SNAPSHOT_DELAY)
+
+
+@receiver(post_save, sender=Product)
+def update_catalog_matrices(sender, instance, **kwargs):
+    """
+    Re-encode the saved product once its transaction commits; neighbour
+    lists and the offline snapshot are rebuilt by the task workers
+    """
+    def apply():
+        invalidate_catalog_version()
+        if feature_matrix.is_built:
+            feature_matrix.upsert(instance)
+        if similarity_matrix.is_built:
+            similarity_matrix.upsert(instance)
+        enqueue('products.refresh_similar', unique_key=str(instance.pk), product_id=instance.pk)
+        _queue_catalog_snapshot()
+
+    transaction.on_commit(apply)
+
+
+@receiver(pre_delete, sender=Product)
+def remember_similar_lists(sender, instance, **kwargs):
+    # These rows cascade away with the product; their owners need new lists
+    instance._listed_by = list(
+        SimilarProduct.objects.filter(similar_id=instance.pk).values_list('product_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def drop_from_catalog_matrices(sender, instance, **kwargs):
+    product_id = instance.pk
+    listed_by = getattr(instance, '_listed_by', [])
+    # Written in the deleting transaction so the tombstone can't be lost
+    DeletedProduct.objects.create(product_id=product_id)
+
+    def apply():
+        invalidate_catalog_version()
+        feature_matrix.discard(product_id)
+        similarity_matrix.discard(product_id)
+        enqueue('products.refresh_similar', product_id=product_id, extra=listed_by)
+        _queue_catalog_snapshot()
+        purge_tombstones()
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_product(sender, instance, **kwargs):
+    # Images are part of the product payload; bump updated_at so delta sync
+    # and the catalog version pick the change up
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=ProductImage)
+def release_image_blob(sender, instance, **kwargs):
+    # Shared files only go with their last image
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_delete, sender=Review)
+def drop_review_from_aggregates(sender, instance, **kwargs):
+    # Runs inside the delete's transaction, also for cascades from a user
+    adjust_aggregates(instance.product_id, -instance.rating, -1)
@@ -0,0 +1,216 @@
+"""
+"Similar frames" nearest-neighbour index.
+
+Each product is encoded into a unit-length vector built from weighted
+blocks (category, brand, colours, sizes, price band and hashed words from
+the description), so cosine similarity is a plain dot product. The top
+`NEIGHBOURS` products for every product are stored in `SimilarProduct`,
+which makes the read path a single indexed lookup.
+
+When a product is saved only the affected lists are recomputed: the
+product's own, those that currently include it, and those whose weakest
+neighbour it now beats. A product read before its list exists gets an
+empty rail and a queued `products.refresh_similar` task; requests never
+compute or write lists themselves.
+"""
+import math
+import re
+import zlib
+import numpy as np
+from django.db import IntegrityError, transaction
+from .catalog_matrix import CatalogMatrix
+from .models import Product, SimilarProduct
+from tasks.runner import enqueue
+
+NEIGHBOURS = 12
+# Products whose lists are checked when a product changes
+CANDIDATES = 200
+
+CATEGORIES = [value for value, _ in Product.CATEGORY_CHOICES]
+BRAND_BUCKETS = 32
+COLOUR_BUCKETS = 32
+SIZE_BUCKETS = 16
+PRICE_BANDS = 10
+TEXT_BUCKETS = 128
+
+# (block name, width, weight)
+BLOCKS = [
+    ('category', len(CATEGORIES) + 1, 1.0),
+    ('brand', BRAND_BUCKETS, 0.8),
+    ('colours', COLOUR_BUCKETS, 0.6),
+    ('sizes', SIZE_BUCKETS, 0.3),
+    ('price', PRICE_BANDS, 0.7),
+    ('text', TEXT_BUCKETS, 0.8),
+]
+WIDTH = sum(width for _, width, _ in BLOCKS)
+
+STOPWORDS = {
+    'and', 'the', 'with', 'for', 'your', 'any', 'that', 'this', 'are', 'from',
+    'all', 'our', 'you', 'its', 'has', 'have', 'includes', 'included',
+}
+WORD = re.compile(r'[a-z]{3,}')
+
+ENCODER_FIELDS = [
+    'id', 'description', 'price', 'category', 'brand', 'frame_colors', 'sizes', 'updated_at',
+]
+
+
+def _bucket(value, buckets):
+    return zlib.crc32(value.strip().lower().encode('utf-8')) % buckets
+
+
+def _price_band(price):
+    """Roughly doubling bands from PKR 500 upwards"""
+    if not price or price <= 0:
+        return 0
+    return max(0, min(PRICE_BANDS - 1, int(math.log2(float(price) / 500.0)) + 1))
+
+
+def _normalise(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def encode_product(product):
+    blocks = {name: np.zeros(width, dtype=np.float32) for name, width, _ in BLOCKS}
+
+    category = product.category if product.category in CATEGORIES else None
+    blocks['category'][CATEGORIES.index(category) if category else len(CATEGORIES)] = 1.0
+
+    if product.brand:
+        blocks['brand'][_bucket(product.brand, BRAND_BUCKETS)] = 1.0
+    for colour in product.frame_colors_list:
+        blocks['colours'][_bucket(colour, COLOUR_BUCKETS)] = 1.0
+    for size in product.sizes_list:
+        blocks['sizes'][_bucket(size, SIZE_BUCKETS)] = 1.0
+
+    # Neighbouring bands count a little so 2,400 and 2,600 aren't strangers
+    band = _price_band(product.price)
+    blocks['price'][band] = 1.0
+    for neighbour in (band - 1, band + 1):
+        if 0 <= neighbour < PRICE_BANDS:
+            blocks['price'][neighbour] = 0.4
+
+    for word in WORD.findall((product.description or '').lower()):
+        if word not in STOPWORDS:
+            blocks['text'][_bucket(word, TEXT_BUCKETS)] += 1.0
+    blocks['text'] = np.log1p(blocks['text'])
+
+    vector = np.concatenate([
+        _normalise(blocks[name]) * weight for name, _, weight in BLOCKS
+    ])
+    return _normalise(vector).astype(np.float32)
+
+
+similarity_matrix = CatalogMatrix(encode_product, WIDTH, fields=ENCODER_FIELDS)
+
+
+def _top_neighbours(product_id, ids, rows, live, scores=None):
+    """Top NEIGHBOURS (id, score) for one product, given its score row"""
+    position = similarity_matrix.index.get(product_id)
+    if position is None or position >= len(ids):
+        return []
+    if scores is None:
+        scores = rows @ rows[position]
+    scores = np.where(live, scores, -np.inf)
+    scores[position] = -np.inf
+
+    count = min(NEIGHBOURS, int(np.isfinite(scores).sum()))
+    if count <= 0:
+        return []
+    top = np.argpartition(-scores, count - 1)[:count]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def _store(product_id, neighbours):
+    SimilarProduct.objects.filter(product_id=product_id).delete()
+    SimilarProduct.objects.bulk_create([
+        SimilarProduct(product_id=product_id, similar_id=similar_id, rank=rank, score=score)
+        for rank, (similar_id, score) in enumerate(neighbours)
+    ])
+
+
+def refresh_similar(product_id, extra=()):
+    """
+    Recompute the lists touched by a change to `product_id` (saved or
+    deleted). `extra` adds product IDs known to need a refresh, e.g. those
+    that listed a product that has just been deleted.
+    """
+    try:
+        _refresh_similar(product_id, extra)
+    except IntegrityError:
+        # The matrix still held a product another process deleted
+        similarity_matrix.rebuild()
+        _refresh_similar(product_id, extra)
+
+
+def _refresh_similar(product_id, extra):
+    ids, rows, live = similarity_matrix.snapshot()
+    affected = set(extra)
+
+    position = similarity_matrix.index.get(product_id)
+    if position is not None and position < len(live) and live[position]:
+        affected.add(product_id)
+        scores = np.where(live, rows @ rows[position], -np.inf)
+        scores[position] = -np.inf
+        count = min(CANDIDATES, int(np.isfinite(scores).sum()))
+        if count > 0:
+            candidates = np.argpartition(-scores, count - 1)[:count]
+            candidate_scores = {int(ids[i]): float(scores[i]) for i in candidates}
+            # Weakest stored neighbour of each candidate; short lists take anyone
+            weakest = dict(
+                SimilarProduct.objects.filter(
+                    product_id__in=list(candidate_scores), rank=NEIGHBOURS - 1
+                ).values_list('product_id', 'score')
+            )
+            affected.update(
+                pk for pk, score in candidate_scores.items()
+                if score > weakest.get(pk, -np.inf)
+            )
+
+    affected.update(
+        SimilarProduct.objects.filter(similar_id=product_id).values_list('product_id', flat=True)
+    )
+
+    with transaction.atomic():
+        for pk in affected:
+            position = similarity_matrix.index.get(pk)
+            if position is not None and position < len(live) and live[position]:
+                _store(pk, _top_neighbours(pk, ids, rows, live))
+
+
+def similar_ids(product_id):
+    """Stored neighbour IDs, best first; empty until a worker has computed them"""
+    return list(
+        SimilarProduct.objects.filter(product_id=product_id)
+        .order_by('rank')
+        .values_list('similar_id', flat=True)
+    )
+
+
+def queue_similar(product_id):
+    """Have a task worker compute `product_id`'s list (not the request)"""
+    enqueue('products.refresh_similar', unique_key=str(product_id), product_id=product_id)
+
+
+def rebuild_similar(batch_size=1024):
+    """Recompute every product's list (management command / first deploy)"""
+    similarity_matrix.rebuild()
+    ids, rows, live = similarity_matrix.snapshot()
+    live_positions = np.flatnonzero(live)
+
+    with transaction.atomic():
+        SimilarProduct.objects.all().delete()
+        for start in range(0, len(live_positions), batch_size):
+            batch = live_positions[start:start + batch_size]
+            block = rows[batch] @ rows.T
+            objects = []
+            for offset, position in enumerate(batch):
+                neighbours = _top_neighbours(int(ids[position]), ids, rows, live, scores=block[offset])
+                objects.extend(
+                    SimilarProduct(product_id=int(ids[position]), similar_id=similar_id, rank=rank, score=score)
+                    for rank, (similar_id, score) in enumerate(neighbours)
+                )
+            SimilarProduct.objects.bulk_create(objects, batch_size=5000)
+    return len(live_positions)
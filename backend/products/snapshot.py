@@ -0,0 +1,165 @@
+"""
+Prebuilt offline catalog snapshot.
+
+The whole catalog (products, an image URL map and facet counts) is
+serialised once, gzip-compressed and written to CATALOG_SNAPSHOT_ROOT as
+`catalog-<sha256 prefix>.json.gz`. Because the name is derived from the
+content, a file never changes once written and can be cached forever;
+`latest.json` next to it says which file matches which catalog version,
+with the delta-sync `cursor` to pass to /api/products/changes/ after
+loading it.
+
+Snapshots are built by the `products.build_catalog_snapshot` task, queued
+when products change and when a manifest request finds the catalog
+version has moved on (the previous snapshot is served meanwhile), or with
+`python manage.py build_catalog_snapshot`. A request never builds one
+itself: until the first snapshot exists the manifest is unavailable.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from .catalog import catalog_version
+from .facets import compute_facets
+from .models import Product, ProductImage
+from .serializers import ProductSerializer
+from .sync import SETTLE, encode_cursor
+from tasks.runner import enqueue
+
+MANIFEST_NAME = 'latest.json'
+FILE_NAME = re.compile(r'^catalog-[0-9a-f]{16}\.json\.gz$')
+KEEP_FILES = 3  # older snapshots stay briefly for clients mid-download
+
+
+class SnapshotProductSerializer(ProductSerializer):
+    """ProductSerializer without images; the snapshot carries them in one map"""
+
+    class Meta(ProductSerializer.Meta):
+        fields = [
+            field for field in ProductSerializer.Meta.fields
+            if field not in ('images', 'primary_image')
+        ]
+
+
+def snapshot_root():
+    return Path(getattr(settings, 'CATALOG_SNAPSHOT_ROOT', Path(settings.MEDIA_ROOT) / 'catalog'))
+
+
+def _image_map():
+    """{product_id: [url, ...]} with the primary image first"""
+    images = {}
+    rows = ProductImage.objects.order_by('product_id', '-is_primary', '-created_at').values_list(
+        'product_id', 'image'
+    )
+    for product_id, name in rows.iterator(chunk_size=2000):
+        if name:
+            images.setdefault(str(product_id), []).append(default_storage.url(name))
+    return images
+
+
+def build_payload(version):
+    products = Product.objects.order_by('id')
+    return {
+        'version': version,
+        'products': [
+            SnapshotProductSerializer(product).data
+            for product in products.iterator(chunk_size=2000)
+        ],
+        'images': _image_map(),
+        'facets': compute_facets(Product.objects.all()),
+    }
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_manifest():
+    try:
+        with open(snapshot_root() / MANIFEST_NAME, 'rb') as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def build_snapshot():
+    """Write the snapshot for the current catalog version; returns the manifest"""
+    started = timezone.now()
+    version = catalog_version()
+    raw = json.dumps(build_payload(version), cls=JSONEncoder, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(raw).hexdigest()
+    name = f'catalog-{digest[:16]}.json.gz'
+
+    root = snapshot_root()
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / name
+    if not path.exists():
+        # mtime=0 keeps the bytes identical for identical content
+        _write_atomic(path, gzip.compress(raw, compresslevel=9, mtime=0))
+
+    manifest = {
+        'version': version,
+        'file': name,
+        'sha256': digest,
+        'size': path.stat().st_size,
+        'uncompressed_size': len(raw),
+        'generated_at': timezone.now().isoformat(),
+        # Everything changed since the products were read, give or take
+        # SETTLE, the same margin changes_since keeps
+        'cursor': encode_cursor(started - SETTLE, 0, started),
+    }
+    _write_atomic(root / MANIFEST_NAME, json.dumps(manifest).encode('utf-8'))
+    _prune(root, keep=name)
+    return manifest
+
+
+def _prune(root, keep):
+    files = sorted(
+        (path for path in root.iterdir() if FILE_NAME.match(path.name) and path.name != keep),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True
+    )
+    for path in files[KEEP_FILES - 1:]:
+        path.unlink(missing_ok=True)
+
+
+def snapshot_path(name):
+    """Path of a snapshot file, or None if the name isn't one of ours"""
+    if not FILE_NAME.match(name):
+        return None
+    path = snapshot_root() / name
+    return path if path.exists() else None
+
+
+def queue_snapshot():
+    # One pending build covers every request that noticed
+    enqueue('products.build_catalog_snapshot', unique_key='catalog')
+
+
+def current_manifest():
+    """
+    Manifest for clients, or None if there is no snapshot yet. A stale one
+    is returned while the task workers build its replacement.
+    """
+    manifest = read_manifest()
+    if manifest is None or not snapshot_path(manifest['file']):
+        queue_snapshot()
+        return None
+    if manifest['version'] != catalog_version():
+        queue_snapshot()
+    return manifest
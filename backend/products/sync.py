@@ -0,0 +1,121 @@
+"""
+Delta sync for the app's local product cache.
+
+A cursor is the (updated_at, id) of the last product a client has seen
+and the time the cursor was issued, encoded as
+"<microseconds>.<id>.<issued microseconds>". `changes_since` returns
+products strictly after that position in (updated_at, id) order, which
+the updated_at index serves directly, plus tombstones for products
+deleted since then.
+
+Once the last page has been sent the cursor jumps to `SETTLE` seconds
+ago, never further, so rows whose transaction committed slightly after a
+later timestamp was read are sent again next time instead of being
+skipped. Clients apply changes as upserts, so the repeats are harmless.
+While `has_more` is true the issue time stays at the start of the run,
+since deletions are only owed from then on.
+
+Tombstones are kept for `TOMBSTONE_RETENTION`; a client whose cursor was
+issued longer ago than that gets `reset: true` and a full listing
+instead. How old the products themselves are doesn't matter, so a
+catalog nobody has edited for months still syncs incrementally.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Q
+from django.utils import timezone
+from .models import DeletedProduct, Product
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+SETTLE = timedelta(seconds=2)
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def encode_cursor(updated_at, product_id, issued_at=None):
+    cursor = f'{_micros(updated_at)}.{product_id}'
+    return cursor if issued_at is None else f'{cursor}.{_micros(issued_at)}'
+
+
+def decode_sync_cursor(cursor):
+    """
+    ((updated_at, id), issued_at); a cursor without an issue time counts as
+    issued at its position.
+    """
+    try:
+        micros, product_id, *issued = cursor.split('.')
+        if len(issued) > 1:
+            raise ValueError(cursor)
+        position = EPOCH + timedelta(microseconds=int(micros)), int(product_id)
+        issued_at = EPOCH + timedelta(microseconds=int(issued[0])) if issued else position[0]
+    except (AttributeError, ValueError, OverflowError):
+        raise InvalidCursor('Invalid cursor')
+    return position, issued_at
+
+
+def decode_cursor(cursor):
+    return decode_sync_cursor(cursor)[0]
+
+
+def purge_tombstones():
+    return DeletedProduct.objects.filter(
+        deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION
+    ).delete()[0]
+
+
+def changes_since(cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Products changed after `cursor` (None for a full listing) and the IDs
+    deleted over the same span. Returns a dict with `changed` (Product
+    queryset slice, images prefetched), `deleted`, `cursor`, `has_more`
+    and `reset`.
+    """
+    now = timezone.now()
+    since, issued_at = decode_sync_cursor(cursor) if cursor else (None, now)
+    reset = since is not None and issued_at < now - TOMBSTONE_RETENTION
+    if reset:
+        since, issued_at = None, now
+
+    products = Product.objects.order_by('updated_at', 'id')
+    if since is not None:
+        since_time, since_id = since
+        products = products.filter(
+            Q(updated_at__gt=since_time) | Q(updated_at=since_time, id__gt=since_id)
+        )
+    page = list(products.prefetch_related('images')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    if has_more:
+        last = (page[-1].updated_at, page[-1].pk)
+    else:
+        # Caught up: continue from a little before now, so late commits
+        # aren't skipped and an idle catalog's cursor doesn't age
+        last = (now - SETTLE, 0)
+        if since is not None:
+            last = max(last, since)
+        issued_at = now
+
+    deleted = []
+    if since is not None:
+        tombstones = DeletedProduct.objects.filter(deleted_at__gt=since[0])
+        if has_more:
+            tombstones = tombstones.filter(deleted_at__lte=last[0])
+        deleted = sorted(set(tombstones.values_list('product_id', flat=True)))
+
+    return {
+        'changed': page,
+        'deleted': deleted,
+        'cursor': encode_cursor(*last, issued_at),
+        'has_more': has_more,
+        'reset': reset,
+    }
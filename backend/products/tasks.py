@@ -0,0 +1,28 @@
+"""Background tasks for the catalog (run by `python manage.py run_tasks`)"""
+from tasks.runner import task
+from .models import Product
+from .similarity import ENCODER_FIELDS, rebuild_similar, refresh_similar, similarity_matrix
+from .snapshot import build_snapshot
+
+
+@task('products.refresh_similar', priority=5)
+def refresh_similar_products(product_id, extra=()):
+    """Recompute the similar-frames lists touched by one saved/deleted product"""
+    similarity_matrix.refresh()
+    # This worker's matrix may not have seen the change yet
+    product = Product.objects.only(*ENCODER_FIELDS).filter(pk=product_id).first()
+    if product is None:
+        similarity_matrix.discard(product_id)
+    else:
+        similarity_matrix.upsert(product)
+    refresh_similar(product_id, extra=extra)
+
+
+@task('products.rebuild_similar', max_attempts=1)
+def rebuild_similar_products():
+    return {'products': rebuild_similar()}
+
+
+@task('products.build_catalog_snapshot')
+def build_catalog_snapshot():
+    return build_snapshot()
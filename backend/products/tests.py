@@ -1,3 +1,732 @@
-from django.test import TestCase
+from datetime import timedelta
+import gzip
+import io
+import json
+import logging
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from lenshive_backend.preconditions import PreconditionFailed, expect_unchanged
+from .catalog import invalidate_catalog_version
+from .currency import convert_prices, invalidate_rates, rate_table
+from .facets import compute_facets
+from .filters import filter_key
+from .models import ExchangeRate, ImageBlob, Product, ProductImage, Review, SimilarProduct, WishlistItem
+from .recommendations import feature_matrix, recommend
+from .reviews import submit_review
+from .similarity import rebuild_similar, similar_ids
+from .snapshot import build_snapshot, snapshot_root
+from . import sync
+from tasks.models import Task
+from tasks.runner import run_pending
 
-# Create your tests here.
+
+def make_product(**kwargs):
+    defaults = {
+        'name': 'Classic Frame',
+        'description': 'Everyday acetate frame.',
+        'price': Decimal('3000.00'),
+        'stock': 10,
+        'category': 'Unisex',
+        'rating': Decimal('4.00'),
+    }
+    defaults.update(kwargs)
+    return Product.objects.create(**defaults)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.computer = make_product(
+            name='ScreenGuard',
+            category='Computer Glasses',
+            lens_options='Frame only,Blue Light Filter',
+        )
+        self.sun = make_product(
+            name='Coastline',
+            category='Sunglasses',
+            description='Polarized lenses with full UV protection.',
+            price=Decimal('9000.00'),
+        )
+        self.plain = make_product(name='Basic')
+        feature_matrix.rebuild()
+
+    def refreshed(self):
+        # Force the periodic change check to run now
+        feature_matrix._checked_at = 0.0
+        feature_matrix.refresh()
+
+    def test_screen_heavy_answers_rank_computer_glasses_first(self):
+        ranked = recommend({'screenTimeHours': 8, 'comforts': ['reduceEyeStrain']}, k=3)
+        self.assertEqual(ranked[0][0], self.computer.pk)
+
+    def test_sunlight_answers_rank_sunglasses_first(self):
+        ranked = recommend({'sunlightTime': 'h4plus', 'workSetting': 'drivingCommuting'}, k=3)
+        self.assertEqual(ranked[0][0], self.sun.pk)
+
+    def test_budget_penalises_expensive_products(self):
+        answers = {'sunlightTime': 'h4plus', 'budgetPKR': 2000}
+        ranked = [pk for pk, _ in recommend(answers, k=3)]
+        self.assertLess(ranked.index(self.plain.pk), ranked.index(self.sun.pk))
+
+    def test_out_of_stock_products_are_skipped(self):
+        # Bulk updates (e.g. checkout) bump updated_at so the change check sees them
+        Product.objects.filter(pk=self.computer.pk).update(stock=0, updated_at=timezone.now())
+        self.refreshed()
+        ranked = [pk for pk, _ in recommend({'screenTimeHours': 8}, k=3)]
+        self.assertNotIn(self.computer.pk, ranked)
+        self.assertEqual(len(ranked), 2)
+
+    def test_saves_update_the_matrix_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            safety = make_product(name='Site Pro', category='Safety', description='Impact rated.')
+        ranked = recommend({'activities': ['construction']}, k=1)
+        self.assertEqual(ranked[0][0], safety.pk)
+
+    def test_deleted_products_drop_out(self):
+        Product.objects.filter(pk=self.sun.pk).delete()
+        self.refreshed()
+        ranked = [pk for pk, _ in recommend({}, k=5)]
+        self.assertNotIn(self.sun.pk, ranked)
+
+    def test_endpoint(self):
+        response = APIClient().post(
+            '/api/recommendations/?k=2',
+            {'screenTimeHours': 6, 'activities': ['gaming']},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['id'], self.computer.pk)
+
+    def test_endpoint_rejects_non_object_bodies(self):
+        client = APIClient()
+        for body in ([{'screenTimeHours': 6}], 'gaming', {'answers': ['gaming']}):
+            response = client.post('/api/recommendations/', body, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('message', response.data)
+
+
+class SimilarProductTests(TestCase):
+    def setUp(self):
+        aviator = {
+            'category': 'Sunglasses',
+            'brand': 'Classic',
+            'frame_colors': 'Gold,Silver',
+            'sizes': 'Medium,Large',
+            'description': 'Metal aviator frame with polarized lenses and adjustable nose pads.',
+            'price': Decimal('2500.00'),
+        }
+        self.aviator = make_product(name='Classic Aviator', **aviator)
+        self.aviator_twin = make_product(name='Classic Aviator II', **aviator)
+        self.kids = make_product(
+            name='Tiny Tots', category='Kids', brand='Bright', frame_colors='Blue',
+            sizes='Small', description='Soft flexible frame for children.', price=Decimal('900.00')
+        )
+        rebuild_similar()
+
+    def test_closest_product_ranks_first(self):
+        self.assertEqual(similar_ids(self.aviator.pk)[0], self.aviator_twin.pk)
+
+    def test_endpoint_is_one_lookup(self):
+        response = APIClient().get(f'/api/products/{self.aviator.pk}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.aviator_twin.pk)
+        self.assertNotIn(self.aviator.pk, [p['id'] for p in response.data])
+
+    def test_missing_product_is_404(self):
+        self.assertEqual(APIClient().get('/api/products/999999/similar/').status_code, 404)
+
+    def test_uncomputed_list_is_queued_not_built_in_the_request(self):
+        # Created without the save signal's task, like a bulk import
+        SimilarProduct.objects.filter(product_id=self.kids.pk).delete()
+        with self.assertNumQueries(4):  # lookup, existence check, queue check + insert
+            response = APIClient().get(f'/api/products/{self.kids.pk}/similar/')
+        self.assertEqual(response.data, [])
+        self.assertFalse(SimilarProduct.objects.filter(product_id=self.kids.pk).exists())
+        run_pending()
+        self.assertTrue(similar_ids(self.kids.pk))
+
+    def test_saving_a_product_updates_affected_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            junior = make_product(
+                name='Tiny Tots II', category='Kids', brand='Bright', frame_colors='Blue',
+                sizes='Small', description='Soft flexible frame for children.', price=Decimal('950.00')
+            )
+        run_pending()
+        self.assertEqual(similar_ids(self.kids.pk)[0], junior.pk)
+        self.assertEqual(similar_ids(junior.pk)[0], self.kids.pk)
+
+    def test_deleting_a_product_refreshes_lists_that_held_it(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aviator_twin.delete()
+        run_pending()
+        remaining = similar_ids(self.aviator.pk)
+        self.assertEqual(remaining, [self.kids.pk])
+        self.assertFalse(SimilarProduct.objects.filter(similar_id=self.aviator_twin.pk).exists())
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_catalog_version()
+        make_product(category='Men', brand='AURA', frame_colors='Black,Silver', sizes='Medium',
+                     price=Decimal('1500.00'))
+        make_product(category='Men', brand='Classic', frame_colors='Gold', sizes='Medium,Large',
+                     price=Decimal('2500.00'), stock=0)
+        make_product(category='Women', brand='AURA', frame_colors='Rose, Silver', sizes='Small',
+                     price=Decimal('12000.00'))
+
+    def test_counts_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            facets = compute_facets(Product.objects.all())
+
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['categories'], [{'value': 'Men', 'count': 2}, {'value': 'Women', 'count': 1}])
+        self.assertIn({'value': 'Silver', 'count': 2}, facets['colors'])
+        self.assertIn({'value': 'Medium', 'count': 2}, facets['sizes'])
+        self.assertEqual([b['count'] for b in facets['price_buckets']], [0, 1, 1, 0, 1])
+        self.assertEqual(facets['availability'], {'in_stock': 2, 'out_of_stock': 1})
+
+    def test_endpoint_applies_filters(self):
+        response = APIClient().get('/api/products/facets/', {'brand': 'AURA', 'in_stock': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(response.data['brands'], [{'value': 'AURA', 'count': 2}])
+
+    def test_cached_until_catalog_changes(self):
+        client = APIClient()
+        client.get('/api/products/facets/')
+        with self.assertNumQueries(0):
+            client.get('/api/products/facets/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product(category='Kids')
+        self.assertEqual(client.get('/api/products/facets/').data['total'], 4)
+
+    def test_list_uses_the_same_filters(self):
+        response = APIClient().get('/api/products/', {'category': 'Men', 'in_stock': 'true'})
+        self.assertEqual([p['brand'] for p in response.data], ['AURA'])
+
+    def test_colour_and_size_match_whole_entries_like_the_facets(self):
+        make_product(brand='Dark', frame_colors='Dark Silver, Black', sizes='Extra Small')
+        client = APIClient()
+        for params in ({'color': 'Silver'}, {'color': 'silver,Gold'}, {'size': 'Small'}, {'size': 'Extra Small'}):
+            listed = client.get('/api/products/', params).data
+            facets = client.get('/api/products/facets/', params).data
+            self.assertEqual(len(listed), facets['total'], params)
+        self.assertEqual(len(client.get('/api/products/', {'color': 'Silver'}).data), 2)
+        self.assertEqual(len(client.get('/api/products/', {'color': 'Dark Silver'}).data), 1)
+
+    def test_filter_key_keeps_values_apart(self):
+        self.assertNotEqual(
+            filter_key({'brand': 'A&category=Men'}),
+            filter_key({'brand': 'A', 'category': 'Men'})
+        )
+        self.assertEqual(filter_key({'search': 'x', 'brand': 'A'}), filter_key({'brand': 'A', 'search': 'x'}))
+
+
+class ChangesTests(TestCase):
+    def setUp(self):
+        self.first = make_product(name='First')
+        self.second = make_product(name='Second')
+        self.client = APIClient()
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['since'] = cursor
+        response = self.client.get('/api/products/changes/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_listing_then_only_changes(self):
+        with mock.patch.object(sync, 'SETTLE', timedelta(0)):
+            initial = self.sync()
+            self.assertEqual([p['id'] for p in initial['changed']], [self.first.pk, self.second.pk])
+
+            self.first.stock = 3
+            self.first.save()
+            delta = self.sync(initial['cursor'])
+        self.assertEqual([p['id'] for p in delta['changed']], [self.first.pk])
+        self.assertEqual(delta['changed'][0]['stock'], 3)
+        self.assertEqual(delta['deleted'], [])
+
+    def test_deletes_come_back_as_tombstones(self):
+        with mock.patch.object(sync, 'SETTLE', timedelta(0)):
+            cursor = self.sync()['cursor']
+            deleted_id = self.second.pk
+            self.second.delete()
+            delta = self.sync(cursor)
+        self.assertEqual(delta['changed'], [])
+        self.assertEqual(delta['deleted'], [deleted_id])
+
+    def test_pages_follow_the_cursor(self):
+        page = self.sync(limit=1)
+        self.assertTrue(page['has_more'])
+        rest = self.sync(page['cursor'], limit=1)
+        self.assertEqual([p['id'] for p in rest['changed']], [self.second.pk])
+        self.assertFalse(rest['has_more'])
+
+    def test_recent_changes_are_sent_again(self):
+        # Within SETTLE the cursor stays behind, so nothing in flight is skipped
+        cursor = self.sync()['cursor']
+        self.assertEqual(len(self.sync(cursor)['changed']), 2)
+
+    def test_expired_cursor_resets(self):
+        now = timezone.now()
+        for old in (sync.encode_cursor(now - timedelta(days=365), 0),
+                    sync.encode_cursor(now, 0, now - timedelta(days=365))):
+            data = self.sync(old)
+            self.assertTrue(data['reset'])
+            self.assertEqual(len(data['changed']), 2)
+
+    def test_pages_through_rows_older_than_the_tombstones(self):
+        for name in ('Third', 'Fourth', 'Fifth'):
+            make_product(name=name)
+        Product.objects.update(updated_at=timezone.now() - 2 * sync.TOMBSTONE_RETENTION)
+        seen, cursor = [], None
+        for _ in range(3):
+            page = self.sync(cursor, limit=2)
+            self.assertFalse(page['reset'])
+            seen += [p['id'] for p in page['changed']]
+            cursor = page['cursor']
+            if not page['has_more']:
+                break
+        self.assertEqual(seen, list(Product.objects.order_by('updated_at', 'id').values_list('id', flat=True)))
+        self.assertFalse(page['has_more'])
+
+        # Caught up, an untouched catalog stays incremental
+        idle = self.sync(cursor)
+        self.assertFalse(idle['reset'])
+        self.assertEqual(idle['changed'], [])
+
+    def test_bad_cursor(self):
+        response = self.client.get('/api/products/changes/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(CATALOG_SNAPSHOT_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        invalidate_catalog_version()
+
+        self.first = make_product(name='First', category='Men')
+        self.second = make_product(name='Second', category='Women')
+        self.client = APIClient()
+        build_snapshot()
+
+    def download(self, manifest):
+        response = self.client.get(manifest['url'])
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        return json.loads(gzip.decompress(b''.join(response.streaming_content)))
+
+    def test_manifest_points_at_the_catalog(self):
+        manifest = self.client.get('/api/products/snapshot/').data
+        catalog = self.download(manifest)
+        self.assertEqual(catalog['version'], manifest['version'])
+        self.assertEqual({p['name'] for p in catalog['products']}, {'First', 'Second'})
+        self.assertEqual(catalog['facets']['total'], 2)
+
+    def test_same_catalog_same_file(self):
+        first = self.client.get('/api/products/snapshot/').data
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/products/snapshot/').data
+        self.assertEqual(first['file'], second['file'])
+
+    def test_rebuilt_after_a_change(self):
+        old = self.client.get('/api/products/snapshot/').data
+        make_product(name='Third')
+        invalidate_catalog_version()
+        stale = self.client.get('/api/products/snapshot/').data  # queues the rebuild
+        self.assertEqual(stale['file'], old['file'])
+        self.client.get('/api/products/snapshot/')
+        self.assertEqual(Task.objects.filter(name='products.build_catalog_snapshot').count(), 1)
+        run_pending()
+        new = self.client.get('/api/products/snapshot/').data
+        self.assertNotEqual(new['file'], old['file'])
+        self.assertEqual(len(self.download(new)['products']), 3)
+
+    def test_first_snapshot_is_queued_not_built_in_the_request(self):
+        shutil.rmtree(snapshot_root())
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        response = self.client.get('/api/products/snapshot/')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(self.client.get('/api/products/snapshot/').status_code, 200)
+
+    def test_cursor_catches_up_from_the_snapshot(self):
+        Product.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        invalidate_catalog_version()
+        build_snapshot()
+        manifest = self.client.get('/api/products/snapshot/').data
+        self.assertEqual(len(self.download(manifest)['products']), 2)
+
+        self.first.stock = 1
+        self.first.save()
+        deleted_id = self.second.pk
+        self.second.delete()
+        delta = self.client.get('/api/products/changes/', {'since': manifest['cursor']}).data
+        self.assertFalse(delta['reset'])
+        self.assertEqual([p['id'] for p in delta['changed']], [self.first.pk])
+        self.assertEqual(delta['deleted'], [deleted_id])
+
+    def test_unknown_file_is_404(self):
+        self.assertEqual(self.client.get('/api/catalog/../../settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/api/catalog/catalog-0000000000000000.json.gz').status_code, 404)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_catalog_version()
+        self.product = make_product(name='Cached', category='Men', is_bestseller=True)
+        self.client = APIClient()
+
+    def test_list_and_detail_are_cached_per_catalog_version(self):
+        for url in ('/api/products/?category=Men', f'/api/products/{self.product.pk}/'):
+            self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product(name='Newer', category='Men')
+        response = self.client.get('/api/products/?category=Men')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data), 2)
+
+    def test_warm_caches_covers_common_pages(self):
+        out = io.StringIO()
+        call_command('warm_caches', '--dry-run', stdout=out)
+        urls = out.getvalue()
+        self.assertIn('/api/products/?category=Men&in_stock=true', urls)
+        self.assertIn(f'/api/products/{self.product.pk}/similar/', urls)
+        self.assertIn('/api/products/facets/?in_stock=true', urls)
+
+    def test_warm_caches_encodes_filter_values(self):
+        make_product(name='Luxe', brand='Dolce & Gabbana #1+')
+        out = io.StringIO()
+        call_command('warm_caches', '--dry-run', stdout=out)
+        queries = [
+            QueryDict(line.split('?', 1)[1]) for line in out.getvalue().splitlines()
+            if '/api/products/?brand=' in line
+        ]
+        self.assertIn('Dolce & Gabbana #1+', [query['brand'] for query in queries])
+        self.assertTrue(all(list(query) == ['brand'] for query in queries))
+
+
+class OptimisticUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(stock=10)
+        staff = User.objects.create_user(email='staff@example.com', password='x', full_name='Staff', role='staff')
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+        self.url = f'/api/products/{self.product.pk}/'
+
+    def test_edit_with_current_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.put(self.url, {'stock': 7}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response['ETag'], f'"{response.data["updated_at"]}"')
+
+    def test_stale_etag_is_rejected(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.put(self.url, {'stock': 7}, format='json', HTTP_IF_MATCH=etag)
+        response = self.client.put(self.url, {'stock': 3}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+
+    def test_without_if_match_last_write_wins(self):
+        response = self.client.put(self.url, {'stock': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_race_is_caught_by_the_update_itself(self):
+        mine = Product.objects.get(pk=self.product.pk)
+        theirs = Product.objects.get(pk=self.product.pk)
+        theirs.stock = 1
+        theirs.save()
+        # Passes the early check (same version loaded) but loses at the UPDATE
+        with self.assertRaises(PreconditionFailed):
+            with expect_unchanged(mine, mine.updated_at):
+                mine.stock = 9
+                mine.save()
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 1)
+        self.assertEqual(Product.objects.count(), 1)
+
+
+class CurrencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_catalog_version()
+        invalidate_rates()
+        self.addCleanup(invalidate_rates)
+        ExchangeRate.objects.create(currency='USD', rate=Decimal('0.0036'))
+        ExchangeRate.objects.create(currency='JPY', rate=Decimal('0.5321'))
+        self.product = make_product(price=Decimal('2999.99'))
+        self.client = APIClient()
+
+    def test_list_and_detail_in_requested_currency(self):
+        listed = self.client.get('/api/products/?currency=usd').data[0]
+        self.assertEqual((listed['price'], listed['currency']), ('10.80', 'USD'))
+        self.assertEqual((listed['original_price'], listed['original_currency']), ('2999.99', 'PKR'))
+        detail = self.client.get(f'/api/products/{self.product.pk}/?currency=JPY').data
+        # 2999.99 * 0.5321 = 1596.2946..., JPY has no minor unit
+        self.assertEqual(detail['price'], '1596')
+        self.assertEqual(self.client.get('/api/products/').data[0]['price'], '2999.99')
+
+    def test_unknown_currency_is_400(self):
+        response = self.client.get('/api/products/?currency=XXX')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('currency', response.data)
+
+    def test_page_converts_with_one_factor_per_currency(self):
+        table = rate_table()
+        items = [{'price': '1.00', 'currency': 'PKR'}, {'price': '100', 'currency': 'USD'}] * 3
+        with mock.patch.object(table, 'factor', wraps=table.factor) as factor:
+            convert_prices(items, 'JPY', table)
+        self.assertEqual(factor.call_count, 2)
+        self.assertEqual([item['price'] for item in items[:2]], ['1', '14781'])
+
+    def test_rate_changes_reload_the_table(self):
+        self.assertEqual(self.client.get('/api/products/?currency=USD').data[0]['price'], '10.80')
+        ExchangeRate.objects.filter(currency='USD').update(rate=Decimal('0.0040'), updated_at=timezone.now())
+        with mock.patch('products.currency.VERSION_TTL', 0):
+            self.assertEqual(self.client.get('/api/products/?currency=USD').data[0]['price'], '12.00')
+
+    def test_rates_from_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f'{directory}/rates.json'
+        with open(path, 'w') as handle:
+            json.dump({'base': 'PKR', 'rates': {'EUR': '0.0033'}}, handle)
+        with override_settings(CURRENCY_RATES_FILE=path):
+            invalidate_rates()
+            self.assertEqual(self.client.get('/api/products/?currency=EUR').data[0]['price'], '9.90')
+            self.assertEqual(self.client.get('/api/products/?currency=USD').status_code, 400)
+
+
+    def test_zero_rates_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            ExchangeRate(currency='EUR', rate=Decimal('0')).full_clean()
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = f'{directory}/rates.json'
+        with open(path, 'w') as handle:
+            json.dump({'base': 'PKR', 'rates': {'EUR': '0.0033', 'GBP': '0'}}, handle)
+        with self.assertRaisesMessage(CommandError, 'GBP'):
+            call_command('load_exchange_rates', path, stdout=io.StringIO())
+        self.assertFalse(ExchangeRate.objects.filter(currency='EUR').exists())
+
+        # A row that got in anyway is treated as missing, not divided by
+        ExchangeRate.objects.filter(currency='USD').update(rate=0, updated_at=timezone.now())
+        invalidate_rates()
+        self.assertEqual(self.client.get('/api/products/?currency=USD').status_code, 400)
+        convert = [{'price': '1.00', 'currency': 'USD'}]
+        convert_prices(convert, 'JPY', rate_table())
+        self.assertEqual(convert[0]['price'], '1.00')
+
+class ReviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(rating=None)
+        self.users = [
+            User.objects.create_user(email=f'r{i}@example.com', password='x', full_name=f'R{i}')
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.url = f'/api/products/{self.product.pk}/reviews/'
+
+    def aggregates(self):
+        product = Product.objects.get(pk=self.product.pk)
+        return product.rating, product.review_count, product.rating_sum
+
+    def post(self, user, rating):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, {'rating': rating, 'body': 'Nice'}, format='json')
+
+    def test_aggregates_follow_creates_edits_and_deletes(self):
+        self.assertEqual(self.post(self.users[0], 5).status_code, 201)
+        self.post(self.users[1], 4)
+        self.post(self.users[2], 4)
+        self.assertEqual(self.aggregates(), (Decimal('4.33'), 3, 13))
+
+        self.assertEqual(self.post(self.users[2], 1).status_code, 200)
+        self.assertEqual(self.aggregates(), (Decimal('3.33'), 3, 10))
+
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.delete(self.url).status_code, 204)
+        self.users[1].delete()
+        self.assertEqual(self.aggregates(), (Decimal('1.00'), 1, 1))
+        Review.objects.all().delete()
+        self.assertEqual(self.aggregates(), (None, 0, 0))
+
+    def test_new_review_cost_does_not_grow_with_review_count(self):
+        user = User.objects.create_user(email='late@example.com', password='x', full_name='Late')
+        other = make_product(name='Other')
+        with CaptureQueriesContext(connection) as first:
+            submit_review(self.users[0], other, 3)
+        Review.objects.bulk_create(
+            Review(product=self.product, user=u, rating=4) for u in self.users
+        )
+        with self.assertNumQueries(len(first.captured_queries)):
+            submit_review(user, self.product, 3)
+
+    def test_keyset_pages(self):
+        for index, user in enumerate(self.users):
+            submit_review(user, self.product, index + 1)
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            with self.assertNumQueries(2):
+                data = self.client.get(self.url, params).data
+            seen += [review['rating'] for review in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [5, 4, 3, 2, 1])
+        self.assertEqual(data['review_count'], 5)
+
+    def test_product_edit_keeps_review_totals(self):
+        staff = User.objects.create_user(email='staff@example.com', password='x', full_name='S', role='staff')
+        self.client.force_authenticate(staff)
+        submit_review(self.users[0], self.product, 5)
+        etag = self.client.get(f'/api/products/{self.product.pk}/')['ETag']
+        response = self.client.put(
+            f'/api/products/{self.product.pk}/', {'stock': 2, 'review_count': 99}, format='json', HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.aggregates(), (Decimal('5.00'), 1, 5))
+
+
+    def test_review_changes_the_cached_detail(self):
+        url = f'/api/products/{self.product.pk}/'
+        before = self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        submit_review(self.users[0], self.product, 4)
+        invalidate_catalog_version()  # as other processes do after VERSION_TTL
+        after = self.client.get(url)
+        self.assertEqual(after['X-Cache'], 'MISS')
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual((after.data['rating'], after.data['review_count']), ('4.00', 1))
+
+class WishlistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_catalog_version()
+        self.products = [make_product(name=f'Frame {i}') for i in range(4)]
+        self.user = User.objects.create_user(email='fan@example.com', password='x', full_name='Fan')
+        self.client = APIClient()
+
+    def test_add_list_and_remove(self):
+        self.client.force_authenticate(self.user)
+        pk = self.products[1].pk
+        self.assertEqual(self.client.post('/api/wishlist/', {'product_id': pk}, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/wishlist/', {'product_id': pk}, format='json').status_code, 200)
+        self.assertEqual([item['id'] for item in self.client.get('/api/wishlist/').data], [pk])
+        self.assertEqual(self.client.delete(f'/api/wishlist/{pk}/').status_code, 204)
+        self.assertEqual(self.client.get('/api/wishlist/').data, [])
+        self.assertEqual(self.client.post('/api/wishlist/', {'product_id': 0}, format='json').status_code, 404)
+
+    def test_list_flags_cost_one_query_and_share_the_page_cache(self):
+        WishlistItem.objects.create(user=self.user, product=self.products[0])
+        WishlistItem.objects.create(user=self.user, product=self.products[2])
+        anonymous = self.client.get('/api/products/')
+        self.assertNotIn('is_favourite', anonymous.data[0])
+        self.assertIn('Authorization', anonymous['Vary'])
+
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/products/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        flagged = {item['id'] for item in response.data if item['is_favourite']}
+        self.assertEqual(flagged, {self.products[0].pk, self.products[2].pk})
+
+        self.client.force_authenticate(None)
+        self.assertNotIn('is_favourite', self.client.get('/api/products/').data[0])
+
+
+class ImageDedupTests(TestCase):
+    PHOTO = b'GIF89a\x01\x00\x01\x00\x00\x00\x00;' + b'lifestyle' * 100
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='x', full_name='Staff', role='staff'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def upload(self, name, content=None):
+        photo = SimpleUploadedFile(f'{name}.gif', content or self.PHOTO, content_type='image/gif')
+        response = self.client.post('/api/products/', {
+            'name': name, 'description': 'Frame', 'price': '10.00', 'stock': 1, 'images': [photo],
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return Product.objects.get(pk=response.data['id']).images.get()
+
+    def test_same_bytes_share_one_file(self):
+        first, second = self.upload('One'), self.upload('Two')
+        other = self.upload('Three', content=b'GIF89a other photo')
+
+        blob = ImageBlob.objects.get(pk=first.blob_id)
+        self.assertEqual(second.blob_id, blob.pk)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith(f'products/blobs/{blob.sha256[:2]}/{blob.sha256}'))
+        self.assertNotEqual(other.blob_id, blob.pk)
+        self.assertEqual(default_storage.listdir(f'products/blobs/{blob.sha256[:2]}')[1], [blob.file.name.split('/')[-1]])
+
+    def test_file_goes_with_its_last_image(self):
+        first, second = self.upload('One'), self.upload('Two')
+        name = first.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/products/{first.product_id}/delete_image/', {'image_id': first.pk}, format='json'
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(name))
+
+        # Deleting the product cascades to its image
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/products/{second.product_id}/')
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_dedupe_command_moves_legacy_images(self):
+        for index in range(2):
+            name = default_storage.save(f'products/legacy{index}.gif', io.BytesIO(self.PHOTO))
+            ProductImage.objects.create(product=make_product(name=f'Old {index}'), image=name)
+
+        call_command('dedupe_product_images', stdout=io.StringIO())
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(set(ProductImage.objects.values_list('image', flat=True)), {blob.file.name})
+        self.assertFalse(default_storage.exists('products/legacy0.gif'))
@@ -1,10 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet
+from .views import ProductViewSet, catalog_snapshot, export_products, recommendations, wishlist, wishlist_item
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
 
 urlpatterns = [
+    path('recommendations/', recommendations, name='recommendations'),
+    path('wishlist/', wishlist, name='wishlist'),
+    path('wishlist/<int:product_id>/', wishlist_item, name='wishlist_item'),
+    path('catalog/<str:name>', catalog_snapshot, name='catalog_snapshot'),
+    # Before the router, whose detail route would take "export" as a pk
+    path('products/export.<str:file_format>', export_products, name='export_products'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,24 +1,81 @@
+from django.db.models import ProtectedError
+from django.http import FileResponse, Http404
+from django.urls import reverse
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from .models import Product, ProductImage
-from .serializers import ProductSerializer, ProductImageSerializer
+from authentication.permissions import IsStaffMember
+from lenshive_backend.export import EXPORT_FORMATS, export_response
+from lenshive_backend.preconditions import etag_for, expect_unchanged, if_match
+from .currency import cache_variant, convert_prices, requested_currency
+from .models import Product, ProductImage, Review, WishlistItem
+from .reviews import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, review_page, submit_review
+from .serializers import ProductSerializer, ProductImageSerializer, ReviewSerializer
+from .facets import facets_for
+from .filters import filter_key, filter_products
+from .images import add_image
+from .page_cache import CACHE_HEADER, cached_page, page_key
+from .recommendations import recommend
+from .similarity import queue_similar, similar_ids
+from .snapshot import current_manifest, snapshot_path
+from .sync import DEFAULT_LIMIT, MAX_LIMIT, InvalidCursor, changes_since
+from .wishlist import mark_favourites, vary_on_auth
+
+MAX_RECOMMENDATIONS = 50
+PRODUCT_EXPORT_COLUMNS = [
+    'id', 'name', 'brand', 'category', 'price', 'currency', 'stock', 'is_available',
+    'is_bestseller', 'is_new', 'rating', 'review_count', 'frame_colors', 'sizes',
+    'created_at', 'updated_at',
+]
 
 class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]  # Requires authentication to access
+    # Read-only actions served from a read replica when one is configured
+    replica_actions = ['list', 'retrieve', 'facets', 'reviews']
 
     def get_permissions(self):
         """
         Allow unauthenticated access to list and retrieve actions,
         but require authentication for create, update, and delete actions.
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'similar', 'facets', 'changes', 'snapshot']:
+            return []
+        if self.action == 'reviews' and self.request.method == 'GET':
             return []
         return [IsAuthenticated()]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('images')
+        if self.action == 'list':
+            queryset = filter_products(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        currency = requested_currency(request)
+        data, hit = cached_page(
+            page_key('list', request, filter_key(request.query_params) + cache_variant(currency)),
+            lambda: convert_prices(super(ProductViewSet, self).list(request, *args, **kwargs).data, currency)
+        )
+        response = Response(mark_favourites(request, data))
+        response[CACHE_HEADER] = 'HIT' if hit else 'MISS'
+        return vary_on_auth(response)
+
+    def retrieve(self, request, *args, **kwargs):
+        currency = requested_currency(request)
+        data, hit = cached_page(
+            page_key('detail', request, str(kwargs.get('pk')) + cache_variant(currency)),
+            lambda: convert_prices([super(ProductViewSet, self).retrieve(request, *args, **kwargs).data], currency)[0]
+        )
+        response = Response(mark_favourites(request, [data])[0])
+        response[CACHE_HEADER] = 'HIT' if hit else 'MISS'
+        response['ETag'] = etag_for(data['updated_at'])
+        return vary_on_auth(response)
+
     def create(self, request, *args, **kwargs):
         images = request.FILES.getlist('images', [])
         serializer = self.get_serializer(data=request.data)
@@ -26,30 +83,165 @@ class ProductViewSet(viewsets.ModelViewSet):
         product = serializer.save()
 
         for index, image in enumerate(images):
-            ProductImage.objects.create(
-                product=product,
-                image=image,
-                is_primary=(index == 0)  # First image will be primary
-            )
+            add_image(product, image, is_primary=(index == 0))  # First image will be primary
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
+        """
+        Send If-Match with the product's ETag (or quoted updated_at) to
+        get 412 instead of overwriting someone else's edit.
+        """
         images = request.FILES.getlist('images', [])
         instance = self.get_object()
-        serializer = self.get_serializer(instance, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        product = serializer.save()
+        with expect_unchanged(instance, if_match(request)):
+            serializer = self.get_serializer(instance, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            product = serializer.save()
 
         # Handle new images
         for image in images:
-            ProductImage.objects.create(
-                product=product,
-                image=image,
-                is_primary=not product.images.exists()  # Make primary if no other images exist
+            # Make primary if no other images exist
+            add_image(product, image, is_primary=not product.images.exists())
+        if images:
+            # Adding images bumped updated_at again
+            product.refresh_from_db(fields=['updated_at'])
+
+        response = Response(serializer.data)
+        response['ETag'] = etag_for(product.updated_at)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        """Products that have been ordered stay, so order history keeps its lines"""
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {'message': 'This product has been ordered and cannot be deleted; set its stock to 0 instead'},
+                status=status.HTTP_409_CONFLICT
             )
 
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts for category chips, brand/colour/size lists, price buckets
+        and "in stock" badges, for the same filters the list accepts
+        GET /api/products/facets/?category=Men&in_stock=true
+        """
+        return Response(facets_for(request.query_params))
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync for the app's local catalog
+        GET /api/products/changes/?since=<cursor>&limit=500
+        Without `since` every product is listed (in pages). Keep calling with
+        the returned cursor while `has_more` is true; if `reset` is true the
+        cursor had expired and the local copy should be replaced.
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = changes_since(request.query_params.get('since'), limit=limit)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result['changed'] = self.get_serializer(result['changed'], many=True).data
+        return Response(result)
+
+    @action(detail=False, methods=['get'])
+    def snapshot(self, request):
+        """
+        Where to download the whole catalog in one file
+        GET /api/products/snapshot/
+        Returns {version, url, sha256, size, ...}; the file at `url` never
+        changes, so clients and edge caches can keep it indefinitely and
+        then catch up with /api/products/changes/?since=<cursor>.
+        503 until the first snapshot has been built.
+        """
+        manifest = current_manifest()
+        if manifest is None:
+            response = Response(
+                {'error': 'Catalog snapshot is being built'}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = '30'
+            return response
+        manifest = dict(manifest)
+        manifest['url'] = request.build_absolute_uri(
+            reverse('catalog_snapshot', args=[manifest['file']])
+        )
+        response = Response(manifest)
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        "Similar frames" rail for the product detail screen
+        GET /api/products/{id}/similar/
+        """
+        try:
+            product_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        currency = requested_currency(request)
+        ranked = similar_ids(product_id)
+        if not ranked:
+            if not Product.objects.filter(pk=product_id).exists():
+                return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+            # Not computed yet: an empty rail now, the worker fills it in
+            queue_similar(product_id)
+
+        products = Product.objects.filter(is_available=True).prefetch_related('images').in_bulk(ranked)
+        serializer = self.get_serializer(
+            [products[similar_id] for similar_id in ranked if similar_id in products],
+            many=True
+        )
+        return Response(convert_prices(serializer.data, currency))
+
+    @action(detail=True, methods=['get', 'post', 'delete'])
+    def reviews(self, request, pk=None):
+        """
+        GET    /api/products/{id}/reviews/?cursor=<next>&limit=20  newest first
+        POST   /api/products/{id}/reviews/  {"rating": 1-5, "title": "", "body": ""}
+               (posting again replaces your review)
+        DELETE /api/products/{id}/reviews/  removes your review
+        """
+        product = self.get_object()
+
+        if request.method == 'GET':
+            try:
+                limit = max(1, min(int(request.query_params.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+            except ValueError:
+                return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                page, next_cursor = review_page(product.pk, request.query_params.get('cursor'), limit)
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                'rating': product.rating,
+                'review_count': product.review_count,
+                'results': ReviewSerializer(page, many=True).data,
+                'next': next_cursor,
+            })
+
+        if request.method == 'DELETE':
+            deleted, _ = Review.objects.filter(product=product, user=request.user).delete()
+            if not deleted:
+                return Response({'error': 'Review not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = ReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        review, created = submit_review(request.user, product, **serializer.validated_data)
+        return Response(
+            ReviewSerializer(review).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
     @action(detail=True, methods=['post'])
     def delete_image(self, request, pk=None):
@@ -68,10 +260,15 @@ class ProductViewSet(viewsets.ModelViewSet):
                     next_image.is_primary = True
                     next_image.save()
                     
-            return Response(status=status.HTTP_204_NO_CONTENT)
+            return Response(status=status.HTTP_204_NO_CONTENT, headers=self.version_header(product))
         except ProductImage.DoesNotExist:
             return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    def version_header(self, product):
+        """ETag after an image change, which bumps the product's updated_at"""
+        updated_at = Product.objects.filter(pk=product.pk).values_list('updated_at', flat=True).first()
+        return {'ETag': etag_for(updated_at)} if updated_at else {}
+
     @action(detail=True, methods=['post'])
     def set_primary_image(self, request, pk=None):
         product = self.get_object()
@@ -81,6 +278,114 @@ class ProductViewSet(viewsets.ModelViewSet):
             image = product.images.get(id=image_id)
             image.is_primary = True
             image.save()  # This will automatically set other images to not primary
-            return Response(status=status.HTTP_200_OK)
+            return Response(status=status.HTTP_200_OK, headers=self.version_header(product))
         except ProductImage.DoesNotExist:
             return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def recommendations(request):
+    """
+    Rank the catalog against lens quiz answers
+    POST /api/recommendations/?k=10
+    Body: QuestionnaireAnswer.toJson() from the app, e.g.
+          {"screenTimeHours": 6, "sunlightTime": "h2to4", "activities": ["gaming"], "budgetPKR": 5000}
+    """
+    answers = request.data
+    if isinstance(answers, dict):
+        answers = answers.get('answers', answers)
+    if not isinstance(answers, dict):
+        return Response({'message': 'Answers must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        k = max(1, min(int(request.query_params.get('k', 10)), MAX_RECOMMENDATIONS))
+    except ValueError:
+        return Response({'message': 'k must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    currency = requested_currency(request)
+    ranked = recommend(answers, k=k)
+    products = Product.objects.prefetch_related('images').in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, score in ranked:
+        if pk in products:
+            data = ProductSerializer(products[pk], context={'request': request}).data
+            data['score'] = round(score, 4)
+            results.append(data)
+    return Response({'results': convert_prices(results, currency)})
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def wishlist(request):
+    """
+    My favourite frames, most recently added first / add one
+    GET  /api/wishlist/?currency=USD
+    POST /api/wishlist/  Body: {"product_id": 1}
+    """
+    if request.method == 'GET':
+        currency = requested_currency(request)
+        products = (
+            Product.objects.filter(wishlisted_by__user=request.user)
+            .prefetch_related('images').order_by('-wishlisted_by__created_at')
+        )
+        data = convert_prices(ProductSerializer(products, many=True, context={'request': request}).data, currency)
+        for item in data:
+            item['is_favourite'] = True
+        return Response(data)
+
+    try:
+        product_id = int(request.data.get('product_id'))
+    except (TypeError, ValueError):
+        return Response({'error': 'product_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if not Product.objects.filter(pk=product_id).exists():
+        return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    _, created = WishlistItem.objects.get_or_create(user=request.user, product_id=product_id)
+    return Response(
+        {'product_id': product_id, 'is_favourite': True},
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def wishlist_item(request, product_id):
+    """
+    Remove a product from my favourites
+    DELETE /api/wishlist/{product_id}/
+    """
+    WishlistItem.objects.filter(user=request.user, product_id=product_id).delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffMember])
+def export_products(request, file_format):
+    """
+    Stream the catalog as CSV or JSON Lines (staff/admin), with the same
+    filters as the product list
+    GET /api/products/export.csv?category=Men&in_stock=true
+    GET /api/products/export.jsonl
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    products = filter_products(Product.objects.all(), request.query_params)
+    return export_response(products, PRODUCT_EXPORT_COLUMNS, 'products', file_format)
+
+
+def catalog_snapshot(request, name):
+    """
+    Serve a prebuilt catalog snapshot (gzip-encoded JSON)
+    GET /api/catalog/<name>
+    """
+    path = snapshot_path(name)
+    if path is None:
+        raise Http404('Snapshot not found')
+
+    response = FileResponse(open(path, 'rb'), content_type='application/json')
+    response['Content-Encoding'] = 'gzip'
+    # Content-addressed name: the bytes behind it never change
+    response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response['ETag'] = f'"{name}"'
+    return response
@@ -0,0 +1,39 @@
+"""
+Favourite flags for product responses.
+
+Cached product pages are shared by everyone, so they never contain
+per-user data. For a signed-in user `mark_favourites` adds `is_favourite`
+to a (copied) page afterwards, with one query for the whole page; the
+page cache, and anonymous responses, are unaffected.
+"""
+from django.utils.cache import patch_vary_headers
+from .models import WishlistItem
+
+
+def favourite_ids(user, product_ids):
+    """The subset of `product_ids` on `user`'s wishlist, as a set"""
+    if not product_ids:
+        return set()
+    return set(
+        WishlistItem.objects.filter(user=user, product_id__in=product_ids)
+        .values_list('product_id', flat=True)
+    )
+
+
+def mark_favourites(request, items):
+    """
+    Set `is_favourite` on serialized products in `items` when the request
+    is authenticated; anonymous requests get `items` back untouched.
+    """
+    if not request.user or not request.user.is_authenticated:
+        return items
+    favourites = favourite_ids(request.user, [item['id'] for item in items])
+    for item in items:
+        item['is_favourite'] = item['id'] in favourites
+    return items
+
+
+def vary_on_auth(response):
+    """Shared caches must not hand a user's flags to someone else"""
+    patch_vary_headers(response, ['Authorization'])
+    return response
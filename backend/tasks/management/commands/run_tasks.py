@@ -0,0 +1,52 @@
+import multiprocessing
+import signal
+from django.core.management.base import BaseCommand
+from django.db import connections
+from tasks.runner import run_pending, run_workers
+
+
+def _serve(threads, poll):
+    # Children stop on SIGTERM like the parent does on Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    run_workers(threads=threads, poll=poll)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (image processing, snapshots, imports, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Worker threads per process')
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes (CPU-heavy tasks)')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Run what is due now, then exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            count = run_pending(worker_id='run_tasks --once')
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} tasks'))
+            return
+
+        threads = max(1, options['threads'])
+        processes = max(1, options['processes'])
+        self.stdout.write(f'Task workers: {processes} process(es) x {threads} thread(s). Ctrl+C to stop.')
+        if processes == 1:
+            run_workers(threads=threads, poll=options['poll'])
+            return
+
+        # Forked children must not share the parent's database sockets
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [
+            context.Process(target=_serve, args=(threads, options['poll']), daemon=False)
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
@@ -0,0 +1,212 @@
+"""
+Task registry, enqueueing and execution.
+
+    from tasks.runner import task, enqueue
+
+    @task('products.rebuild_similar', max_attempts=2)
+    def rebuild(batch_size=1024): ...
+
+    enqueue('products.rebuild_similar', priority=5, batch_size=512)
+
+Payloads are keyword arguments and must be JSON-serialisable. A task that
+raises is retried with exponential backoff until `max_attempts`, then
+marked failed with the traceback in `last_error`.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 10
+# A running task not finished after this long is assumed lost (worker died)
+RUNNING_TIMEOUT = timedelta(minutes=30)
+CLAIM_CANDIDATES = 5
+
+_registry = {}
+
+
+class UnknownTask(KeyError):
+    pass
+
+
+def task(name, max_attempts=3, priority=0):
+    """Register a function as a background task"""
+    def register(func):
+        _registry[name] = {'func': func, 'max_attempts': max_attempts, 'priority': priority}
+        func.task_name = name
+        return func
+    return register
+
+
+def registered(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(name)
+
+
+def enqueue(name, priority=None, delay=None, unique_key=None, user=None, **payload):
+    """
+    Queue `name` to run with `payload` as keyword arguments. With
+    `unique_key`, an identical task still waiting in the queue is returned
+    instead of adding another.
+    """
+    entry = registered(name)
+    if unique_key is not None:
+        existing = Task.objects.filter(name=name, unique_key=unique_key, status='queued').first()
+        if existing is not None:
+            return existing
+
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        unique_key=unique_key,
+        priority=entry['priority'] if priority is None else priority,
+        max_attempts=entry['max_attempts'],
+        run_after=timezone.now() + (delay or timedelta(0)),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def claim(worker_id):
+    """
+    Take the next due task for `worker_id`, or None. The conditional
+    UPDATE means two workers can never both win the same row.
+    """
+    now = timezone.now()
+    candidates = list(
+        Task.objects.filter(status='queued', run_after__lte=now)
+        .order_by('-priority', 'run_after', 'created_at')
+        .values_list('id', flat=True)[:CLAIM_CANDIDATES]
+    )
+    for task_id in candidates:
+        won = Task.objects.filter(pk=task_id, status='queued').update(
+            status='running', locked_by=worker_id, locked_at=now, updated_at=now
+        )
+        if won:
+            return Task.objects.get(pk=task_id)
+    return None
+
+
+def execute(task_obj):
+    """Run a claimed task and record the outcome"""
+    attempts = task_obj.attempts + 1
+    try:
+        func = registered(task_obj.name)['func']
+    except UnknownTask:
+        now = timezone.now()
+        Task.objects.filter(pk=task_obj.pk).update(
+            status='failed', attempts=attempts, last_error=f'Unknown task {task_obj.name}',
+            finished_at=now, updated_at=now
+        )
+        return False
+
+    try:
+        result = func(**task_obj.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if attempts < task_obj.max_attempts:
+            retry_at = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+            Task.objects.filter(pk=task_obj.pk).update(
+                status='queued', attempts=attempts, run_after=retry_at,
+                last_error=error, locked_by='', locked_at=None, updated_at=now
+            )
+            logger.warning('Task failed, will retry', extra={
+                'task_id': str(task_obj.pk), 'task': task_obj.name, 'attempts': attempts
+            })
+        else:
+            Task.objects.filter(pk=task_obj.pk).update(
+                status='failed', attempts=attempts, last_error=error,
+                finished_at=now, updated_at=now
+            )
+            logger.error('Task failed', extra={
+                'task_id': str(task_obj.pk), 'task': task_obj.name, 'attempts': attempts
+            })
+        return False
+
+    now = timezone.now()
+    Task.objects.filter(pk=task_obj.pk).update(
+        status='succeeded', attempts=attempts, result=result,
+        finished_at=now, updated_at=now
+    )
+    return True
+
+
+def requeue_stale():
+    """
+    Put back tasks whose worker disappeared mid-run. The lost run counts
+    as an attempt, so a task that keeps killing its worker ends up failed.
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(status='running', locked_at__lt=now - RUNNING_TIMEOUT)
+    stale.filter(attempts__gte=F('max_attempts') - 1).update(
+        status='failed', attempts=F('attempts') + 1, last_error='Worker lost while running',
+        finished_at=now, updated_at=now
+    )
+    return stale.update(
+        status='queued', attempts=F('attempts') + 1, locked_by='', locked_at=None, updated_at=now
+    )
+
+
+def run_pending(worker_id='inline', limit=None):
+    """Run due tasks in this thread until none are left; returns how many ran"""
+    count = 0
+    while limit is None or count < limit:
+        task_obj = claim(worker_id)
+        if task_obj is None:
+            break
+        execute(task_obj)
+        count += 1
+    return count
+
+
+class Worker(threading.Thread):
+    """Polling loop: claim, run, repeat; sleeps `poll` seconds when idle"""
+
+    def __init__(self, index, stop, poll=1.0):
+        super().__init__(name=f'task-worker-{index}', daemon=True)
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        self.stop = stop
+        self.poll = poll
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    task_obj = claim(self.worker_id)
+                except Exception:
+                    logger.exception('Could not claim a task')
+                    task_obj = None
+                if task_obj is None:
+                    self.stop.wait(self.poll)
+                    continue
+                execute(task_obj)
+        finally:
+            connection.close()
+
+
+def run_workers(threads=2, poll=1.0, stop=None):
+    """Run `threads` workers until `stop` is set (or KeyboardInterrupt)"""
+    stop = stop or threading.Event()
+    requeue_stale()
+    workers = [Worker(index, stop, poll=poll) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    try:
+        while not stop.is_set():
+            stop.wait(60)
+            requeue_stale()
+    except KeyboardInterrupt:
+        stop.set()
+    for worker in workers:
+        worker.join()
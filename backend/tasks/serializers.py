@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from .models import Task
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'name', 'status', 'priority', 'attempts', 'max_attempts',
+            'run_after', 'result', 'last_error', 'created_at', 'updated_at', 'finished_at',
+        ]
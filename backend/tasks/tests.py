@@ -0,0 +1,105 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from .models import Task
+from .runner import claim, enqueue, execute, requeue_stale, run_pending, task
+
+calls = []
+
+
+@task('tests.record', priority=1)
+def record(value):
+    calls.append(value)
+    return {'value': value}
+
+
+@task('tests.flaky', max_attempts=2)
+def flaky():
+    raise RuntimeError('try again')
+
+
+class TaskRunnerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_by_priority(self):
+        enqueue('tests.record', value='low', priority=0)
+        enqueue('tests.record', value='high', priority=9)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertEqual(Task.objects.filter(status='succeeded').count(), 2)
+
+    def test_result_is_stored(self):
+        queued = enqueue('tests.record', value='x')
+        run_pending()
+        queued.refresh_from_db()
+        self.assertEqual(queued.result, {'value': 'x'})
+        self.assertIsNotNone(queued.finished_at)
+
+    def test_unique_key_coalesces_queued_tasks(self):
+        first = enqueue('tests.record', value='a', unique_key='same')
+        second = enqueue('tests.record', value='b', unique_key='same')
+        self.assertEqual(first.pk, second.pk)
+
+    def test_delayed_tasks_wait(self):
+        enqueue('tests.record', value='later', delay=timedelta(minutes=5))
+        self.assertEqual(run_pending(), 0)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        queued = enqueue('tests.flaky')
+        with self.assertLogs('tasks.runner', 'WARNING'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('queued', 1))
+        self.assertGreater(queued.run_after, timezone.now())
+        self.assertIn('try again', queued.last_error)
+
+        Task.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        with self.assertLogs('tasks.runner', 'ERROR'):
+            run_pending()
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), ('failed', 2))
+
+    def test_a_claimed_task_cannot_be_claimed_again(self):
+        enqueue('tests.record', value='once')
+        claimed = claim('worker-a')
+        self.assertIsNotNone(claimed)
+        self.assertIsNone(claim('worker-b'))
+        execute(claimed)
+        self.assertEqual(calls, ['once'])
+
+    def test_lost_tasks_are_requeued(self):
+        queued = enqueue('tests.record', value='lost')
+        claim('worker-a')
+        Task.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(run_pending(), 1)
+
+
+class TaskStatusApiTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='pass12345', full_name='Owner')
+        self.other = User.objects.create_user(email='other@example.com', password='pass12345', full_name='Other')
+        self.staff = User.objects.create_user(
+            email='staff@example.com', password='pass12345', full_name='Staff', role='staff'
+        )
+        self.task = enqueue('tests.record', value='x', user=self.owner)
+
+    def get(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get(url)
+
+    def test_owner_and_staff_can_see_status(self):
+        url = f'/api/tasks/{self.task.pk}/'
+        self.assertEqual(self.get(self.owner, url).data['status'], 'queued')
+        self.assertEqual(self.get(self.staff, url).status_code, 200)
+        self.assertEqual(self.get(self.other, url).status_code, 404)
+
+    def test_staff_list(self):
+        response = self.get(self.staff, '/api/tasks/?status=queued')
+        self.assertEqual(response.data['counts'], {'queued': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.get(self.owner, '/api/tasks/').status_code, 403)
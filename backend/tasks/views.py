@@ -0,0 +1,49 @@
+from django.db.models import Count
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from authentication.permissions import IsStaffMember
+from .models import Task
+from .serializers import TaskSerializer
+
+MAX_TASKS = 100
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffMember])
+def task_list(request):
+    """
+    Recent background tasks (staff/admin)
+    GET /api/tasks/?status=failed&name=products.refresh_similar
+    """
+    tasks = Task.objects.all()
+    if request.query_params.get('status'):
+        tasks = tasks.filter(status=request.query_params['status'])
+    if request.query_params.get('name'):
+        tasks = tasks.filter(name=request.query_params['name'])
+    counts = {
+        row['status']: row['count']
+        for row in Task.objects.order_by().values('status').annotate(count=Count('id'))
+    }
+    return Response({
+        'counts': counts,
+        'results': TaskSerializer(tasks[:MAX_TASKS], many=True).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_detail(request, task_id):
+    """
+    Status of one task; visible to whoever queued it and to staff
+    GET /api/tasks/{id}/
+    """
+    try:
+        task = Task.objects.get(pk=task_id)
+    except Task.DoesNotExist:
+        return Response({'message': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if task.created_by_id != request.user.pk and not request.user.is_staff_member:
+        return Response({'message': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(TaskSerializer(task).data)